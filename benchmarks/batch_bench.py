@@ -0,0 +1,50 @@
+"""
+Boards advanced per second (one board through one end-of-turn: city card draws, epidemics,
+infections and outbreaks) for N games played to the end, with a Python loop over Boards
+versus BoardBatch advancing all N in lockstep. Setup isn't timed.
+
+Run from this directory: python batch_bench.py
+"""
+import sys
+sys.path.append('..')
+import time
+from board_batch import BoardBatch
+from custom_exceptions import GameEndedError
+from simulation import Simulation
+
+SIZES = [1, 100, 10000]
+
+
+def loop_rate(size: int) -> float:
+    boards = [Simulation(seed=i).board for i in range(size)]
+    advanced = 0
+    start = time.perf_counter()
+    for board in boards:
+        try:
+            while True:
+                advanced += 1
+                board.draw_city_cards()
+                board.draw_infection_cards_and_place_cubes()
+        except GameEndedError:
+            pass
+    return advanced / (time.perf_counter() - start)
+
+
+def batch_rate(size: int) -> float:
+    batch = BoardBatch(size, seed=0)
+    advanced = 0
+    start = time.perf_counter()
+    while True:
+        boards = batch.advance()
+        if not boards:
+            break
+        advanced += boards
+    return advanced / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    for size in SIZES:
+        loop = loop_rate(size)
+        batch = batch_rate(size)
+        print("N={:<6} loop {:>10.0f} boards/sec   batch {:>10.0f} boards/sec ({:.1f}x)".format(
+            size, loop, batch, batch / loop))
@@ -0,0 +1,46 @@
+"""
+Time what a tree search does for every move it tries: copy the board and play the move on
+the copy, with a pickle round trip versus Board.clone, versus playing the move on the board
+itself and undoing it. Moves are taken mid-turn and on the last action of a turn (which
+draws cards and infects cities, so has more to put back).
+
+Run from this directory: python clone_bench.py
+"""
+import sys
+sys.path.append('..')
+import pickle
+import timeit
+from board import Board
+from constants import *
+from simulation import Simulation
+
+NUMBER = 2000
+
+
+def pickle_apply(board: Board, action: dict) -> None:
+    pickle.loads(pickle.dumps(board)).apply(action)
+
+
+def clone_apply(board: Board, action: dict) -> None:
+    board.clone().apply(action)
+
+
+def apply_undo(board: Board, action: dict) -> None:
+    board.undo(board.apply(action))
+
+
+if __name__ == '__main__':
+    board = Simulation(num_players=4, seed=0).board
+    action = board.legal_actions()[0]
+    mid_turn = (board, action)
+    end_of_turn = board.clone()
+    end_of_turn.active_player.actions_left = 1
+    end_of_turn = (end_of_turn, action)
+    for when, (b, a) in [("mid-turn", mid_turn), ("end of turn", end_of_turn)]:
+        baseline = None
+        for name, run in [("pickle+apply", pickle_apply), ("clone+apply", clone_apply),
+                          ("apply+undo", apply_undo)]:
+            seconds = min(timeit.repeat(lambda: run(b, a), number=NUMBER, repeat=5)) / NUMBER
+            baseline = baseline or seconds
+            print("{:<12} {:<13} {:>8.1f} us ({:.1f}x faster)".format(
+                when, name, seconds * 1e6, baseline / seconds))
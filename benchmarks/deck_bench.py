@@ -0,0 +1,122 @@
+"""
+Time the card pile moves of a long simulated game on bare piles, with no CardManager
+bookkeeping around them: plain lists sliced inline, which is what CardManager does, and
+the deque-backed Deck it used for a while. With piles of a few dozen cards, shifting a
+list along is a cheap memmove, and the deque loses to it on per-call overhead, which is
+why the piles went back to lists. City cards are recycled from the discard pile so the
+game can run for as many turns as we like; every EPIDEMIC_EVERY turns an epidemic
+reshuffles the infection discards back on top.
+
+Run from this directory: python deck_bench.py
+"""
+import sys
+sys.path.append('..')
+import random
+import timeit
+from collections import deque
+from itertools import islice
+from typing import Any, List
+from board import CityCard, InfectionCard
+from constants import *
+
+TURNS = 20000
+EPIDEMIC_EVERY = 8
+INFECTION_RATE = 3
+
+
+class DequeDeck(deque):
+    """
+    The deque-backed pile CardManager used for a while, with the top of the pile on the left.
+    """
+    __slots__ = ()
+
+    def draw(self, number: int = 1) -> List:
+        cards = list(islice(self, number))
+        for _ in cards:
+            self.popleft()
+        return cards
+
+    def draw_bottom(self) -> Any:
+        return self.pop()
+
+    def put_on_top(self, cards: List) -> None:
+        self.extendleft(reversed(cards))
+
+    def shuffle(self, rng: random.Random) -> None:
+        cards = list(self)
+        rng.shuffle(cards)
+        self.clear()
+        self.extend(cards)
+
+
+def get_piles(pile_type, rng: random.Random) -> tuple:
+    city_cards = [CityCard(c) for c in CITY_LIST.keys()]
+    infection_cards = [InfectionCard(c) for c in CITY_LIST.keys()]
+    rng.shuffle(city_cards)
+    rng.shuffle(infection_cards)
+    return pile_type(city_cards), pile_type(), pile_type(infection_cards), pile_type()
+
+
+def play_lists(rng: random.Random) -> None:
+    """
+    Plain lists, sliced the way CardManager does.
+    """
+    city_deck, city_discard, infection_deck, infection_discard = get_piles(list, rng)
+    for turn in range(TURNS):
+        if len(city_deck) < 2:
+            city_deck.extend(city_discard)
+            city_discard.clear()
+        cards = city_deck[0:2]
+        del city_deck[0:2]
+        city_discard[:0] = cards
+        if turn % EPIDEMIC_EVERY == 0:
+            bottom_card = infection_deck.pop()
+            infection_discard[:0] = [bottom_card]
+            rng.shuffle(infection_discard)
+            infection_discard.extend(infection_deck)
+            infection_deck, infection_discard = infection_discard, []
+        cards = infection_deck[0:INFECTION_RATE]
+        del infection_deck[0:INFECTION_RATE]
+        if len(cards) < INFECTION_RATE:
+            infection_deck, infection_discard = infection_discard, []
+            rng.shuffle(infection_deck)
+            number = INFECTION_RATE - len(cards)
+            cards.extend(infection_deck[0:number])
+            del infection_deck[0:number]
+        infection_discard[:0] = cards
+
+
+def play_piles(pile_type, rng: random.Random) -> None:
+    """
+    The same moves through the pile methods CardManager used to call.
+    """
+    city_deck, city_discard, infection_deck, infection_discard = get_piles(pile_type, rng)
+    for turn in range(TURNS):
+        if len(city_deck) < 2:
+            city_deck.extend(city_discard)
+            city_discard.clear()
+        city_discard.put_on_top(city_deck.draw(2))
+        if turn % EPIDEMIC_EVERY == 0:
+            infection_discard.put_on_top([infection_deck.draw_bottom()])
+            infection_discard.shuffle(rng)
+            infection_deck.put_on_top(infection_discard)
+            infection_discard.clear()
+        cards = infection_deck.draw(INFECTION_RATE)
+        if len(cards) < INFECTION_RATE:
+            infection_deck, infection_discard = infection_discard, infection_deck
+            infection_deck.shuffle(rng)
+            cards.extend(infection_deck.draw(INFECTION_RATE - len(cards)))
+        infection_discard.put_on_top(cards)
+
+
+if __name__ == '__main__':
+    cases = [
+        ("list", lambda: play_lists(random.Random(0))),
+        ("deque", lambda: play_piles(DequeDeck, random.Random(0))),
+    ]
+    baseline = None
+    for name, run in cases:
+        seconds = min(timeit.repeat(run, number=1, repeat=5)) / TURNS
+        baseline = baseline or seconds
+        print("{:<6} {:>8.2f} us/turn ({:.2f}x the time of lists)".format(
+            name, seconds * 1e6, seconds / baseline))
@@ -0,0 +1,62 @@
+"""
+Bytes and encode time per action for full board dumps versus delta patches.
+
+Run from this directory: python delta_bench.py
+"""
+import sys
+sys.path.append('..')
+import time
+from board import Board
+from controller import Serializer
+from delta import BoardTracker
+from custom_exceptions import GameEndedError
+
+NUM_GAMES = 50
+PLAYER_IDS = ["playeronesid", "playertwosid", "playerthreesid"]
+
+
+def play_turns(board: Board, on_action) -> None:
+    """
+    Walk each player between Atlanta and Chicago until the game ends, calling
+    on_action after every action.
+    """
+    cities = [board.get_city("Chicago"), board.get_city("Atlanta")]
+    try:
+        while True:
+            for city in cities * 2:
+                board.move_adjacent(city)
+                board.dec_active_player_actions()
+                board.check_end_of_actions()
+                on_action(board)
+    except GameEndedError:
+        pass
+
+
+def measure(encode) -> tuple:
+    total_bytes = 0
+    count = 0
+    elapsed = 0.0
+    for _ in range(NUM_GAMES):
+        tracker = BoardTracker()
+        board = Board(PLAYER_IDS)
+        tracker.resync(board)
+
+        def on_action(b):
+            nonlocal total_bytes, count, elapsed
+            start = time.perf_counter()
+            payload = encode(tracker, b)
+            elapsed += time.perf_counter() - start
+            total_bytes += len(payload)
+            count += 1
+        play_turns(board, on_action)
+    return total_bytes / count, elapsed / count * 1e6
+
+
+if __name__ == '__main__':
+    full_bytes, full_us = measure(lambda t, b: Serializer.print_board(b))
+    delta_bytes, delta_us = measure(
+        lambda t, b: Serializer.print_delta(t.patch(b)))
+    print("full board: {:>8.0f} bytes/action {:>8.1f} us/action".format(full_bytes, full_us))
+    print("delta:      {:>8.0f} bytes/action {:>8.1f} us/action".format(delta_bytes, delta_us))
+    print("ratio:      {:>8.1f}x bytes       {:>8.1f}x time".format(
+        full_bytes / delta_bytes, full_us / delta_us))
@@ -0,0 +1,91 @@
+"""
+Time per message spent getting from a parsed action message to the Board method it names:
+the way Controller used to do it (an ActionList lookup, the two mapping dicts and
+validate_keys branching on every arg's type), the compiled Dispatchers it uses now, and
+calling the Board method directly, which is what's left once dispatch costs nothing.
+Exits with an error if the compiled path isn't at least MIN_SPEEDUP times faster than
+the legacy one.
+Each message moves the active player between Atlanta and Chicago, with the turn kept
+from ending so no cards are drawn.
+
+Run from this directory: python dispatch_bench.py
+"""
+import sys
+sys.path.append('..')
+import timeit
+from typing import Tuple
+from board import Board
+from constants import ACTION, ABILITY, MOVE_ADJACENT
+from controller import Controller
+from custom_exceptions import GameEndedError, InvalidOperationError
+from enums import ActionList
+
+NUMBER = 20000
+MIN_SPEEDUP = 2.0
+PLAYER_IDS = ["playeronesid", "playertwosid"]
+
+
+def legacy_apply_action(controller: Controller, b: Board, msg: dict) -> Tuple[bool, bool]:
+    """
+    Controller.apply_action as it was before Dispatchers.
+    """
+    error = None
+    gameOver = False
+    try:
+        cmd_type = ACTION if ACTION in msg else ABILITY
+        cmd = ActionList(msg[cmd_type]["name"])
+        method = controller.action_mappings[cmd]
+        arg_keys = controller.arg_mappings[cmd]
+        args = [msg[cmd_type]["args"][key] for key in arg_keys.keys()]
+        success = controller.validate_keys(b, args, list(arg_keys.values())) and method(b, *args)
+        if not success:
+            raise InvalidOperationError("Action failed.")
+        if cmd_type == ACTION:
+            b.dec_active_player_actions()
+            b.check_end_of_actions()
+    except GameEndedError:
+        gameOver = True
+    except Exception as e:
+        error = True
+    return error, gameOver
+
+
+def compiled_apply_action(controller: Controller, b: Board, msg: dict) -> Tuple[bool, bool]:
+    return controller.apply_action(b, msg)
+
+
+def direct_apply_action(controller: Controller, b: Board, msg: dict) -> Tuple[bool, bool]:
+    """
+    Straight to the Board method, with the same bookkeeping afterwards.
+    """
+    if not b.move_adjacent(b.cities[msg[ACTION]["args"]["to_city"]]):
+        raise InvalidOperationError("Action failed.")
+    b.dec_active_player_actions()
+    b.check_end_of_actions()
+    return None, False
+
+
+def time_per_message(apply_action) -> float:
+    controller = Controller()
+    board = Board(PLAYER_IDS, seed=0)
+    messages = [{ACTION: {"name": MOVE_ADJACENT, "args": {"to_city": city}}} for city in ["Chicago", "Atlanta"]]
+
+    def run():
+        for msg in messages:
+            board.active_player.actions_left = NUMBER
+            error, _ = apply_action(controller, board, msg)
+            assert not error
+    return min(timeit.repeat(run, number=NUMBER // 2, repeat=5)) / NUMBER
+
+
+if __name__ == '__main__':
+    legacy = time_per_message(legacy_apply_action)
+    compiled = time_per_message(compiled_apply_action)
+    direct = time_per_message(direct_apply_action)
+    print("legacy dispatch:    {:>7.2f}us/msg".format(legacy * 1e6))
+    print("compiled dispatch:  {:>7.2f}us/msg ({:.1f}x)".format(compiled * 1e6, legacy / compiled))
+    print("direct call:        {:>7.2f}us/msg".format(direct * 1e6))
+    print("dispatch overhead:  {:>7.2f}us/msg legacy, {:.2f}us/msg compiled".format(
+        (legacy - direct) * 1e6, (compiled - direct) * 1e6))
+    if legacy / compiled < MIN_SPEEDUP:
+        sys.exit("compiled dispatch is less than {}x faster than legacy".format(MIN_SPEEDUP))
@@ -0,0 +1,55 @@
+"""
+Encode time and byte size of the old reflective board dump versus the explicit
+BoardEncoder schema (with and without the static topology attached).
+
+Run from this directory: python encoder_bench.py
+"""
+import sys
+sys.path.append('..')
+import json
+import timeit
+from collections.abc import Mapping
+import numpy as np
+from board import Board
+from controller import Serializer
+
+NUMBER = 500
+PLAYER_IDS = ["playeronesid", "playertwosid", "playerthreesid", "playerfoursid"]
+
+
+def reflect(x):
+    """
+    Fallback for reflective_dump. The old dump only needed x.__dict__; the board has since
+    picked up containers and __slots__ classes that don't have one.
+    """
+    if isinstance(x, Mapping):
+        return dict(x)
+    if isinstance(x, np.ndarray):
+        return x.tolist()
+    if hasattr(x, "__dict__"):
+        return x.__dict__
+    return {k: getattr(x, k) for cls in type(x).__mro__ for k in getattr(cls, "__slots__", ())}
+
+
+def reflective_dump(board: Board) -> str:
+    """
+    What Serializer.print_board used to do.
+    """
+    return json.dumps({"board": board, "error": None, "game_over": False}, default=reflect)
+
+
+if __name__ == '__main__':
+    board = Board(PLAYER_IDS)
+    board.check_end_of_actions()
+    cases = [
+        ("reflective", lambda: reflective_dump(board)),
+        ("encoder + topology", lambda: Serializer.print_board(board, topology=True)),
+        ("encoder", lambda: Serializer.print_board(board)),
+    ]
+    baseline = None
+    for name, encode in cases:
+        seconds = min(timeit.repeat(encode, number=NUMBER, repeat=5)) / NUMBER
+        size = len(encode())
+        baseline = baseline or (seconds, size)
+        print("{:<20} {:>8.1f} us {:>8} bytes ({:.1f}x faster, {:.1f}x smaller)".format(
+            name, seconds * 1e6, size, baseline[0] / seconds, baseline[1] / size))
@@ -0,0 +1,51 @@
+"""
+Time the checks bots make over and over while looking for moves (card in hand, can this
+player cure) with the old list hand versus the bitmask Hand.
+
+Run from this directory: python hand_bench.py
+"""
+import sys
+sys.path.append('..')
+import functools
+import timeit
+from board import Board, CityCard, Player, Role
+from constants import *
+
+NUMBER = 100000
+HAND = ["Atlanta", "Chicago", "Montreal", "New York", "Madrid", "Tokyo", "Lima"]
+
+
+def list_can_discover_cure(player: Player, hand: list, color: str, city_cards: list) -> bool:
+    """
+    What Player.can_discover_cure used to do, against a plain list hand.
+    """
+    if not player.current_city.has_research_station:
+        return False
+
+    def color_matches(city_card: CityCard) -> int:
+        return 1 if city_card.color == color else 0
+
+    has_enough_cards = sum(list(map(color_matches, city_cards))) >= CURE_COUNT
+    cards_in_hand = functools.reduce(lambda a, b: a and b, [
+                                     city_card in hand for city_card in city_cards])
+    return has_enough_cards and cards_in_hand
+
+
+if __name__ == '__main__':
+    cities = Board.init_cities(STARTING_CITY)
+    player = Player("playeronesid", Role(), cities[STARTING_CITY])
+    for name in HAND:
+        player.add_card(CityCard(name))
+    hand = [CityCard(name) for name in HAND]
+    cure_cards = hand[:5]
+    missing = CityCard("Paris")
+    cases = [
+        ("in (list)", lambda: missing in hand),
+        ("in (Hand)", lambda: missing in player.city_cards),
+        ("cure (list)", lambda: list_can_discover_cure(player, hand, BLUE, cure_cards)),
+        ("cure (Hand)", lambda: player.can_discover_cure(BLUE, cure_cards)),
+        ("cure any (Hand)", lambda: player.can_discover_cure(BLUE)),
+    ]
+    for name, check in cases:
+        seconds = min(timeit.repeat(check, number=NUMBER, repeat=5)) / NUMBER
+        print("{:<16} {:>8.3f} us".format(name, seconds * 1e6))
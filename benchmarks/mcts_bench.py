@@ -0,0 +1,26 @@
+"""
+Iterations per second of MCTSPolicy over a few full games. Nearly all of an iteration is
+engine work (legal_actions, apply, undo), so this tracks how fast the Board is for search.
+
+Run from this directory: python mcts_bench.py
+"""
+import sys
+sys.path.append('..')
+from mcts import MCTSPolicy, SearchStats
+from simulation import Simulation
+
+GAMES = 5
+PLAYERS = 4
+ITERATIONS = 200
+
+
+if __name__ == '__main__':
+    total = SearchStats()
+    for seed in range(GAMES):
+        policy = MCTSPolicy(iterations=ITERATIONS)
+        result = Simulation(num_players=PLAYERS, seed=seed, policies=[policy] * PLAYERS).play()
+        print("{} ({:.0f} iterations/sec)".format(result, policy.stats.iterations_per_second()))
+        total.searches += policy.stats.searches
+        total.iterations += policy.stats.iterations
+        total.seconds += policy.stats.seconds
+    print(total)
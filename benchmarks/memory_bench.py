@@ -0,0 +1,81 @@
+"""
+Bytes of Python heap per live game, as measured by tracemalloc, for freshly created boards
+and for boards part way through a game (the kind of thing a MemoryGameStore keeps resident).
+Each is measured as the board models are now, with __slots__, and as they used to be, with
+the same attributes kept in a __dict__ per object.
+
+Run from this directory: python memory_bench.py
+"""
+import sys
+sys.path.append('..')
+import gc
+import tracemalloc
+from typing import Any, Dict
+from board import *
+from simulation import Simulation
+
+GAMES = 1000
+TURNS = 10
+
+
+def fresh_board(i: int) -> Board:
+    return Board(["playeronesid", "playertwosid", "playerthreesid", "playerfoursid"], seed=i)
+
+
+def played_board(i: int) -> Board:
+    sim = Simulation(num_players=4, seed=i, max_turns=TURNS)
+    sim.play()
+    return sim.board
+
+
+class Unslotted:
+    """
+    What a board model used to be: the same attributes, in a __dict__.
+    """
+
+
+# the classes that were given __slots__
+MODELS = (Board, Player, Role, City, CardManager, InfectionManager, DiseaseManager, Hand)
+
+
+def unslotted(obj: Any, copies: Dict[int, Any]) -> Any:
+    """
+    Copy of the given board (or anything in it) with every model swapped for an Unslotted
+    holding the same attributes. Anything else is shared with the original.
+    """
+    if id(obj) in copies:
+        return copies[id(obj)]
+    if isinstance(obj, MODELS):
+        copy = copies[id(obj)] = Unslotted()
+        for cls in type(obj).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    copy.__dict__[slot] = unslotted(getattr(obj, slot), copies)
+        return copy
+    if isinstance(obj, dict):
+        return {key: unslotted(value, copies) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [unslotted(value, copies) for value in obj]
+    return obj
+
+
+def bytes_per_game(make_board) -> float:
+    # build one first so module-level caches (card registry, topology) aren't counted
+    make_board(-1)
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    boards = [make_board(i) for i in range(GAMES)]
+    gc.collect()
+    used = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    del boards
+    return used / GAMES
+
+
+if __name__ == '__main__':
+    for name, make_board in [("fresh", fresh_board), ("{} turns".format(TURNS), played_board)]:
+        before = bytes_per_game(lambda i: unslotted(make_board(i), {}))
+        after = bytes_per_game(make_board)
+        print("{:<10} {:>8.0f} bytes/game with __dict__, {:>8.0f} with __slots__ ({:.1f}x smaller)".format(
+            name, before, after, before / after))
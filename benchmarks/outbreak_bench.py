@@ -0,0 +1,60 @@
+"""
+Time the old recursive outbreak chain (list membership checks) against OutbreakResolver
+on the worst case: every city already saturated with one color, so a single infection
+outbreaks the whole map.
+
+Run from this directory: python outbreak_bench.py
+"""
+import sys
+sys.path.append('..')
+import timeit
+from board import Board, City, OutbreakResolver
+from constants import *
+
+NUMBER = 500
+
+
+def legacy_add_single_disease(city: City, city_list, color, prior_outbreaks) -> bool:
+    """
+    What City.add_single_disease used to do.
+    """
+    if city.disease_count[color] < MAX_DISEASE_COUNT:
+        city.disease_count[color] += 1
+        return False
+    legacy_trigger_outbreak(city, city_list, color, prior_outbreaks)
+    return True
+
+
+def legacy_trigger_outbreak(city: City, city_list, color, prior_outbreaks) -> None:
+    prior_outbreaks.append(city.name)
+    for city_name in city.connected_cities:
+        if city_name not in prior_outbreaks:
+            legacy_add_single_disease(
+                city_list[city_name], city_list, color, prior_outbreaks)
+
+
+def saturated_cities():
+    cities = Board.init_cities(STARTING_CITY)
+    for city in cities.values():
+        city.disease_count[YELLOW] = MAX_DISEASE_COUNT
+    return cities
+
+
+if __name__ == '__main__':
+    cities = saturated_cities()
+    start = cities[STARTING_CITY]
+    cases = [
+        ("recursive", lambda: legacy_add_single_disease(start, cities, YELLOW, [])),
+        ("resolver", lambda: OutbreakResolver.infect(cities, start, YELLOW)),
+    ]
+    chain = []
+    legacy_add_single_disease(start, cities, YELLOW, chain)
+    report = OutbreakResolver.infect(cities, start, YELLOW)
+    assert sorted(chain) == sorted(report.outbreaks)
+    print("{} cities, {} outbreaks per chain".format(len(cities), len(report.outbreaks)))
+    baseline = None
+    for name, resolve in cases:
+        seconds = min(timeit.repeat(resolve, number=NUMBER, repeat=5)) / NUMBER
+        baseline = baseline or seconds
+        print("{:<12} {:>8.1f} us ({:.1f}x faster)".format(
+            name, seconds * 1e6, baseline / seconds))
@@ -0,0 +1,22 @@
+"""
+Games/sec for the process-pool batch simulator at 1, 2, 4, ... workers, up to the
+number of cores.
+
+Run from this directory: python parallel_bench.py [games]
+"""
+import sys
+sys.path.append('..')
+import os
+from simulation import run_batch, run_parallel
+
+if __name__ == '__main__':
+    num_games = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    serial = run_batch(num_games, 0)
+    print("serial:     {:>8.0f} games/sec".format(serial.games_per_second()))
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        report = run_parallel(num_games, 0, workers=workers)
+        assert report.reasons == serial.reasons
+        print("{:>2} workers: {:>8.0f} games/sec ({:.2f}x serial)".format(
+            workers, report.games_per_second(), report.games_per_second() / serial.games_per_second()))
+        workers *= 2
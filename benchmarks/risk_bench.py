@@ -0,0 +1,69 @@
+"""
+Time "what's the chance each city outbreaks at the end of this turn", answered by playing the
+end of the turn out on clones of the board with the unseen cards shuffled (what a bot would
+do with just Board.clone) versus RiskEstimator working it out from the piles. SAMPLES
+clones get every chance to within about a percent either way; the largest difference
+between the two is shown alongside.
+
+Run from this directory: python risk_bench.py
+"""
+import sys
+sys.path.append('..')
+import random
+import time
+import timeit
+from board import *
+from constants import *
+from custom_exceptions import GameEndedError
+from mcts import MCTSPolicy
+from risk import RiskEstimator
+from simulation import Simulation
+
+SAMPLES = 2500
+# (seed, turns played before asking)
+GAMES = [(0, 3), (2, 9), (3, 12), (8, 2)]
+
+
+def play_turns(seed: int, turns: int) -> Board:
+    b = Simulation(num_players=2, seed=seed, num_epidemic_cards=6, max_outbreak_count=1000).board
+    try:
+        for _ in range(turns):
+            b.active_player.actions_left = 0
+            b.check_end_of_actions()
+    except GameEndedError:
+        pass
+    return b
+
+
+def sample_outbreaks(board: Board, samples: int, rng: random.Random) -> dict:
+    outbroken = dict.fromkeys(board.cities, 0)
+    policy = MCTSPolicy()
+    for _ in range(samples):
+        state = policy.determinize(board, rng)
+        cards = state.card_manager
+        names = set()
+        for card in cards.draw_city_cards():
+            if isinstance(card, EpidemicCard):
+                state.infection_manager.increase_level()
+                bottom_card = cards.handle_epidemic()
+                names.update(OutbreakResolver.infect(
+                    state.cities, state.cities[bottom_card.name], bottom_card.color, MAX_DISEASE_COUNT).outbreaks)
+        for card in cards.draw_infection_cards(state.infection_manager.rate):
+            names.update(OutbreakResolver.infect(state.cities, state.cities[card.name], card.color).outbreaks)
+        for name in names:
+            outbroken[name] += 1
+    return {name: n / samples for name, n in outbroken.items()}
+
+
+if __name__ == '__main__':
+    print("{:<10} {:>12} {:>12} {:>9} {:>9}".format("game", "sampling", "estimator", "speedup", "max diff"))
+    for seed, turns in GAMES:
+        board = play_turns(seed, turns)
+        start = time.perf_counter()
+        sampled = sample_outbreaks(board, SAMPLES, random.Random(seed))
+        sampling = time.perf_counter() - start
+        report = RiskEstimator.estimate(board)
+        estimating = min(timeit.repeat(lambda: RiskEstimator.estimate(board), number=1, repeat=5))
+        diff = max(abs(report.outbreak[name] - sampled[name]) for name in board.cities)
+        print("{:<10} {:>10.1f}ms {:>10.1f}ms {:>8.0f}x {:>9.3f}".format(
+            "{}/{}".format(seed, turns), sampling * 1e3, estimating * 1e3, sampling / estimating, diff))
@@ -0,0 +1,78 @@
+"""
+Messages/sec through Controller.handle_input with the default pickle store,
+the in-memory write-behind store, and the in-memory store in front of the
+action journal. Then actions/sec through the pickle store again, with each
+player's turn sent as one batch (so one load, save and response per turn).
+
+Run from this directory: python store_bench.py
+"""
+import sys
+sys.path.append('..')
+import os
+import json
+import time
+import tempfile
+from constants import MAX_ACTIONS, MOVE_ADJACENT
+from controller import Controller
+from store import PickleGameStore, MemoryGameStore, JournalGameStore
+
+NUM_GAMES = 8
+NUM_MESSAGES = 4000
+PLAYER_IDS = ["playeronesid", "playertwosid", "playerthreesid"]
+
+
+def get_messages():
+    """
+    Shuttle the active player back and forth between Atlanta and Chicago. Every player
+    starts in Atlanta, so each move is valid regardless of whose turn it is, as long as
+    we alternate per player.
+    """
+    return [json.dumps({"action": {"name": MOVE_ADJACENT, "args": {"to_city": city}}})
+            for city in ["Chicago", "Atlanta"]]
+
+
+def run(controller: Controller) -> float:
+    game_ids = ["bench{}".format(i) for i in range(NUM_GAMES)]
+    for game_id in game_ids:
+        controller.init_board(game_id, PLAYER_IDS)
+    there, back = get_messages()
+    start = time.perf_counter()
+    for i in range(NUM_MESSAGES):
+        game_id = game_ids[i % NUM_GAMES]
+        if json.loads(controller.handle_input(game_id, there))["game_over"]:
+            controller.init_board(game_id, PLAYER_IDS)
+        controller.handle_input(game_id, back)
+    controller.store.flush()
+    return 2 * NUM_MESSAGES / (time.perf_counter() - start)
+
+
+def run_batched(controller: Controller) -> float:
+    game_ids = ["bench{}".format(i) for i in range(NUM_GAMES)]
+    for game_id in game_ids:
+        controller.init_board(game_id, PLAYER_IDS)
+    # a whole turn, ending back in Atlanta so the next player's turn is the same
+    turn = json.dumps({"batch": [json.loads(msg) for msg in get_messages() * (MAX_ACTIONS // 2)]})
+    start = time.perf_counter()
+    for i in range(2 * NUM_MESSAGES // MAX_ACTIONS):
+        game_id = game_ids[i % NUM_GAMES]
+        if json.loads(controller.handle_input(game_id, turn))["game_over"]:
+            controller.init_board(game_id, PLAYER_IDS)
+    controller.store.flush()
+    return 2 * NUM_MESSAGES / (time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        path_format = os.path.join(tmp, "game-{}.pickle")
+        pickled = run(Controller(PickleGameStore(path_format)))
+        memory = run(Controller(MemoryGameStore(PickleGameStore(path_format))))
+        journaled = run(Controller(MemoryGameStore(
+            JournalGameStore(os.path.join(tmp, "game-{}")))))
+        batched = run_batched(Controller(PickleGameStore(path_format)))
+    print("pickle store:    {:>10.0f} msgs/sec".format(pickled))
+    print("memory store:    {:>10.0f} msgs/sec ({:.1f}x)".format(
+        memory, memory / pickled))
+    print("memory+journal:  {:>10.0f} msgs/sec ({:.1f}x)".format(
+        journaled, journaled / pickled))
+    print("pickle, batched: {:>10.0f} actions/sec ({:.1f}x)".format(
+        batched, batched / pickled))
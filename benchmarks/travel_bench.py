@@ -0,0 +1,67 @@
+"""
+Time "how many actions from here to every city" for a player holding a few cards, worked
+out with a breadth-first search over the map per query (what a bot would do with just
+CITY_CONNECTIONS) versus TravelOracle's precomputed tables. Also times building a research
+station, which the oracle folds in incrementally.
+
+Run from this directory: python travel_bench.py
+"""
+import sys
+sys.path.append('..')
+import timeit
+from collections import deque
+from board import Board, CityCard
+from constants import *
+from travel import TravelOracle
+
+NUMBER = 2000
+STATIONS = ["Atlanta", "Tokyo", "Cairo"]
+HAND = ["Lima", "Paris", "Delhi"]
+
+
+def search_costs(board: Board, from_city: str, city_cards: list) -> dict:
+    """
+    Fewest actions to every city, spending at most one card, by searching over
+    (city, card spent) for every query.
+    """
+    stations = [name for name, c in board.cities.items() if c.has_research_station]
+    seen = {(from_city, False): 0}
+    queue = deque([(from_city, False)])
+    while queue:
+        state = queue.popleft()
+        city, spent = state
+        steps = [(n, spent) for n in CITY_CONNECTIONS[city]]
+        if city in stations:
+            steps.extend((s, spent) for s in stations)
+        if not spent:
+            for card in city_cards:
+                steps.append((card.name, True))
+                if card.name == city:
+                    steps.extend((n, True) for n in CITY_LIST)
+        for step in steps:
+            if step not in seen:
+                seen[step] = seen[state] + 1
+                queue.append(step)
+    costs = {}
+    for (city, _), cost in seen.items():
+        costs[city] = min(cost, costs.get(city, cost))
+    return costs
+
+
+if __name__ == '__main__':
+    board = Board(["playeronesid"])
+    for name in STATIONS:
+        board.cities[name].add_research_station()
+    oracle = TravelOracle(board)
+    hand = [CityCard(name) for name in HAND]
+    assert [search_costs(board, "Madrid", hand)[name] for name in CITY_LIST] == oracle.get_costs("Madrid", hand)
+    cases = [
+        ("search, all cities", lambda: search_costs(board, "Madrid", hand)),
+        ("oracle, all cities", lambda: oracle.get_costs("Madrid", hand)),
+        ("oracle, one city", lambda: oracle.get_cost("Madrid", "Sydney", hand)),
+        ("oracle, add station", lambda: oracle.add_station(0)),
+        ("oracle, rebuild", lambda: oracle.rebuild()),
+    ]
+    for name, run in cases:
+        seconds = min(timeit.repeat(run, number=NUMBER, repeat=5)) / NUMBER
+        print("{:<20} {:>8.2f} us".format(name, seconds * 1e6))
@@ -1,37 +1,80 @@
-from typing import Any, Counter, List, Union, Dict
+from typing import Any, Callable, List, Tuple, Union, Dict
 import random
-import json
-import functools
-from custom_exceptions import GameEndedError, InvalidGametypeError, InvalidOperationError
+from collections import deque
+from custom_exceptions import GameEndedError, InvalidOperationError
 from constants import *
+from city_graph import *
+from cube_matrix import *
+import numpy as np
+
+
+def restore_slots(obj: Any, state: Any) -> None:
+    """
+    __setstate__ for the slotted classes here. Takes the (None, {slot: value}) pickle gives
+    for an object with __slots__, or the attribute dict of one pickled before these classes
+    had them, in which case anything that's no longer a slot is dropped.
+    """
+    if isinstance(state, tuple):
+        state = state[1]
+    slots = {slot for cls in type(obj).__mro__ for slot in getattr(cls, "__slots__", ())}
+    for slot, value in state.items():
+        if slot in slots:
+            setattr(obj, slot, value)
 
 
 class Role:
     """
     Used to represent specific power of each player
     """
+    __slots__ = ("power",)
+    __setstate__ = restore_slots
 
     def __init__(self):
         self.power = None
 
+    def clone(self) -> 'Role':
+        role = Role()
+        role.power = self.power
+        return role
+
 
 class City:
     """
     Representing a board location and its state
     """
-    outbreaks_occurred = 0
+    __slots__ = ("name", "color", "index", "disease_count", "has_research_station", "connected_cities",
+                 "station_listener")
 
-    def __init__(self, name: Union[str, 'City']):
+    def __init__(self, name: Union[str, 'City'], cubes: np.ndarray = None):
+        """
+        Args:
+            cubes(opt) - the board's cube matrix to keep this city's disease counts in. A
+                standalone city allocates its own.
+        """
         if isinstance(name, City):
             return
         if name not in CITY_LIST:
             raise ValueError("Invalid city name supplied to city constructor.")
         self.name: str = name
         self.color = CITY_LIST[name]
-        self.disease_count: Dict[str, int] = dict.fromkeys(
-            [RED, BLUE, YELLOW, GREY], 0)
+        self.index: int = CITY_INDEX[name]
+        if cubes is None:
+            self.disease_count: Dict[str, int] = CubeCounts(new_cube_matrix(1))
+        else:
+            self.disease_count = CubeCounts(cubes, self.index)
         self.has_research_station: bool = False
-        self.connected_cities: List[str] = []
+        self.connected_cities: Tuple[str, ...] = NEIGHBOR_NAMES[self.index]
+        # called with this city whenever its research station comes or goes; see travel.py
+        self.station_listener: Callable[['City'], None] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # the listener belongs to whoever is watching this board, not to the game
+        return {slot: getattr(self, slot) for slot in City.__slots__ if slot != "station_listener"}
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        for slot, value in state.items():
+            setattr(self, slot, value)
+        self.station_listener = None
 
     def __eq__(self, other):
         """
@@ -57,40 +100,39 @@ class City:
         """
         self.connected_cities = cities
 
-    def add_single_disease(self, city_list: Dict[str, 'City'], color, prior_outbreaks: List[str] = []) -> bool:
+    def add_single_disease(self, city_list: Dict[str, 'City'], color, prior_outbreaks: List[str] = None) -> bool:
         """
         Adds one disease cube to this city. If this city already has MAX_DISEASE_COUNT
         disease cubes of given color, doesn't increase this city's count but triggers
         outbreak in neighboring cities
         Args:
             color - color of disease to increase here
-            prior_outbreaks - (OPT) array used to track that this city has been hit
+            prior_outbreaks - (OPT) array used to track which cities have outbroken in this
+                chain. Pass in a list to find out how many outbreaks this caused.
         Returns:
             bool - true if outbreak triggered, false otherwise
+        Only the cubes are moved; a Board's supply and outbreak count aren't touched. For a
+        city on a Board, use Board.infect_city instead.
         """
-        if self.disease_count[color] < MAX_DISEASE_COUNT:
-            self.disease_count[color] += 1
-            return False
-        prior_outbreaks.append(self.name)
-        self.trigger_outbreak(city_list, color, prior_outbreaks)
-        return True
+        report = OutbreakResolver.infect(
+            city_list, self, color, 1, prior_outbreaks)
+        return bool(report.outbreaks)
 
-    def add_epidemic_disease(self, city_list: Dict[str, 'City'], color) -> bool:
+    def add_epidemic_disease(self, city_list: Dict[str, 'City'], color, prior_outbreaks: List[str] = None) -> bool:
         """
         Adds three disease cubes to this city as part of an outbreak. If this city already has any
         disease cubes of the given color, then this city's disease_count for that color is capped at
         MAX_DISEASE_COUNT and an outbreak is triggered.
         Args:
             color - color of disease to add here
+            prior_outbreaks - (OPT) array used to track which cities have outbroken in this chain
         Returns:
             bool - true if outbreak triggered, false otherwise
+        Like add_single_disease, this leaves a Board's totals alone; see Board.infect_city.
         """
-        if self.disease_count[color] == 0:
-            self.disease_count[color] = MAX_DISEASE_COUNT
-            return False
-        self.disease_count[color] = MAX_DISEASE_COUNT
-        self.trigger_outbreak(city_list, color, [])
-        return True
+        report = OutbreakResolver.infect(
+            city_list, self, color, MAX_DISEASE_COUNT, prior_outbreaks)
+        return bool(report.outbreaks)
 
     def trigger_outbreak(self, city_list: Dict[str, 'City'], color, prior_outbreaks: List[str]) -> None:
         """
@@ -98,13 +140,10 @@ class City:
         back to cities that have already been hit, but allows for chaining otherwise
         Args:
             color - color of disease that is outbreaking
-            prior_outbreaks - array to track cities that have been hit by this outbreak chain
+            prior_outbreaks - array to track cities that have outbroken in this chain. This city is
+                added to it, so its length afterwards is the number of outbreaks in the chain.
         """
-        City.outbreaks_occurred += 1
-        for city_name in self.connected_cities:
-            if city_name not in prior_outbreaks:
-                city_list[city_name].add_single_disease(
-                    city_list, color, prior_outbreaks)
+        OutbreakResolver.outbreak(city_list, self, color, prior_outbreaks)
 
     def treat_single_disease(self, color) -> bool:
         """
@@ -140,32 +179,199 @@ class City:
         """
         if not self.has_research_station:
             self.has_research_station = True
+            if self.station_listener is not None:
+                self.station_listener(self)
             return True
         return False
 
+    def clone(self, cubes: np.ndarray) -> 'City':
+        """
+        Copy of this city keeping its disease counts in the given cube matrix, which should
+        already hold a copy of this city's row. The (immutable) connections are shared.
+        """
+        city = City.__new__(City)
+        city.name = self.name
+        city.color = self.color
+        city.index = self.index
+        city.disease_count = CubeCounts(cubes, self.index)
+        city.has_research_station = self.has_research_station
+        city.connected_cities = self.connected_cities
+        city.station_listener = None
+        return city
+
+
+class OutbreakReport:
+    """
+    What happened while resolving one infection and any chain of outbreaks it set off.
+    """
+    __slots__ = ("color", "outbreaks", "cities_hit", "cubes_placed")
+
+    def __init__(self, color: str):
+        self.color = color
+        # names of cities that outbroke, in the order they did
+        self.outbreaks: List[str] = []
+        # names of cities that got at least one cube
+        self.cities_hit: List[str] = []
+        self.cubes_placed = 0
+
+    def __str__(self):
+        return "{} outbreaks, {} cubes placed on {} cities".format(
+            len(self.outbreaks), self.cubes_placed, len(self.cities_hit))
+
+
+class OutbreakResolver:
+    """
+    Resolves infections and outbreak chains iteratively, with a work queue of city indices
+    still owed a cube and a bitmask of cities that have already outbroken (which take no
+    further cubes from the same chain).
+    """
+
+    @classmethod
+    def infect(self, city_list: Dict[str, City], city: City, color: str, cubes: int = 1,
+               prior_outbreaks: List = None) -> OutbreakReport:
+        """
+        Add cubes of the given color to a city. Anything over MAX_DISEASE_COUNT is
+        dropped and the city outbreaks, which can chain on to its neighbors.
+        Args:
+            cubes(opt) - number of cubes to add; 1 for a normal infection, MAX_DISEASE_COUNT
+                for an epidemic
+            prior_outbreaks(opt) - cities that have already outbroken in this chain. Any new
+                outbreaks are appended to it.
+        Returns:
+            OutbreakReport - cities hit, cubes placed and outbreaks triggered
+        """
+        report = OutbreakReport(color)
+        queue = deque()
+        outbroken = self.place(city, color, cubes, report,
+                               self.get_outbroken(prior_outbreaks), queue)
+        self.run(city_list, color, report, outbroken, queue)
+        if prior_outbreaks is not None:
+            prior_outbreaks.extend(report.outbreaks)
+        return report
+
+    @classmethod
+    def outbreak(self, city_list: Dict[str, City], city: City, color: str,
+                 prior_outbreaks: List = None) -> OutbreakReport:
+        """
+        Make a city outbreak regardless of how many cubes it holds.
+        """
+        report = OutbreakReport(color)
+        queue = deque()
+        outbroken = self.get_outbroken(prior_outbreaks)
+        if not outbroken >> city.index & 1:
+            outbroken = self.spread(city, report, outbroken, queue)
+        self.run(city_list, color, report, outbroken, queue)
+        if prior_outbreaks is not None:
+            prior_outbreaks.extend(report.outbreaks)
+        return report
+
+    @classmethod
+    def get_outbroken(self, prior_outbreaks: List) -> int:
+        """
+        Bitmask of city indices for a list of city names (or cities).
+        """
+        outbroken = 0
+        for c in prior_outbreaks or ():
+            outbroken |= 1 << CITY_INDEX[c if isinstance(c, str) else c.name]
+        return outbroken
+
+    @classmethod
+    def run(self, city_list: Dict[str, City], color: str, report: OutbreakReport, outbroken: int,
+            queue: deque) -> int:
+        """
+        Hand out one cube to each queued city until the chain dies down.
+        """
+        while queue:
+            index = queue.popleft()
+            if not outbroken >> index & 1:
+                outbroken = self.place(city_list[CITY_NAMES[index]], color, 1, report,
+                                       outbroken, queue)
+        return outbroken
+
+    @classmethod
+    def place(self, city: City, color: str, cubes: int, report: OutbreakReport, outbroken: int,
+              queue: deque) -> int:
+        # go straight to the cube matrix rather than through the CubeCounts view
+        counts = city.disease_count
+        key = (counts.index, COLOR_INDEX[color])
+        count = counts.cubes.item(key)
+        placed = min(cubes, MAX_DISEASE_COUNT - count)
+        if placed:
+            counts.cubes[key] = count + placed
+            report.cubes_placed += placed
+            report.cities_hit.append(city.name)
+        if placed < cubes:
+            outbroken = self.spread(city, report, outbroken, queue)
+        return outbroken
+
+    @classmethod
+    def spread(self, city: City, report: OutbreakReport, outbroken: int, queue: deque) -> int:
+        outbroken |= 1 << city.index
+        report.outbreaks.append(city.name)
+        for index in NEIGHBORS[city.index]:
+            if not outbroken >> index & 1:
+                queue.append(index)
+        return outbroken
+
 
 class Card:
     """
-    Parent class holding city name and color
+    Parent class holding city name and color. Cards are immutable flyweights: there's only
+    ever one card of each type per city, shared by every game, so constructing one is a
+    dict lookup and two cards of the same type are equal only if they're the same object.
     """
+    __slots__ = ("name", "color", "index")
 
-    def __init__(self, city_name: Union[str, 'Card']):
+    def __new__(cls, city_name: Union[str, 'Card'] = None):
+        if city_name is None:
+            # unpickling a card saved before they were interned; see Board.upgrade
+            return super().__new__(cls)
         if isinstance(city_name, Card):
-            return
+            city_name = city_name.name
+        card = _CARDS.get((cls, city_name))
+        if card is not None:
+            return card
         if not city_name in CITY_LIST:
             raise ValueError(
                 "Invalid name passed to Card constructor: {}".format(city_name))
-        self.name = city_name
-        self.color = CITY_LIST[city_name]
+        card = super().__new__(cls)
+        object.__setattr__(card, "name", city_name)
+        object.__setattr__(card, "color", CITY_LIST[city_name])
+        object.__setattr__(card, "index", CITY_INDEX[city_name])
+        # setdefault so two threads creating the same card still end up sharing one
+        return _CARDS.setdefault((cls, city_name), card)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("Cards are immutable")
+
+    def __reduce__(self):
+        # unpickles to the shared card rather than a copy
+        return (type(self), (self.name,))
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        object.__setattr__(self, "name", state["name"])
+        object.__setattr__(self, "color", state["color"])
+        object.__setattr__(self, "index", CITY_INDEX[state["name"]])
+
+    def intern(self) -> 'Card':
+        """
+        The shared card of this type for this city.
+        """
+        return type(self)(self.name)
 
     def __eq__(self, other: object) -> bool:
         """
         (in)Equality based on whether cities share name
         """
+        if self is other:
+            return True
         if not isinstance(other, City) and not isinstance(other, Card):
             return False
         return self.name == other.name and self.color == other.color
 
+    def __hash__(self) -> int:
+        return hash(self.name)
+
     def __str__(self) -> str:
         return "Card: {} - {}".format(self.name, self.color)
 
@@ -173,13 +379,15 @@ class Card:
         return self.__str__()
 
 
+# every Card ever created, keyed by (card type, city name)
+_CARDS: Dict[tuple, Card] = {}
+
+
 class CityCard(Card):
     """
     Representing the type of card used to cure diseases and travel.
     """
-
-    def __init__(self, city_name: Union[str, Card]):
-        super().__init__(city_name)
+    __slots__ = ()
 
 
 class InfectionCard(Card):
@@ -187,9 +395,7 @@ class InfectionCard(Card):
     Representing the type of card that is drawn at the end of each turn and used to
     place new infections in certain cities.
     """
-
-    def __init__(self, city_name: Union[str, Card]):
-        super().__init__(city_name)
+    __slots__ = ()
 
 
 class EpidemicCard:
@@ -197,20 +403,141 @@ class EpidemicCard:
     Representing the type of card that is distributed throughout the infection card deck
     and, when drawn, triggers the placement of epidemic diseases on the bottom city in the
     infection card deck, as well as reshuffling of the infection card discard deck.
+    Epidemic cards are all alike, so there's only one instance.
+    """
+    __slots__ = ()
+    _instance: 'EpidemicCard' = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __reduce__(self):
+        return (EpidemicCard, ())
+
+
+# the one CityCard for each city, by city index
+CITY_CARDS: Tuple[CityCard, ...] = tuple(CityCard(name) for name in CITY_NAMES)
+
+
+class Hand:
+    """
+    A player's city cards, stored as a bitmask over city indices (see city_graph.py) plus a
+    count per color, so membership, adding, removing and "how many of this color" are all
+    constant time. Iterates in city index order. Compares equal to any list holding the
+    same cards, whatever order they're in.
     """
+    __slots__ = ("mask", "color_counts")
+
+    def __init__(self, cards: List[CityCard] = ()):
+        self.mask = 0
+        self.color_counts: List[int] = [0] * NUM_COLORS
+        self.extend(cards)
+
+    @classmethod
+    def get_mask(self, cards: List[CityCard]) -> int:
+        """
+        Bitmask of the given cards (or cities).
+        """
+        mask = 0
+        for card in cards:
+            mask |= 1 << card.index
+        return mask
+
+    def add(self, card: CityCard) -> bool:
+        """
+        Returns:
+            bool - True if the card was added, False if it was already here
+        """
+        bit = 1 << card.index
+        if self.mask & bit:
+            return False
+        self.mask |= bit
+        self.color_counts[CITY_COLORS[card.index]] += 1
+        return True
+
+    def extend(self, cards: List[CityCard]) -> None:
+        for card in cards:
+            self.add(card)
+
+    def remove(self, card: CityCard) -> bool:
+        """
+        Returns:
+            bool - True if the card was removed, False if it wasn't here
+        """
+        bit = 1 << card.index
+        if not self.mask & bit:
+            return False
+        self.mask ^= bit
+        self.color_counts[CITY_COLORS[card.index]] -= 1
+        return True
+
+    def count_color(self, color: str) -> int:
+        """
+        Number of cards of the given color in this hand.
+        """
+        return self.color_counts[COLOR_INDEX[color]]
+
+    def copy(self) -> 'Hand':
+        hand = Hand.__new__(Hand)
+        hand.mask = self.mask
+        hand.color_counts = self.color_counts[:]
+        return hand
+
+    def __contains__(self, card: object) -> bool:
+        index = getattr(card, "index", None)
+        return index is not None and bool(self.mask >> index & 1)
+
+    def __len__(self) -> int:
+        return sum(self.color_counts)
+
+    def __iter__(self):
+        # walk a snapshot of the mask, so it's safe to remove cards while iterating
+        cards = []
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            cards.append(CITY_CARDS[low.bit_length() - 1])
+            mask ^= low
+        return iter(cards)
+
+    def __getitem__(self, index):
+        return list(self)[index]
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Hand):
+            return self.mask == other.mask
+        if isinstance(other, (list, tuple)):
+            return len(other) == len(self) and all(c in self for c in other)
+        return NotImplemented
+
+    def __ne__(self, other: object) -> bool:
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    __hash__ = None
+
+    def __str__(self) -> str:
+        return str(list(self))
+
+    def __repr__(self) -> str:
+        return self.__str__()
 
 
 class Player:
     """
     Represents one player (including location, powers, and state) from the game
     """
+    __slots__ = ("player_id", "role", "is_active", "actions_left", "city_cards", "current_city")
+    __setstate__ = restore_slots
 
     def __init__(self, player_id: str, role: Role, starting_city: City):
         self.player_id = player_id
         self.role = role
         self.is_active = False
         self.actions_left = 0
-        self.city_cards: List[CityCard] = []
+        self.city_cards: Hand = Hand()
         self.current_city = starting_city
 
     def __eq__(self, other: object):
@@ -233,7 +560,7 @@ class Player:
         Returns:
             bool - true if move is successful, false otherwise
         """
-        if city in self.current_city.connected_cities:
+        if is_adjacent(self.current_city.index, city.index):
             self.current_city = city
             return True
         return False
@@ -293,14 +620,13 @@ class Player:
         """
         if other_player.current_city != self.current_city or city_card != self.current_city:
             return False
-        if self.subtract_card(city_card):
-            if other_player.add_card(city_card):
-                return True
-            else:
-                # we just removed this, but couldn't give it to other player.
-                # add back in so it's not lost.
-                self.add_card(city_card)
-        return False
+        # checked up front, so a card is never taken from one hand without reaching the other
+        if city_card not in self.city_cards:
+            return False
+        if other_player is not self and len(other_player.city_cards) >= MAX_HAND_COUNT:
+            return False
+        self.subtract_card(city_card)
+        return other_player.add_card(city_card)
 
     def add_card(self, city_card: CityCard) -> bool:
         """
@@ -308,10 +634,7 @@ class Player:
         TODO: add in logic for handling discarding. Currently, this just doesn't let a 
         player take another card if they have a full hand.
         """
-        if len(self.city_cards) < MAX_HAND_COUNT and not city_card in self.city_cards:
-            self.city_cards.append(city_card)
-            return True
-        return False
+        return len(self.city_cards) < MAX_HAND_COUNT and self.city_cards.add(city_card)
 
     def subtract_card(self, city_card: CityCard) -> bool:
         """
@@ -321,11 +644,7 @@ class Player:
         Returns:
             bool - true if card successfully taken, false otherwise
         """
-        try:
-            self.city_cards.remove(city_card)
-            return True
-        except ValueError:
-            return False
+        return self.city_cards.remove(city_card)
 
     def can_discover_cure(self, color: str, city_cards: List[CityCard] = []) -> bool:
         """
@@ -336,21 +655,13 @@ class Player:
         Returns:
             bool - true if we can discover a cure, false otherwise
         """
-        if not city_cards:
-            city_cards = self.city_cards
-
         if not self.current_city.has_research_station:
             return False
-
-        def color_matches(city_card: CityCard) -> int:
-            nonlocal color
-            return 1 if city_card.color == color else 0
-
-        has_enough_cards = sum(
-            list(map(color_matches, city_cards))) >= CURE_COUNT
-        cards_in_hand = functools.reduce(lambda a, b: a and b, [
-                                         city_card in self.city_cards for city_card in city_cards])
-        return has_enough_cards and cards_in_hand
+        if not city_cards:
+            return self.city_cards.count_color(color) >= CURE_COUNT
+        mask = Hand.get_mask(city_cards)
+        cards_in_hand = not mask & ~self.city_cards.mask
+        return cards_in_hand and popcount(mask & COLOR_MASKS[COLOR_INDEX[color]]) >= CURE_COUNT
 
     def discover_cure(self, color: str, city_cards: List[CityCard]) -> None:
         """
@@ -410,20 +721,65 @@ class Player:
         self.is_active = True
         self.actions_left = MAX_ACTIONS
 
+    def clone(self, cities: Dict[str, City]) -> 'Player':
+        """
+        Copy of this player, standing in the matching city from the given cities.
+        """
+        player = Player.__new__(Player)
+        player.player_id = self.player_id
+        player.role = self.role.clone()
+        player.is_active = self.is_active
+        player.actions_left = self.actions_left
+        player.city_cards = self.city_cards.copy()
+        player.current_city = cities[self.current_city.name]
+        return player
+
+
+# piles were a deque subclass called Deck for a while; games pickled then load as plain lists
+Deck = list
+
 
 class CardManager:
     """
     Object for storing CityCard deck and InfectionCard deck, along with methods for accessing
     """
+    __slots__ = ("rng", "number_of_epidemic_cards", "city_card_deck", "city_card_discard",
+                 "infection_card_deck", "infection_card_discard", "infection_segments")
 
-    def __init__(self, num_epidemic_cards: int = MIN_NUM_EPIDEMIC_CARDS):
+    def __init__(self, num_epidemic_cards: int = MIN_NUM_EPIDEMIC_CARDS, rng: random.Random = None):
+        # every shuffle goes through this game's own RNG, so games don't perturb each other
+        self.rng: random.Random = rng if rng is not None else random.Random()
         self.number_of_epidemic_cards = num_epidemic_cards
         self.city_card_deck: List = self.init_city_cards(num_epidemic_cards)
-        self.city_card_discard: List = []
-        self.infection_card_deck: List = self.init_infection_cards()
-        self.infection_card_discard: List = []
-
-    def init_city_cards(self, num_epidemic_cards: int = MIN_NUM_EPIDEMIC_CARDS) -> List[CityCard]:
+        self.city_card_discard: List[CityCard] = []
+        self.infection_card_deck: List[InfectionCard] = self.init_infection_cards()
+        self.infection_card_discard: List[InfectionCard] = []
+        # sizes of the runs of infection cards that were shuffled together, top of the deck
+        # first. Which cards are in each run is public, but not their order; see risk.py
+        self.infection_segments: List[int] = [len(self.infection_card_deck)]
+
+    def clone(self, rng: random.Random) -> 'CardManager':
+        """
+        Copy of this card manager, shuffling with the given RNG. Cards are shared, since
+        they're immutable; only the piles are copied.
+        """
+        card_manager = CardManager.__new__(CardManager)
+        card_manager.rng = rng
+        card_manager.number_of_epidemic_cards = self.number_of_epidemic_cards
+        card_manager.city_card_deck = self.city_card_deck.copy()
+        card_manager.city_card_discard = self.city_card_discard.copy()
+        card_manager.infection_card_deck = self.infection_card_deck.copy()
+        card_manager.infection_card_discard = self.infection_card_discard.copy()
+        card_manager.infection_segments = self.infection_segments[:]
+        return card_manager
+
+    def __setstate__(self, state: Any) -> None:
+        restore_slots(self, state)
+        if not hasattr(self, "infection_segments"):
+            # saved before the runs were tracked
+            self.infection_segments = [len(self.infection_card_deck)]
+
+    def init_city_cards(self, num_epidemic_cards: int = MIN_NUM_EPIDEMIC_CARDS) -> List:
         """
         Creates a deck of CityCards using the city_list constant
         Returns:
@@ -432,7 +788,7 @@ class CardManager:
         city_cards: List = [CityCard(c)
                             for c in CITY_LIST.keys()]
         city_cards.extend([EpidemicCard()] * num_epidemic_cards)
-        random.shuffle(city_cards)
+        self.rng.shuffle(city_cards)
         return city_cards
 
     def init_infection_cards(self) -> List[InfectionCard]:
@@ -443,7 +799,7 @@ class CardManager:
         """
         infection_cards = [InfectionCard(c)
                            for c in CITY_LIST.keys()]
-        random.shuffle(infection_cards)
+        self.rng.shuffle(infection_cards)
         return infection_cards
 
     def handle_epidemic(self) -> InfectionCard:
@@ -493,31 +849,60 @@ class CardManager:
             InfectionCards - array of drawn infection cards
         """
         # not sure if this is game over, but just reshuffle and keep going
-        if len(self.infection_card_deck) < number:
-            # take however many are left, then shuffle
-            infection_cards = self.infection_card_deck
-            self.infection_card_deck = self.infection_card_discard
-            random.shuffle(self.infection_card_deck)
-            self.infection_card_discard = []
+        infection_cards = self.infection_card_deck[0:number]
+        del self.infection_card_deck[0:number]
+        self.take_from_segments(len(infection_cards))
+        if len(infection_cards) < number:
+            # took however many were left, now shuffle the discards back in
+            self.infection_card_deck, self.infection_card_discard = self.infection_card_discard, self.infection_card_deck
+            self.rng.shuffle(self.infection_card_deck)
+            self.infection_segments = [len(self.infection_card_deck)]
             num_left = number - len(infection_cards)
-            infection_cards.extend(self.infection_card_deck[0:num_left])
-            self.infection_card_discard[:0] = infection_cards
+            drawn = self.infection_card_deck[0:num_left]
             del self.infection_card_deck[0:num_left]
-        else:
-            infection_cards = self.infection_card_deck[0:number]
-            self.infection_card_discard[:0] = infection_cards
-            del self.infection_card_deck[0:number]
+            self.take_from_segments(len(drawn))
+            infection_cards.extend(drawn)
+        self.infection_card_discard[:0] = infection_cards
         return infection_cards
 
+    def take_from_segments(self, number: int) -> None:
+        """
+        Keep infection_segments in step with drawing cards off the top of the infection deck.
+        """
+        segments = self.infection_segments
+        while number and segments:
+            taken = min(number, segments[0])
+            segments[0] -= taken
+            number -= taken
+            if not segments[0]:
+                segments.pop(0)
+
+    def get_infection_segments(self) -> List[List[InfectionCard]]:
+        """
+        The infection deck split into the runs of cards that were shuffled together, top
+        first. Every order of the cards within a run is equally likely.
+        """
+        cards = list(self.infection_card_deck)
+        if sum(self.infection_segments) != len(cards):
+            # the deck was changed behind our back, so all we know is what's in it
+            return [cards] if cards else []
+        segments = []
+        start = 0
+        for size in self.infection_segments:
+            segments.append(cards[start:start + size])
+            start += size
+        return segments
+
     def shuffle_and_replace_infection_cards(self) -> None:
         """
         Method used after an epidemic card is drawn. Shuffles the infection card discard pile and
         puts those cards on top of the infection card deck
         """
-        random.shuffle(self.infection_card_discard)
-        self.infection_card_discard.extend(self.infection_card_deck)
-        self.infection_card_deck = self.infection_card_discard
-        self.infection_card_discard = []
+        self.rng.shuffle(self.infection_card_discard)
+        self.infection_card_deck[:0] = self.infection_card_discard
+        if self.infection_card_discard:
+            self.infection_segments.insert(0, len(self.infection_card_discard))
+        self.infection_card_discard.clear()
 
     def draw_bottom_infection_card(self) -> InfectionCard:
         """
@@ -527,6 +912,9 @@ class CardManager:
             InfectionCard - bottom card from deck
         """
         bottom_card = self.infection_card_deck.pop()
+        self.infection_segments[-1] -= 1
+        if not self.infection_segments[-1]:
+            self.infection_segments.pop()
         self.infection_card_discard[:0] = [bottom_card]
         return bottom_card
 
@@ -536,34 +924,46 @@ class InfectionManager:
     Object for tracking current infection level and rate. Separate from disease state, which holds
     number of remaining diseases left for each color
     """
-
-    def __init__(self):
+    __slots__ = ("level", "rate", "outbreak_count", "max_outbreak_count")
+    __setstate__ = restore_slots
+    # infection rate for each level; the same for every game
+    rates = {
+        1: 2,
+        2: 2,
+        3: 2,
+        4: 3,
+        5: 3,
+        6: 4,
+        7: 4
+    }
+
+    def __init__(self, max_outbreak_count: int = MAX_OUTBREAK_COUNT):
         self.level = 1
         self.rate = 2
         self.outbreak_count = 0
-        self.rates = {
-            1: 2,
-            2: 2,
-            3: 2,
-            4: 3,
-            5: 3,
-            6: 4,
-            7: 4
-        }
+        self.max_outbreak_count = max_outbreak_count
+
+    def clone(self) -> 'InfectionManager':
+        infection_manager = InfectionManager.__new__(InfectionManager)
+        infection_manager.level = self.level
+        infection_manager.rate = self.rate
+        infection_manager.outbreak_count = self.outbreak_count
+        infection_manager.max_outbreak_count = self.max_outbreak_count
+        return infection_manager
 
     def increase_level(self) -> None:
         """
         Increase infection level by one, which may increase the current rate
         """
         self.level += 1
-        self.rate = self.rates[self.level]
+        self.rate = self.rates[min(self.level, len(self.rates))]
 
     def increase_outbreak_count(self) -> None:
         """
         Increase the outbreak level. If we hit the max number of outbreaks, raise GameEndedError
         """
         self.outbreak_count += 1
-        if self.outbreak_count >= MAX_OUTBREAK_COUNT:
+        if self.outbreak_count >= self.max_outbreak_count:
             raise GameEndedError("Hit limit for outbreaks")
 
 
@@ -571,6 +971,8 @@ class DiseaseManager:
     """
     Object for holding data about remaining diseases and disease statuses(cured / eradicated)
     """
+    __slots__ = ("diseases_cured", "diseases_eradicated", "diseases_remaining")
+    __setstate__ = restore_slots
 
     def __init__(self):
         self.diseases_cured: Dict[str, bool] = dict.fromkeys(COLORS, False)
@@ -579,17 +981,47 @@ class DiseaseManager:
         self.diseases_remaining: Dict[str, int] = dict.fromkeys(
             COLORS, DISEASE_CUBE_LIMIT)
 
-    def update_disease_counts(self, cities_list: List[City]) -> None:
+    def clone(self) -> 'DiseaseManager':
+        disease_manager = DiseaseManager.__new__(DiseaseManager)
+        disease_manager.diseases_cured = self.diseases_cured.copy()
+        disease_manager.diseases_eradicated = self.diseases_eradicated.copy()
+        disease_manager.diseases_remaining = self.diseases_remaining.copy()
+        return disease_manager
+
+    def update_disease_counts(self, cubes: Union[np.ndarray, List[City]]) -> None:
         """
-        Update the disease metrics tracked in this class. Loops through all cities and gets sums,
-        then updates the amount of disease remaining. If no more cubes for a given disease, ends game.
+        Update the disease metrics tracked in this class. Sums the board's cube matrix (or the
+        given cities) by color, then updates the amount of disease remaining. If no more cubes
+        for a given disease, ends game.
         """
-        self.diseases_remaining = dict.fromkeys(COLORS, DISEASE_CUBE_LIMIT)
-        for city in cities_list:
-            for color in COLORS:
-                if city.disease_count[color] > self.diseases_remaining[color]:
-                    raise GameEndedError("Ran out of disease cubes.")
-                self.diseases_remaining[color] -= city.disease_count[color]
+        if not isinstance(cubes, np.ndarray):
+            cubes = np.array([city.disease_count.values() for city in cubes],
+                             CUBE_DTYPE).reshape(-1, NUM_COLORS)
+        remaining = cubes_remaining(cubes)
+        if (remaining < 0).any():
+            raise GameEndedError(OUT_OF_CUBES_REASON.format(COLORS[int(np.argmax(remaining < 0))]))
+        self.diseases_remaining = dict(zip(COLORS, remaining.tolist()))
+
+    def check_disease_counts(self, cubes: np.ndarray) -> None:
+        """
+        Compare the running totals in diseases_remaining against a full scan of the board's
+        cube matrix. Only meant for debugging, since it's the scan the totals are there to avoid.
+        Raises:
+            InvalidOperationError
+                -if they don't match
+        """
+        scanned = dict(zip(COLORS, cubes_remaining(cubes).tolist()))
+        if scanned != self.diseases_remaining:
+            raise InvalidOperationError("Disease counts out of sync: tracking {} but board has {}".format(
+                self.diseases_remaining, scanned))
+
+    def update_eradicated(self, cubes: np.ndarray) -> None:
+        """
+        Mark every cured disease with no cubes left on the board as eradicated.
+        """
+        cured = np.array([self.diseases_cured[c] for c in COLORS])
+        for i in np.flatnonzero(eradicable(cubes, cured)):
+            self.diseases_eradicated[COLORS[i]] = True
 
     def get_remaining_diseases(self, color: str = None) -> Union[Dict[str, int], int]:
         """
@@ -655,8 +1087,7 @@ class DiseaseManager:
                 -if we've run out of diseases
         """
         if self.diseases_remaining[color] < number:
-            raise GameEndedError(
-                "You ran out of disease cubes for the color {}".format(color))
+            raise GameEndedError(OUT_OF_CUBES_REASON.format(color))
         self.diseases_remaining[color] -= number
 
     def remove_disease(self, color, number: int = 1) -> None:
@@ -665,28 +1096,202 @@ class DiseaseManager:
         Args:
             color - string representing color of disease being placed
             number(opt) - number of disease cubes to place
+        Raises:
+            InvalidOperationError
+                -if that would leave more cubes in the supply than there are, i.e. the
+                    totals were already wrong
         """
+        if self.diseases_remaining[color] + number > DISEASE_CUBE_LIMIT:
+            raise InvalidOperationError("Disease counts out of sync: {} {} cubes back in a supply of {}".format(
+                number, color, self.diseases_remaining[color]))
         self.diseases_remaining[color] += number
 
 
+def get_coercer(arg_type: Any) -> Callable[['Board', Any], Any]:
+    """
+    Function that turns an arg from a message into what a Board method takes, given the type
+    listed for it in ACTIONS: Players and Cities are looked up on the board, a list holds
+    the type of its elements, and anything else is called on the value.
+    """
+    if arg_type == Player:
+        return Board.get_player
+    if arg_type == City:
+        return Board.get_city
+    if isinstance(arg_type, list):
+        element_type = arg_type[0]
+        return lambda board, value: [element_type(element) for element in value]
+    return lambda board, value: arg_type(value)
+
+
+class Dispatcher:
+    """
+    One entry of ACTIONS compiled: the Board method it calls, and the key and coercer for
+    each of that method's args, so running an action is a lookup by name and a call rather
+    than working out what every arg should be each time.
+    """
+    __slots__ = ("method", "args", "uses_action")
+
+    def __init__(self, method: Callable[..., bool], arg_types: Dict[str, Any], uses_action: bool):
+        """
+        Args:
+            method - unbound Board method to call
+            arg_types - the method's args, in order, and the type of each (as in ACTIONS)
+            uses_action - if True, a successful call uses up one of the active player's actions
+        """
+        self.method = method
+        self.args: Tuple[Tuple[str, Callable[['Board', Any], Any]], ...] = tuple(
+            (key, get_coercer(arg_type)) for key, arg_type in arg_types.items())
+        self.uses_action = uses_action
+
+    def get_args(self, board: 'Board', given: Dict[str, Any]) -> List:
+        """
+        Coerce the given args into what the method takes, in order.
+        Raises:
+            KeyError
+                -if an arg is missing
+            InvalidOperationError, ValueError, TypeError
+                -if an arg doesn't name anything on the board
+        """
+        return [coerce(board, given[key]) for key, coerce in self.args]
+
+    def __call__(self, board: 'Board', given: Dict[str, Any]) -> bool:
+        """
+        Coerce the given args and call the method with them. Every action checks what it
+        needs before changing anything, so a call that fails or raises leaves the board as
+        it was, without needing an UndoRecord.
+        Returns:
+            bool - whatever the method returned
+        Raises:
+            as for get_args
+        """
+        if len(self.args) == 1:
+            # most actions take a single arg, which is worth calling without building a list
+            (key, coerce), = self.args
+            return self.method(board, coerce(board, given[key]))
+        return self.method(board, *[coerce(board, given[key]) for key, coerce in self.args])
+
+
+# every action/ability a Board can take, by message name: (Board method, the type of each
+# of its args by key, in the order the method takes them, whether it uses up one of the
+# active player's actions). Compiled into DISPATCHERS once Board is defined.
+ACTIONS: Dict[str, Tuple[str, Dict[str, Any], bool]] = {
+    MOVE_ADJACENT: ("move_adjacent", {"to_city": City}, True),
+    MOVE_DIRECT_FLIGHT: ("move_direct_flight", {"city_card": CityCard}, True),
+    MOVE_CHARTER_FLIGHT: ("move_charter_flight", {"city_card": CityCard, "to_city": City}, True),
+    MOVE_SHUTTLE_FLIGHT: ("move_shuttle_flight", {"to_city": City}, True),
+    BUILD_RESEARCH_STATION: ("build_research_station", {"city_card": CityCard}, True),
+    TREAT_DISEASE: ("treat_disease", {"color": str}, True),
+    SHARE_KNOWLEDGE: ("share_knowledge", {"city_card": CityCard, "player_to": Player, "player_from": Player}, True),
+    DISCOVER_CURE: ("discover_cure", {"city_cards": [CityCard], "color": str}, True),
+    DISCARD: ("discard", {"city_cards": [CityCard], "player": Player}, False),
+    END_TURN: ("move_to_next_player", {}, False),
+}
+
+
+class UndoRecord:
+    """
+    What Board.apply needs to put the board back the way it was before an action: the
+    players' positions, hands and turn state, the disease totals, and the cube row of the
+    city the action was taken in. Only when the action ends the turn (and so draws cards,
+    may shuffle, and infects cities anywhere) are the piles, RNG state, infection track and
+    whole cube matrix kept as well.
+    """
+    __slots__ = ("active_player", "players", "station", "diseases", "cube_row", "cubes", "cards",
+                 "rng_state", "infection", "game_over")
+
+    def __init__(self):
+        self.cube_row: Tuple[int, np.ndarray] = None
+        self.cubes: np.ndarray = None
+        self.cards: Tuple[List, ...] = None
+        self.rng_state: tuple = None
+        self.infection: Tuple[int, int, int] = None
+        # why the game ended, if this action ended it
+        self.game_over: str = None
+
+
 class Board:
     """
     Holds game state, list of cities, and players (with their positions)
     etc
     """
+    __slots__ = ("debug", "rng", "infection_manager", "disease_manager", "card_manager", "cubes", "cities",
+                 "player_ids", "players", "active_player")
 
-    def __init__(self, player_ids: List[str], starting_city: str = STARTING_CITY) -> None:
-        # set up game state
-        self.infection_manager: InfectionManager = InfectionManager()
+    def __init__(self, player_ids: List[str], starting_city: str = STARTING_CITY,
+                 num_epidemic_cards: int = MIN_NUM_EPIDEMIC_CARDS, max_outbreak_count: int = MAX_OUTBREAK_COUNT,
+                 seed: int = None, cubes: np.ndarray = None, debug: bool = False) -> None:
+        """
+        Args:
+            seed(opt) - seed for this board's RNG
+            cubes(opt) - zeroed cube matrix to keep this board's disease cubes in, e.g. one
+                from a CubeBatch. One is allocated if not given.
+            debug(opt) - check the running disease cube totals against a full scan of the
+                board every time they change
+        """
+        self.debug = debug
+        # set up game state. The RNG is pickled along with the board, so a saved game
+        # carries on drawing the same cards it would have
+        self.rng: random.Random = random.Random(seed)
+        self.infection_manager: InfectionManager = InfectionManager(
+            max_outbreak_count)
         self.disease_manager: DiseaseManager = DiseaseManager()
-        self.card_manager: CardManager = CardManager()
-        self.cities: Dict[str, City] = self.init_cities(starting_city)
+        self.card_manager: CardManager = CardManager(
+            num_epidemic_cards, self.rng)
+        # disease cubes on every city, indexed [city, color]; see cube_matrix.py
+        self.cubes: np.ndarray = cubes if cubes is not None else new_cube_matrix()
+        self.cities: Dict[str, City] = self.init_cities(
+            starting_city, self.cubes)
         self.player_ids = player_ids
         # create player list and set active player
         self.players: Dict[str, Player] = {p: Player(p, Role(), self.get_city(starting_city))
                                            for p in player_ids}
         self.set_active_player(self.players[player_ids[0]])
 
+    def __setstate__(self, state: Any) -> None:
+        if isinstance(state, dict):
+            # pickled before the board had __slots__
+            self.upgrade(state)
+        else:
+            restore_slots(self, state)
+
+    def upgrade(self, state: Dict[str, Any]) -> None:
+        """
+        Fill this board in from the attribute dict of one pickled before the board models had
+        __slots__ (a game-*.pickle from before then), as today's board would hold the same
+        game: cubes in a cube matrix, interned cards in its piles and Hands, and an RNG of its
+        own. Those boards drew from the global RNG, so the new one is freshly seeded.
+        """
+        self.debug = False
+        self.rng = random.Random()
+        self.infection_manager = state["infection_manager"]
+        if not hasattr(self.infection_manager, "max_outbreak_count"):
+            self.infection_manager.max_outbreak_count = MAX_OUTBREAK_COUNT
+        self.disease_manager = state["disease_manager"]
+        cards: CardManager = state["card_manager"]
+        cards.rng = self.rng
+        for pile in ("city_card_deck", "city_card_discard", "infection_card_deck", "infection_card_discard"):
+            setattr(cards, pile, [card if isinstance(card, EpidemicCard) else card.intern()
+                                  for card in getattr(cards, pile)])
+        cards.infection_segments = [len(cards.infection_card_deck)]
+        self.card_manager = cards
+        self.cubes = new_cube_matrix()
+        self.cities = {name: City(name, self.cubes) for name in CITY_NAMES}
+        for name, old in state["cities"].items():
+            city = self.cities[name]
+            city.has_research_station = old.has_research_station
+            for color, count in old.disease_count.items():
+                city.disease_count[color] = count
+        self.disease_manager.update_disease_counts(self.cubes)
+        self.player_ids = state["player_ids"]
+        self.players = {}
+        for player_id, old in state["players"].items():
+            player = Player(player_id, old.role, self.cities[old.current_city.name])
+            player.is_active = old.is_active
+            player.actions_left = old.actions_left
+            player.city_cards = Hand([card.intern() for card in old.city_cards])
+            self.players[player_id] = player
+        self.active_player = self.players[state["active_player"].player_id]
+
     def set_active_player(self, player: Union[str, Player]) -> None:
         """
         Set the active player to be the given player object. Also, set all other
@@ -703,16 +1308,19 @@ class Board:
                 p.actions_left = 0
 
     @classmethod
-    def init_cities(self, starting_city: str) -> Dict[str, City]:
+    def init_cities(self, starting_city: str, cubes: np.ndarray = None) -> Dict[str, City]:
         """
         Using cities and connected cities information from constants file,
         creates a dict holding all cities with all of their related data
+        Args:
+            cubes(opt) - cube matrix to hold every city's disease counts. One is allocated
+                if not given.
         Returns: 
             cities - dict associating city names to city objects for all 48 cities
         """
-        cities = {c: City(c) for c in CITY_LIST.keys()}
-        for city in cities.values():
-            city.set_connected_cities(CITY_CONNECTIONS[city.name])
+        if cubes is None:
+            cubes = new_cube_matrix()
+        cities = {c: City(c, cubes) for c in CITY_NAMES}
         cities[starting_city].add_research_station()
         return cities
 
@@ -762,12 +1370,20 @@ class Board:
         """
         if color not in COLORS:
             return False
-        if self.disease_manager.is_cured(color):
-            success = self.active_player.current_city.treat_all_disease(color)
-            if not self.disease_manager.diseases_remaining[color]:
+        city = self.active_player.current_city
+        if city.disease_count[color] == 0:
+            return False
+        cured = self.disease_manager.is_cured(color)
+        # the cubes go back in the supply first, since that's the only step that can fail
+        self.disease_manager.remove_disease(color, city.disease_count[color] if cured else 1)
+        if cured:
+            city.treat_all_disease(color)
+            if self.disease_manager.get_remaining_diseases(color) == DISEASE_CUBE_LIMIT:
                 self.disease_manager.eradicate_disease(color)
-            return success
-        return self.active_player.current_city.treat_single_disease(color)
+        else:
+            city.treat_single_disease(color)
+        self.check_disease_counts()
+        return True
 
     def share_knowledge(self, city_card: CityCard, player_to: Player, player_from: Player):
         """
@@ -783,20 +1399,24 @@ class Board:
         of them to cure a disease of the given color and the active player is 
         in a city with a research station, cure disease.
         """
-        if self.active_player.can_discover_cure(color, city_cards):
-            if not self.disease_manager.is_cured(color):
-                self.disease_manager.cure_disease(color)
-                self.active_player.discover_cure(color, city_cards)
-                return True
-        return False
+        if not city_cards or self.disease_manager.is_cured(color):
+            return False
+        if not self.active_player.can_discover_cure(color, city_cards):
+            return False
+        self.active_player.discover_cure(color, city_cards)
+        self.disease_manager.cure_disease(color)
+        return True
 
-    def move_to_next_player(self):
+    def move_to_next_player(self) -> bool:
         """
         At the end of the current player's turn, make the next player active.
+        Returns:
+            bool - always True, like any other ability that succeeds
         """
         next_player_id = self.player_ids[(self.player_ids.index(
             self.active_player.player_id) + 1) % len(self.player_ids)]
         self.set_active_player(self.players[next_player_id])
+        return True
 
     def draw_city_cards(self) -> List[CityCard]:
         """
@@ -806,19 +1426,18 @@ class Board:
         """
         cards = self.card_manager.draw_city_cards()
         city_cards = []
+        outbreaks = 0
         for card in cards:
             if not isinstance(card, EpidemicCard):
                 city_cards.append(card)
                 continue
             self.infection_manager.increase_level()
             bottom_card = self.card_manager.handle_epidemic()
-            self.cities[bottom_card.name].add_epidemic_disease(
-                self.cities, bottom_card.color)
-            self.disease_manager.update_disease_counts(
-                list(self.cities.values()))
-        for _ in range(City.outbreaks_occurred):
-            self.infection_manager.increase_outbreak_count()
-        City.outbreaks_occurred = 0
+            report = OutbreakResolver.infect(
+                self.cities, self.cities[bottom_card.name], bottom_card.color, MAX_DISEASE_COUNT)
+            outbreaks += len(report.outbreaks)
+            self.place_cubes([report])
+        self.record_outbreaks(outbreaks)
         return city_cards
 
     def draw_infection_cards_and_place_cubes(self):
@@ -829,13 +1448,58 @@ class Board:
         """
         infection_cards = self.card_manager.draw_infection_cards(
             self.infection_manager.rate)
-        for ic in infection_cards:
-            self.cities[ic.name].add_single_disease(self.cities, ic.color)
-        for _ in range(City.outbreaks_occurred):
+        # each infection card starts its own outbreak chain
+        reports = [OutbreakResolver.infect(self.cities, self.cities[ic.name], ic.color)
+                   for ic in infection_cards]
+        self.record_outbreaks(sum(len(r.outbreaks) for r in reports))
+        self.place_cubes(reports)
+        return reports
+
+    def infect_city(self, city: Union[str, City], color: str, cubes: int = 1) -> OutbreakReport:
+        """
+        Put cubes of the given color on a city the way an infection would, outbreaks and all,
+        taking them out of the supply and counting the outbreaks.
+        Args:
+            cubes(opt) - 1 for a normal infection, MAX_DISEASE_COUNT for an epidemic
+        Raises:
+            GameEndedError
+                -if this hits the outbreak limit or runs out of cubes
+        """
+        report = OutbreakResolver.infect(self.cities, self.get_city(city), color, cubes)
+        self.record_outbreaks(len(report.outbreaks))
+        self.place_cubes([report])
+        return report
+
+    def place_cubes(self, reports: List[OutbreakReport]) -> None:
+        """
+        Take the cubes that infections put on the board out of the supply.
+        Raises:
+            GameEndedError
+                -if there weren't enough cubes left
+        """
+        for report in reports:
+            self.disease_manager.place_disease(report.color, report.cubes_placed)
+        self.check_disease_counts()
+
+    def check_disease_counts(self) -> None:
+        """
+        In debug mode, make sure the running disease cube totals match the board.
+        Raises:
+            InvalidOperationError
+                -if they don't
+        """
+        if self.debug:
+            self.disease_manager.check_disease_counts(self.cubes)
+
+    def record_outbreaks(self, outbreaks: int) -> None:
+        """
+        Add outbreaks that happened on this board to its outbreak count.
+        Raises:
+            GameEndedError
+                -if this hits the outbreak limit
+        """
+        for _ in range(outbreaks):
             self.infection_manager.increase_outbreak_count()
-        self.disease_manager.update_disease_counts(
-            list(self.cities.values()))
-        City.outbreaks_occurred = 0
 
     def dec_active_player_actions(self):
         """
@@ -843,16 +1507,73 @@ class Board:
         """
         self.active_player.dec_actions_left()
 
-    def discard(self, city_cards: List[CityCard], player: Player):
+    def discard(self, city_cards: List[CityCard], player: Player) -> bool:
         """
         Discard the given city cards from the given player's hand, if
         they possess these cards already.
+        Returns:
+            bool - True if every card was discarded, False (discarding nothing) if any
+                weren't in their hand or were given twice
         """
-        error = False
+        mask = Hand.get_mask(city_cards)
+        if mask & ~player.city_cards.mask or popcount(mask) != len(city_cards):
+            return False
         for c in city_cards:
-            if not player.subtract_card(c):
-                error = True
-        return error
+            player.subtract_card(c)
+        return True
+
+    def legal_actions(self, player: Union[str, Player] = None) -> List[Dict[str, Any]]:
+        """
+        Every action or ability the given player (by default, the active player) can take
+        right now, in the {"name", "args"} shape the Controller takes in messages, with
+        cities, cards and players given by name/id. Only the active player gets actions,
+        and only while they have some left.
+        Discovering a cure is listed once per color, using the first CURE_COUNT cards of
+        that color in hand, rather than once per possible set of cards. Discards are only
+        offered to a player holding more than MAX_HAND_COUNT cards, one card at a time.
+        Returns:
+            [{"name", "args"}] - legal actions
+        """
+        player = self.active_player if player is None else self.get_player(player)
+        hand = player.city_cards
+        legal = []
+        if len(hand) > MAX_HAND_COUNT:
+            legal.extend({"name": DISCARD, "args": {"city_cards": [card.name], "player": player.player_id}}
+                         for card in hand)
+        if player != self.active_player or not player.has_actions_left():
+            return legal
+        city = player.current_city
+        here = city.name
+        legal.extend({"name": MOVE_ADJACENT, "args": {"to_city": name}}
+                     for name in city.connected_cities)
+        legal.extend({"name": MOVE_DIRECT_FLIGHT, "args": {"city_card": card.name}}
+                     for card in hand if card.index != city.index)
+        if city in hand:
+            legal.extend({"name": MOVE_CHARTER_FLIGHT, "args": {"city_card": here, "to_city": name}}
+                         for name in CITY_NAMES if name != here)
+            if not city.has_research_station:
+                legal.append({"name": BUILD_RESEARCH_STATION,
+                             "args": {"city_card": here}})
+        if city.has_research_station:
+            legal.extend({"name": MOVE_SHUTTLE_FLIGHT, "args": {"to_city": name}}
+                         for name, c in self.cities.items() if c.has_research_station and name != here)
+            for color in COLORS:
+                if hand.count_color(color) >= CURE_COUNT and not self.disease_manager.is_cured(color):
+                    cards = [card.name for card in hand if card.color == color][:CURE_COUNT]
+                    legal.append({"name": DISCOVER_CURE,
+                                 "args": {"city_cards": cards, "color": color}})
+        legal.extend({"name": TREAT_DISEASE, "args": {"color": color}}
+                     for color, count in city.disease_count.items() if count)
+        for other in self.players.values():
+            if other is player or other.current_city is not city:
+                continue
+            # the card matching this city can change hands, if the receiver has room
+            for giver, taker in ((player, other), (other, player)):
+                if city in giver.city_cards and len(taker.city_cards) < MAX_HAND_COUNT:
+                    legal.append({"name": SHARE_KNOWLEDGE,
+                                  "args": {"city_card": here, "player_to": taker.player_id,
+                                           "player_from": giver.player_id}})
+        return legal
 
     def check_end_of_actions(self):
         """
@@ -863,11 +1584,137 @@ class Board:
         """
         if self.active_player.has_actions_left():
             return
-        self.active_player.city_cards += self.card_manager.draw_city_cards()
+        # go through draw_city_cards so epidemics get resolved rather than ending up in hand
+        self.active_player.city_cards.extend(self.draw_city_cards())
         self.draw_infection_cards_and_place_cubes()
         # if len(self.active_player.city_cards) <= MAX_HAND_COUNT:
         self.move_to_next_player()
 
+    def clone(self) -> 'Board':
+        """
+        Copy of this board that can be played on without affecting it, for trying moves
+        out. Much cheaper than a pickle round trip: the city graph and cards are immutable
+        and shared, so only the game state itself is copied. The copy's RNG carries on from
+        the same state, so it draws the same cards this board would.
+        """
+        board = Board.__new__(Board)
+        board.debug = self.debug
+        board.rng = random.Random.__new__(random.Random)
+        board.rng.setstate(self.rng.getstate())
+        board.infection_manager = self.infection_manager.clone()
+        board.disease_manager = self.disease_manager.clone()
+        board.card_manager = self.card_manager.clone(board.rng)
+        board.cubes = self.cubes.copy()
+        board.cities = {name: city.clone(board.cubes)
+                        for name, city in self.cities.items()}
+        board.player_ids = list(self.player_ids)
+        board.players = {player_id: player.clone(board.cities)
+                         for player_id, player in self.players.items()}
+        board.active_player = board.players[self.active_player.player_id]
+        return board
+
+    def get_action_args(self, action: Dict[str, Any]) -> List:
+        """
+        Look up the Cities, CityCards and Players named in an action's args, in the order
+        its Board method takes them.
+        Raises:
+            InvalidOperationError
+                -if the action is unknown or an arg is missing or invalid
+        """
+        if action.get("name") not in DISPATCHERS:
+            raise InvalidOperationError("Invalid action.")
+        try:
+            return DISPATCHERS[action["name"]].get_args(self, action.get("args", {}))
+        except (KeyError, TypeError, ValueError, InvalidOperationError):
+            raise InvalidOperationError("Invalid args for {}.".format(action["name"]))
+
+    def apply(self, action: Dict[str, Any]) -> UndoRecord:
+        """
+        Take an action or ability, in the {"name", "args"} shape legal_actions gives, the way
+        the Controller would: actions use up one of the active player's actions, and the last
+        one ends their turn. Only what the action can change is recorded beforehand, so
+        applying and then undoing a move is cheaper than cloning the board to try it.
+        Returns:
+            UndoRecord - pass to undo to take the action back. Its game_over says why, if
+                the action ended the game.
+        Raises:
+            InvalidOperationError
+                -if the action is invalid or fails. The board is left as it was.
+        """
+        args = self.get_action_args(action)
+        dispatcher = DISPATCHERS[action["name"]]
+        uses_action = dispatcher.uses_action
+        if uses_action and not self.active_player.has_actions_left():
+            raise InvalidOperationError("No actions left.")
+        record = UndoRecord()
+        record.active_player = self.active_player
+        record.players = [(p, p.current_city, p.city_cards.mask, p.city_cards.color_counts[:],
+                           p.actions_left, p.is_active) for p in self.players.values()]
+        city = self.active_player.current_city
+        record.station = (city, city.has_research_station)
+        diseases = self.disease_manager
+        record.diseases = (diseases.diseases_cured.copy(), diseases.diseases_eradicated.copy(),
+                           diseases.diseases_remaining.copy())
+        if uses_action and self.active_player.actions_left == 1:
+            # the turn ends, so cards get drawn and cubes can land anywhere
+            cards = self.card_manager
+            record.cubes = self.cubes.copy()
+            record.cards = (cards.city_card_deck.copy(), cards.city_card_discard.copy(),
+                            cards.infection_card_deck.copy(), cards.infection_card_discard.copy(),
+                            cards.infection_segments[:])
+            record.rng_state = self.rng.getstate()
+            infection = self.infection_manager
+            record.infection = (infection.level, infection.rate, infection.outbreak_count)
+        else:
+            # actions only ever treat disease where the player is standing
+            record.cube_row = (city.index, self.cubes[city.index].copy())
+        try:
+            if not dispatcher.method(self, *args):
+                raise InvalidOperationError("Action failed.")
+            if uses_action:
+                self.dec_active_player_actions()
+                self.check_end_of_actions()
+        except GameEndedError as e:
+            record.game_over = str(e)
+        except InvalidOperationError:
+            self.undo(record)
+            raise
+        return record
+
+    def undo(self, record: UndoRecord) -> None:
+        """
+        Put the board back the way it was before the action apply returned the given record
+        for. Records have to be undone newest first, and only once: the board takes over
+        what they hold. To redo an action, apply it again.
+        """
+        for player, city, mask, color_counts, actions_left, is_active in record.players:
+            player.current_city = city
+            player.city_cards.mask = mask
+            player.city_cards.color_counts = color_counts
+            player.actions_left = actions_left
+            player.is_active = is_active
+        self.active_player = record.active_player
+        city, has_research_station = record.station
+        if city.has_research_station != has_research_station:
+            city.has_research_station = has_research_station
+            if city.station_listener is not None:
+                city.station_listener(city)
+        diseases = self.disease_manager
+        (diseases.diseases_cured, diseases.diseases_eradicated,
+         diseases.diseases_remaining) = record.diseases
+        if record.cube_row is not None:
+            index, row = record.cube_row
+            self.cubes[index] = row
+        if record.cubes is not None:
+            # in place, since every city's disease counts are views onto this matrix
+            self.cubes[...] = record.cubes
+            cards = self.card_manager
+            (cards.city_card_deck, cards.city_card_discard, cards.infection_card_deck,
+             cards.infection_card_discard, cards.infection_segments) = record.cards
+            self.rng.setstate(record.rng_state)
+            infection = self.infection_manager
+            infection.level, infection.rate, infection.outbreak_count = record.infection
+
     def get_city(self, city_name: Union[str, City]) -> City:
         """
         Get City object from the given city name (i.e. probably the city's name field).
@@ -887,3 +1734,7 @@ class Board:
         if not player_id in self.players.keys():
             raise InvalidOperationError("Invalid player id.")
         return self.players[player_id]
+
+
+DISPATCHERS: Dict[str, Dispatcher] = {name: Dispatcher(getattr(Board, method), arg_types, uses_action)
+                                      for name, (method, arg_types, uses_action) in ACTIONS.items()}
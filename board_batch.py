@@ -0,0 +1,291 @@
+from typing import Dict, Tuple
+import numpy as np
+from board import InfectionManager
+from city_graph import *
+from constants import *
+from cube_matrix import *
+from simulation import INITIAL_INFECTIONS, INITIAL_HAND_SIZES
+
+# Many games' worth of the board's own side of the game (city card draws, epidemics,
+# infections and outbreak chains) held in stacked arrays and advanced a turn at a time in
+# lockstep, for difficulty sweeps that need far more games than a Python loop over Boards
+# gets through. There are no players, so nothing gets treated or cured; it's what the
+# diseases do by themselves. Cities are referred to by index (see city_graph.py).
+#
+# Each board's infection cards are one row of a permutation of the city indices: the
+# discard pile is the first infection_top[b] entries (in no particular order) and the deck
+# is the rest, top card first. City cards are a row of city indices with EPIDEMIC marking
+# epidemic cards, drawn from city_top[b] onwards.
+
+EPIDEMIC = -1
+CITY_COLOR_ARRAY: np.ndarray = np.array(CITY_COLORS)
+# ADJACENCY[i, j] is 1 if city j is connected to city i, so (outbroken cities) @ ADJACENCY
+# counts the cubes each city gets from a round of outbreaks
+ADJACENCY: np.ndarray = np.array([[is_adjacent(i, j) for j in range(NUM_CITIES)]
+                                  for i in range(NUM_CITIES)], np.float32)
+# infection rate at each level, as InfectionManager.rates has it
+MAX_LEVEL = max(InfectionManager.rates)
+RATES: np.ndarray = np.array([0] + [InfectionManager.rates[level]
+                                    for level in range(1, MAX_LEVEL + 1)], np.int64)
+
+# why a board's game ended, in the same words a Board would use. Running out of cubes
+# has one code per color, OUT_OF_CUBES + its index in COLORS.
+PLAYING = 0
+OUT_OF_CARDS = 1
+TOO_MANY_OUTBREAKS = 2
+OUT_OF_CUBES = 3
+REASONS: Dict[int, str] = {
+    OUT_OF_CARDS: "Not enough City Cards remaining",
+    TOO_MANY_OUTBREAKS: "Hit limit for outbreaks",
+}
+REASONS.update({OUT_OF_CUBES + i: OUT_OF_CUBES_REASON.format(color) for i, color in enumerate(COLORS)})
+
+
+def shuffle_segments(cards: np.ndarray, start: np.ndarray, stop: np.ndarray,
+                     rng: np.random.Generator) -> np.ndarray:
+    """
+    Shuffle cards[b, start[b]:stop[b]] for every row b at once, leaving the rest of each
+    row where it is.
+    """
+    positions = np.arange(cards.shape[1])
+    start = start[:, None]
+    stop = stop[:, None]
+    inside = (positions >= start) & (positions < stop)
+    # entries inside the segment get random keys in [start, start + 1), so they sort among
+    # themselves and stay ahead of the entries from stop on
+    keys = np.where(inside, start + rng.random(cards.shape), positions)
+    return np.take_along_axis(cards, np.argsort(keys, axis=1, kind="stable"), axis=1)
+
+
+def resolve_infections(cubes: np.ndarray, boards: np.ndarray, cities: np.ndarray,
+                       colors: np.ndarray, amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Add amounts[k] cubes of color colors[k] to city cities[k] on board boards[k], resolving
+    any outbreak chains, for every k at once (boards must not repeat). Same outcome as
+    OutbreakResolver.infect: the cities that outbreak are the ones that would end up over
+    MAX_DISEASE_COUNT counting a cube from each neighbor that outbreaks, so the chain is
+    spread a ring of neighbors at a time until no new city outbreaks.
+    Returns:
+        (len(boards),) number of outbreaks on each board
+        (len(boards),) number of cubes placed on each board
+    """
+    outbreaks = np.zeros(len(boards), np.int64)
+    placed = np.asarray(amounts, np.int64).copy()
+    # most infections don't outbreak, and only need the one count
+    counts = cubes[boards, cities, colors].astype(np.int16) + amounts
+    overflow = counts > MAX_DISEASE_COUNT
+    calm = ~overflow
+    cubes[boards[calm], cities[calm], colors[calm]] = counts[calm]
+    if overflow.any():
+        outbreaks[overflow], placed[overflow] = spread_outbreaks(
+            cubes, boards[overflow], cities[overflow], colors[overflow], amounts[overflow])
+    return outbreaks, placed
+
+
+def spread_outbreaks(cubes: np.ndarray, boards: np.ndarray, cities: np.ndarray,
+                     colors: np.ndarray, amounts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    resolve_infections for infections that are known to set off an outbreak.
+    """
+    before = cubes[boards, :, colors]
+    counts = before.astype(np.int16)
+    counts[np.arange(len(boards)), cities] += amounts
+    outbroken = counts > MAX_DISEASE_COUNT
+    spreading = np.arange(len(boards))
+    extra = np.zeros_like(counts)
+    while len(spreading):
+        extra[spreading] = (outbroken[spreading].astype(np.float32) @ ADJACENCY).astype(np.int16)
+        after = outbroken[spreading] | (counts[spreading] + extra[spreading] > MAX_DISEASE_COUNT)
+        grew = (after != outbroken[spreading]).any(axis=1)
+        outbroken[spreading] = after
+        spreading = spreading[grew]
+    after = np.minimum(counts + extra, MAX_DISEASE_COUNT)
+    cubes[boards, :, colors] = after
+    return outbroken.sum(axis=1), (after - before).sum(axis=1)
+
+
+class BoardBatch:
+    """
+    N games of the diseases spreading with nobody fighting them, set up the way Simulation
+    sets up a game (hands dealt out of the city card deck, then the starting infections)
+    and advanced a turn at a time with advance. Shuffles come from one numpy Generator for
+    the whole batch, so boards don't draw the same cards a Board with the same seed would.
+    """
+
+    def __init__(self, size: int, num_epidemic_cards: int = MIN_NUM_EPIDEMIC_CARDS,
+                 max_outbreak_count: int = MAX_OUTBREAK_COUNT, num_players: int = MAX_PLAYERS,
+                 seed: int = None):
+        self.rng: np.random.Generator = np.random.default_rng(seed)
+        self.max_outbreak_count = max_outbreak_count
+        # laid out like CubeBatch.cubes, so the cube_matrix queries work on it too
+        self.cubes: np.ndarray = np.zeros((size, NUM_CITIES, NUM_COLORS), CUBE_DTYPE)
+        # running cube_totals(self.cubes), so checking the supply doesn't mean summing the board
+        self.totals: np.ndarray = np.zeros((size, NUM_COLORS), np.int64)
+        self.level: np.ndarray = np.ones(size, np.int64)
+        self.outbreaks: np.ndarray = np.zeros(size, np.int64)
+        self.turns: np.ndarray = np.zeros(size, np.int64)
+        self.reason: np.ndarray = np.full(size, PLAYING, np.int8)
+        everyone = np.arange(size)
+        # city cards, less the starting hands dealt off the top
+        deck = np.tile(np.append(np.arange(NUM_CITIES), [EPIDEMIC] * num_epidemic_cards), (size, 1))
+        deck = shuffle_segments(deck, np.zeros(size, np.int64), np.full(size, deck.shape[1]), self.rng)
+        dealt = INITIAL_HAND_SIZES.get(num_players, 2) * num_players
+        in_hand = (deck != EPIDEMIC) & ((deck != EPIDEMIC).cumsum(axis=1) <= dealt)
+        self.city_cards: np.ndarray = np.take_along_axis(
+            deck, np.argsort(in_hand, axis=1, kind="stable"), axis=1)[:, :deck.shape[1] - dealt]
+        self.city_top: np.ndarray = np.zeros(size, np.int64)
+        # infection cards, then the starting infections
+        self.infection_cards: np.ndarray = shuffle_segments(
+            np.tile(np.arange(NUM_CITIES), (size, 1)), np.zeros(size, np.int64),
+            np.full(size, NUM_CITIES), self.rng)
+        self.infection_top: np.ndarray = np.zeros(size, np.int64)
+        for amount in INITIAL_INFECTIONS:
+            self.infect(everyone, self.draw_infection_cards(everyone), amount)
+            self.check_cubes(everyone)
+
+    def __len__(self) -> int:
+        return len(self.cubes)
+
+    def get_playing(self) -> np.ndarray:
+        """
+        Indices of the boards whose games haven't ended.
+        """
+        return np.flatnonzero(self.reason == PLAYING)
+
+    def get_rates(self) -> np.ndarray:
+        """
+        (boards,) infection rate of each board.
+        """
+        return RATES[np.minimum(self.level, MAX_LEVEL)]
+
+    def advance(self) -> int:
+        """
+        Play the end of a turn on every board still playing: draw two city cards,
+        resolving any epidemics, then draw infection cards and infect those cities.
+        Returns:
+            int - number of boards advanced
+        """
+        started = boards = self.get_playing()
+        self.turns[boards] += 1
+        short = self.city_top[boards] + 2 > self.city_cards.shape[1]
+        self.end_games(boards[short], OUT_OF_CARDS)
+        boards = boards[~short]
+        # like a Board, outbreaks are only counted once all the cards drawn so far are resolved
+        outbreaks = np.zeros(len(self), np.int64)
+        for _ in range(2):
+            # running out of cubes in an epidemic ends the game before the next card
+            boards = boards[self.reason[boards] == PLAYING]
+            drawn = self.city_cards[boards, self.city_top[boards]]
+            self.city_top[boards] += 1
+            epidemics = boards[drawn == EPIDEMIC]
+            outbreaks[epidemics] += self.epidemic(epidemics)
+            self.check_cubes(epidemics)
+        self.record_outbreaks(boards, outbreaks[boards])
+        boards = boards[self.reason[boards] == PLAYING]
+        rates = self.get_rates()[boards]
+        outbreaks[boards] = 0
+        for k in range(rates.max(initial=0)):
+            infecting = boards[rates > k]
+            outbreaks[infecting] += self.infect(infecting, self.draw_infection_cards(infecting, k), 1)
+        self.record_outbreaks(boards, outbreaks[boards])
+        self.check_cubes(boards)
+        return len(started)
+
+    def run(self, max_turns: int = 1000) -> None:
+        """
+        Advance every board until its game ends, or for max_turns turns.
+        """
+        for _ in range(max_turns):
+            if not self.advance():
+                return
+
+    def draw_infection_cards(self, boards: np.ndarray, drawn: int = 0) -> np.ndarray:
+        """
+        Draw one infection card on each of the given boards onto its discard pile. A board
+        whose deck has run out first shuffles its discards back into a new deck, less the
+        cards already drawn this turn (the last `drawn` cards discarded).
+        Returns:
+            (len(boards),) city index drawn on each board
+        """
+        empty = boards[self.infection_top[boards] == NUM_CITIES]
+        if len(empty):
+            # rotate this turn's cards to the front as the discard pile, and shuffle the rest
+            positions = (np.arange(NUM_CITIES) + NUM_CITIES - drawn) % NUM_CITIES
+            self.infection_cards[empty] = shuffle_segments(
+                self.infection_cards[empty][:, positions], np.full(len(empty), drawn),
+                np.full(len(empty), NUM_CITIES), self.rng)
+            self.infection_top[empty] = drawn
+        cards = self.infection_cards[boards, self.infection_top[boards]]
+        self.infection_top[boards] += 1
+        return cards
+
+    def epidemic(self, boards: np.ndarray) -> np.ndarray:
+        """
+        Resolve an epidemic on each of the given boards: raise the infection level, infect
+        the bottom infection card's city with MAX_DISEASE_COUNT cubes, then shuffle the
+        discards (with that card) back on top of the deck. (A board whose deck is empty
+        takes its last discard instead, where a Board would fail.)
+        Returns:
+            (len(boards),) number of outbreaks on each board
+        """
+        if not len(boards):
+            return np.zeros(0, np.int64)
+        self.level[boards] += 1
+        top = np.minimum(self.infection_top[boards], NUM_CITIES - 1)
+        cities = self.infection_cards[boards, NUM_CITIES - 1]
+        # move the bottom card to the top of the discard pile, then shuffle the whole pile
+        positions = np.arange(NUM_CITIES)[None, :]
+        positions = np.where(positions < top[:, None], positions,
+                             np.where(positions == top[:, None], NUM_CITIES - 1, positions - 1))
+        cards = np.take_along_axis(self.infection_cards[boards], positions, axis=1)
+        self.infection_cards[boards] = shuffle_segments(
+            cards, np.zeros(len(boards), np.int64), top + 1, self.rng)
+        self.infection_top[boards] = 0
+        return self.infect(boards, cities, MAX_DISEASE_COUNT)
+
+    def infect(self, boards: np.ndarray, cities: np.ndarray, amount: int) -> np.ndarray:
+        """
+        Infect one city on each of the given boards with its own color, resolving outbreak
+        chains.
+        Returns:
+            (len(boards),) number of outbreaks on each board
+        """
+        if not len(boards):
+            return np.zeros(0, np.int64)
+        colors = CITY_COLOR_ARRAY[cities]
+        outbreaks, placed = resolve_infections(
+            self.cubes, boards, cities, colors, np.full(len(boards), amount))
+        self.totals[boards, colors] += placed
+        return outbreaks
+
+    def record_outbreaks(self, boards: np.ndarray, outbreaks: np.ndarray) -> None:
+        """
+        Add outbreaks to the given boards' counts, ending the games that hit the limit
+        (where, like a Board, the count stops).
+        """
+        self.outbreaks[boards] = np.minimum(self.outbreaks[boards] + outbreaks, self.max_outbreak_count)
+        self.end_games(boards[self.outbreaks[boards] >= self.max_outbreak_count], TOO_MANY_OUTBREAKS)
+
+    def check_cubes(self, boards: np.ndarray) -> None:
+        """
+        End the games on the given boards that have placed more cubes of a color than there are.
+        """
+        over = self.totals[boards] > DISEASE_CUBE_LIMIT
+        for i in range(NUM_COLORS):
+            self.end_games(boards[over[:, i]], OUT_OF_CUBES + i)
+
+    def end_games(self, boards: np.ndarray, reason: int) -> None:
+        """
+        Mark the games on the given boards as over, unless they already were.
+        """
+        boards = boards[self.reason[boards] == PLAYING]
+        self.reason[boards] = reason
+
+    def get_reasons(self) -> Dict[str, int]:
+        """
+        How many games ended for each reason (and how many are still playing).
+        """
+        counts = np.bincount(self.reason, minlength=len(REASONS) + 1)
+        reasons = {REASONS[code]: int(counts[code]) for code in REASONS}
+        reasons["Still playing"] = int(counts[PLAYING])
+        return reasons
@@ -0,0 +1,66 @@
+from collections import deque
+from typing import Dict, Tuple
+from constants import *
+
+# Immutable map topology, built once from constants.py and shared by every board. Cities
+# and colors are referred to by index; adjacency is kept both as tuples and as bitmasks
+# (bit j of NEIGHBOR_MASKS[i] is set if city j is connected to city i), so "is b next to
+# a" is a shift and an and.
+
+CITY_NAMES: Tuple[str, ...] = tuple(CITY_LIST.keys())
+CITY_INDEX: Dict[str, int] = {name: i for i, name in enumerate(CITY_NAMES)}
+COLOR_INDEX: Dict[str, int] = {color: i for i, color in enumerate(COLORS)}
+NUM_CITIES = len(CITY_NAMES)
+NUM_COLORS = len(COLORS)
+
+# color index of each city
+CITY_COLORS: Tuple[int, ...] = tuple(
+    COLOR_INDEX[CITY_LIST[name]] for name in CITY_NAMES)
+# connected cities for each city, by name (in constants.py order) and by index
+NEIGHBOR_NAMES: Tuple[Tuple[str, ...], ...] = tuple(
+    tuple(CITY_CONNECTIONS[name]) for name in CITY_NAMES)
+NEIGHBORS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(CITY_INDEX[n] for n in names) for names in NEIGHBOR_NAMES)
+NEIGHBOR_MASKS: Tuple[int, ...] = tuple(
+    sum(1 << j for j in neighbors) for neighbors in NEIGHBORS)
+# bitmask of the cities of each color, in COLORS order
+COLOR_MASKS: Tuple[int, ...] = tuple(
+    sum(1 << i for i, c in enumerate(CITY_COLORS) if c == color) for color in range(NUM_COLORS))
+
+
+def get_distances(source: int) -> Tuple[int, ...]:
+    """
+    Fewest moves between adjacent cities it takes to get from the city at source to each
+    city, by breadth-first search. Connections are followed in the direction
+    CITY_CONNECTIONS lists them.
+    """
+    distances = [-1] * NUM_CITIES
+    distances[source] = 0
+    queue = deque([source])
+    while queue:
+        i = queue.popleft()
+        for j in NEIGHBORS[i]:
+            if distances[j] < 0:
+                distances[j] = distances[i] + 1
+                queue.append(j)
+    return tuple(distances)
+
+
+# DISTANCES[i][j] is the fewest moves between adjacent cities from city i to city j. Every
+# city can reach every other, so there are no gaps.
+DISTANCES: Tuple[Tuple[int, ...], ...] = tuple(get_distances(i) for i in range(NUM_CITIES))
+
+
+def popcount(mask: int) -> int:
+    """
+    Number of bits set in mask.
+    """
+    return bin(mask).count("1")
+
+
+def is_adjacent(from_index: int, to_index: int) -> bool:
+    """
+    Whether the city at to_index is connected to the city at from_index.
+    """
+    return bool(NEIGHBOR_MASKS[from_index] >> to_index & 1)
+
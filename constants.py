@@ -11,6 +11,8 @@ MAX_PLAYERS = 4
 MAX_OUTBREAK_COUNT = 8
 CURE_COUNT = 5
 MAX_HAND_COUNT = 7
+# why a game was lost to running out of cubes, filled in with the color
+OUT_OF_CUBES_REASON = "You ran out of disease cubes for the color {}"
 # Active-player-only generic actions
 ACTION = "action"
 MOVE_ADJACENT = "MOVE_ADJACENT"
@@ -27,6 +29,15 @@ ABILITY = "ability"
 DISCARD = "DISCARD"
 END_TURN = "END_TURN"
 
+# An ordered list of action/ability messages (e.g. a whole turn) applied all or nothing
+BATCH = "batch"
+
+# Ask for a full copy of the board instead of a patch
+RESYNC = "resync"
+# Ask for the static map topology, or say which version of it we already have
+TOPOLOGY = "topology"
+TOPOLOGY_VERSION = "topology_version"
+
 # City information
 STARTING_CITY = "Atlanta"
 STARTING_COLOR = BLUE
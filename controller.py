@@ -1,9 +1,14 @@
 import json
 import pickle
-from typing import List
-from board import Board, CityCard, City, Player
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Tuple
+from board import ACTIONS, DISPATCHERS, Board, Dispatcher, UndoRecord, get_coercer
+from delta import BoardTracker
+from encoder import BoardEncoder
+from store import GameStore, PickleGameStore
 from enums import ActionList, AbilityList
-from constants import ACTION, ABILITY
+from constants import ACTION, ABILITY, BATCH, RESYNC, TOPOLOGY, TOPOLOGY_VERSION
 from custom_exceptions import GameEndedError, InvalidOperationError
 
 
@@ -32,57 +37,73 @@ class Serializer:
             pickle.dump(board, f)
 
     @classmethod
-    def print_board(self, board: Board, error: bool = None, game_over: bool = False) -> str:
+    def print_board(self, board: Board, error: bool = None, game_over: bool = False, topology: bool = False) -> str:
         """
         Convenience method for turning a Board object into a JSON string
-        which we can then send to the clients.
+        which we can then send to the clients. Only the dynamic parts of the
+        board are included, along with the version of the static topology
+        they belong to. The topology itself is only added if asked for.
         """
-        return json.dumps({"board": board, "error": error, "game_over": game_over}, default=lambda x: x.__dict__)
+        payload = json.dumps({"board": BoardEncoder.encode_board(board), "error": error, "game_over": game_over,
+                              TOPOLOGY_VERSION: BoardEncoder.get_topology_version()}, separators=(",", ":"))
+        if not topology:
+            return payload
+        return '{},"{}":{}}}'.format(payload[:-1], TOPOLOGY, BoardEncoder.get_topology_json())
+
+    @classmethod
+    def print_delta(self, delta: dict, error: bool = None, game_over: bool = False) -> str:
+        """
+        Same as print_board, but for a BoardTracker patch or resync instead of the
+        whole board.
+        """
+        return json.dumps({"delta": delta, "error": error, "game_over": game_over}, separators=(",", ":"))
 
 
 class Controller:
-    def __init__(self):
+    def __init__(self, store: GameStore = None, deltas: bool = False):
         """
         Sets up mappings for message types to methods and arguments.
+        Args:
+            store(opt) - GameStore used to load and save boards. Defaults to pickling
+                every board to disk on each message.
+            deltas(opt) - if True, respond with versioned patches holding only what
+                changed since the last response, rather than the whole board.
+                Clients can send {"resync": true} to get a full copy again.
         """
-        self.action_mappings = {
-            ActionList.move_adjacent: Board.move_adjacent,
-            ActionList.move_direct_flight: Board.move_direct_flight,
-            ActionList.move_charter_flight: Board.move_charter_flight,
-            ActionList.move_shuttle_flight: Board.move_shuttle_flight,
-            ActionList.build_research_station: Board.build_research_station,
-            ActionList.treat_disease: Board.treat_disease,
-            ActionList.share_knowledge: Board.share_knowledge,
-            ActionList.discover_cure: Board.discover_cure,
-            AbilityList.discard: Board.discard,
-            AbilityList.end_turn: Board.move_to_next_player,
-        }
-
-        self.arg_mappings = {
-            ActionList.move_adjacent: {"to_city": City},
-            ActionList.move_direct_flight: {"city_card": CityCard},
-            ActionList.move_charter_flight: {"city_card": CityCard, "to_city": City},
-            ActionList.move_shuttle_flight: {"to_city": City},
-            ActionList.build_research_station: {"city_card": CityCard},
-            ActionList.treat_disease: {"color": str},
-            ActionList.share_knowledge: {"city_card": CityCard, "player_to": Player, "player_from": Player},
-            ActionList.discover_cure: {"city_cards": list([CityCard]), "color": str},
-            AbilityList.discard: {"city_cards": list(
-                [CityCard]), "player": Player},
-            AbilityList.end_turn: {},
-        }
+        self.store: GameStore = store if store is not None else PickleGameStore()
+        self.store.attach(self)
+        self.deltas = deltas
+        self.trackers: Dict[str, BoardTracker] = {}
+        # one lock per game, so messages for the same game are handled one at a time while
+        # other games carry on in parallel
+        self.locks: Dict[str, threading.Lock] = {}
+        self.locks_lock = threading.Lock()
+        # views of board.ACTIONS keyed by ActionList/AbilityList, where each action is defined
+        commands = {name: ActionList(name) if uses_action else AbilityList(name)
+                    for name, (_, _, uses_action) in ACTIONS.items()}
+        self.action_mappings = {commands[name]: getattr(Board, method) for name, (method, _, _) in ACTIONS.items()}
+        self.arg_mappings = {commands[name]: arg_types for name, (_, arg_types, _) in ACTIONS.items()}
+
+        # message type -> name -> Dispatcher, so abilities are looked up by their own names
+        self.dispatchers: Dict[str, Dict[str, Dispatcher]] = {ACTION: {}, ABILITY: {}}
+        for name, dispatcher in DISPATCHERS.items():
+            self.dispatchers[ACTION if dispatcher.uses_action else ABILITY][name] = dispatcher
 
     def init_board(self, game_id: str, player_ids: List[str], starting_city: str = None) -> str:
         """
         Create board object (which also does its own initialization). Serialize board, then return board
         object (to send to clients).
         """
-        if starting_city:
-            b = Board(player_ids, starting_city)
-        else:
-            b = Board(player_ids)
-        Serializer.save_board(b, game_id)
-        return Serializer.print_board(b)
+        with self.lock_game(game_id):
+            if starting_city:
+                b = Board(player_ids, starting_city)
+            else:
+                b = Board(player_ids)
+            self.store.save(game_id, b)
+            if self.deltas:
+                self.trackers[game_id] = BoardTracker()
+                return self.print_board(game_id, b)
+            return Serializer.print_board(b, topology=True)
 
     def handle_input(self, game_id, msg) -> str:
         """
@@ -94,49 +115,169 @@ class Controller:
                 of the player's turn)
             -miscellaneous (e.g. sending which cards to discard when a
                 player has too many in their hand)
+            -a batch of any of the above (e.g. a player's whole turn, planned
+                out in advance), which is applied all or nothing and then saved
+                and sent back once
 
+        Messages for the same game are handled one at a time, in whatever order they get
+        the game's lock (see lock_game), so two players acting at once can't overwrite each other's moves.
         Returns:
             str - JSON-dumped representation of the current board
         """
-        b = Serializer.load_board(game_id)
+        with self.lock_game(game_id):
+            b = self.store.load(game_id)
+            try:
+                msg = json.loads(msg)
+            except ValueError:
+                return self.print_board(game_id, b, True)
+            if not isinstance(msg, dict):
+                return self.print_board(game_id, b, True)
+            if self.deltas and msg.get(RESYNC):
+                return Serializer.print_delta(self.get_tracker(game_id).resync(b, msg.get(TOPOLOGY_VERSION)))
+            if not self.deltas and msg.get(TOPOLOGY):
+                return Serializer.print_board(b, topology=True)
+            if not (ACTION in msg or ABILITY in msg or BATCH in msg):
+                return self.print_board(game_id, b)
+            error, gameOver = self.apply_action(b, msg)
+            # failed actions are never persisted, so there's nothing to write back
+            if not error:
+                self.store.save(game_id, b, msg)
+            return self.print_board(game_id, b, error, gameOver)
+
+    def get_lock(self, game_id: str) -> threading.Lock:
+        """
+        Get the lock for the given game, creating it if nothing has locked it yet.
+        """
+        lock = self.locks.get(game_id)
+        if lock is None:
+            with self.locks_lock:
+                lock = self.locks.setdefault(game_id, threading.Lock())
+        return lock
+
+    def close(self) -> None:
+        """
+        Write out every game the store still has pending. Call once no more messages are
+        being handled.
+        """
+        self.store.close()
+
+    @contextmanager
+    def lock_game(self, game_id: str) -> Iterator[None]:
+        """
+        Hold the given game's lock. If the game was forgotten while we waited, its lock is
+        no longer the one other messages will take, so wait on the new one instead.
+        """
+        while True:
+            lock = self.get_lock(game_id)
+            with lock:
+                if self.locks.get(game_id) is lock:
+                    yield
+                    return
+
+    def run_if_idle(self, game_id: str, fn: Callable[[], None]) -> bool:
+        """
+        Call fn while holding the given game's lock, unless a message for that game holds
+        it already. Never waits, so stores can call this while holding their own lock.
+        Returns:
+            bool - True if fn was called
+        """
+        lock = self.get_lock(game_id)
+        if not lock.acquire(blocking=False):
+            return False
         try:
-            msg = json.loads(msg)
-        except ValueError:
-            return Serializer.print_board(b, True)
+            fn()
+        finally:
+            lock.release()
+        return True
+
+    def forget(self, game_id: str) -> None:
+        """
+        Drop the lock and BoardTracker for a game the store no longer keeps resident. The
+        next message for it starts afresh, and its clients get a resync.
+        """
+        with self.locks_lock:
+            self.locks.pop(game_id, None)
+            self.trackers.pop(game_id, None)
+
+    def get_tracker(self, game_id: str) -> BoardTracker:
+        """
+        Get the BoardTracker for the given game, creating one if this controller
+        hasn't sent anything for it yet.
+        """
+        if game_id not in self.trackers:
+            self.trackers[game_id] = BoardTracker()
+        return self.trackers[game_id]
+
+    def print_board(self, game_id: str, b: Board, error: bool = None, game_over: bool = False) -> str:
+        """
+        Build the response for the given game: the whole board, or a patch if this
+        controller sends deltas.
+        """
+        if not self.deltas:
+            return Serializer.print_board(b, error, game_over)
+        return Serializer.print_delta(self.get_tracker(game_id).patch(b), error, game_over)
+
+    def apply_action(self, b: Board, msg: dict) -> Tuple[bool, bool]:
+        """
+        Run one parsed action/ability message (or batch of them) against the given board.
+        A single message goes straight to its Dispatcher: actions check everything before
+        they change anything, so one that fails leaves the board as it was. Only batches
+        need UndoRecords, to take back the messages before the one that failed.
+        Returns:
+            (error, game_over) - error is True if the message was invalid or the
+                action failed, game_over is True if the action ended the game
+        """
+        if BATCH in msg:
+            return self.apply_batch(b, msg[BATCH])
         error = None
         gameOver = False
-        if ACTION in msg or ABILITY in msg:
-            try:
+        try:
+            cmd_type = ACTION if ACTION in msg else ABILITY
+            command = msg[cmd_type]
+            dispatcher = self.dispatchers[cmd_type][command["name"]]
+            if dispatcher.uses_action and not b.active_player.has_actions_left():
+                raise InvalidOperationError("No actions left.")
+            if not dispatcher(b, command.get("args", {})):
+                raise InvalidOperationError("Action failed.")
+            if dispatcher.uses_action:
+                b.dec_active_player_actions()
+                b.check_end_of_actions()
+        except GameEndedError:
+            gameOver = True
+        except (InvalidOperationError, ValueError, KeyError, TypeError):
+            error = True
+        return error, gameOver
+
+    def apply_batch(self, b: Board, msgs: List[dict]) -> Tuple[bool, bool]:
+        """
+        Run an ordered list of action/ability messages against the given board as one. If
+        any of them is invalid or fails, the ones before it are taken back and the board is
+        left as it was. If one ends the game, the rest are skipped.
+        Returns:
+            (error, game_over) - as for apply_action
+        """
+        records: List[UndoRecord] = []
+        try:
+            if not isinstance(msgs, list) or not msgs:
+                raise InvalidOperationError("Empty batch.")
+            for msg in msgs:
                 cmd_type = ACTION if ACTION in msg else ABILITY
-                cmd = ActionList(msg[cmd_type]["name"])
-                method = self.action_mappings[cmd]
-                arg_keys = self.arg_mappings[cmd]
-                args = [msg[cmd_type]["args"][key] for key in arg_keys.keys()]
-                success = self.validate_keys(b, args, list(
-                    arg_keys.values())) and method(b, *args)
-                if not success:
-                    raise InvalidOperationError("Action failed.")
-                if cmd_type == ACTION:
-                    b.dec_active_player_actions()
-                    b.check_end_of_actions()
-            except GameEndedError:
-                gameOver = True
-            except Exception as e:
-                error = True
-        Serializer.save_board(b, game_id)
-        return Serializer.print_board(b, error, gameOver)
+                command = msg[cmd_type]
+                if command["name"] not in self.dispatchers[cmd_type]:
+                    raise InvalidOperationError("Invalid {}.".format(cmd_type))
+                records.append(b.apply(command))
+                if records[-1].game_over:
+                    return None, True
+        except (InvalidOperationError, ValueError, KeyError, TypeError):
+            while records:
+                b.undo(records.pop())
+            return True, False
+        return None, False
 
     def validate_keys(self, board: Board, keys: List, types: List):
         try:
             for x in range(len(keys)):
-                if types[x] == Player:
-                    keys[x] = board.get_player(keys[x])
-                elif types[x] == City:
-                    keys[x] = board.get_city(keys[x])
-                elif isinstance(types[x], list):
-                    keys[x] = [types[x][0](element) for element in keys[x]]
-                else:
-                    keys[x] = types[x](keys[x])
-        except ValueError:
+                keys[x] = get_coercer(types[x])(board, keys[x])
+        except (ValueError, InvalidOperationError):
             return False
         return True
@@ -0,0 +1,147 @@
+from collections.abc import Mapping
+from typing import Dict, Iterator, List
+import numpy as np
+from constants import *
+from city_graph import *
+
+# Disease cubes live in integer arrays indexed [city, color] (see city_graph.py for the
+# index orders), or [board, city, color] for a batch of boards. Every query below reduces
+# over the city axis, so it works the same on one board's matrix or on a whole batch.
+
+CUBE_DTYPE = np.int8
+
+
+def new_cube_matrix(num_cities: int = NUM_CITIES) -> np.ndarray:
+    """
+    Zeroed (num_cities, NUM_COLORS) cube matrix for one board.
+    """
+    return np.zeros((num_cities, NUM_COLORS), CUBE_DTYPE)
+
+
+def cube_totals(cubes: np.ndarray) -> np.ndarray:
+    """
+    Cubes of each color on the board(s).
+    """
+    return cubes.sum(axis=-2)
+
+
+def cubes_remaining(cubes: np.ndarray) -> np.ndarray:
+    """
+    Cubes of each color still in the supply. Negative if the board(s) ran out.
+    """
+    return DISEASE_CUBE_LIMIT - cube_totals(cubes)
+
+
+def out_of_cubes(cubes: np.ndarray) -> np.ndarray:
+    """
+    Whether more cubes of any color have been placed than the supply holds.
+    """
+    return (cubes_remaining(cubes) < 0).any(axis=-1)
+
+
+def eradicable(cubes: np.ndarray, cured: np.ndarray) -> np.ndarray:
+    """
+    Which colors are cured and have no cubes left on the board(s).
+    Args:
+        cured - bool array of cured colors, in COLORS order
+    """
+    return cured & (cube_totals(cubes) == 0)
+
+
+def saturated(cubes: np.ndarray) -> np.ndarray:
+    """
+    Mask of (city, color) entries at MAX_DISEASE_COUNT, i.e. that outbreak on the next cube.
+    """
+    return cubes == MAX_DISEASE_COUNT
+
+
+def saturated_cities(cubes: np.ndarray, color: str) -> List[str]:
+    """
+    Names of the cities on one board holding MAX_DISEASE_COUNT cubes of the given color.
+    """
+    return [CITY_NAMES[i] for i in np.flatnonzero(saturated(cubes[:, COLOR_INDEX[color]]))]
+
+
+class CubeCounts(Mapping):
+    """
+    Dict-like view of one city's row in a cube matrix, keyed by color name. The board owns
+    the matrix; cities only hold these views into it.
+    """
+    __slots__ = ("cubes", "index")
+
+    def __init__(self, cubes: np.ndarray, index: int = 0):
+        self.cubes = cubes
+        self.index = index
+
+    def __getitem__(self, color: str) -> int:
+        return self.cubes.item(self.index, COLOR_INDEX[color])
+
+    def __setitem__(self, color: str, count: int) -> None:
+        self.cubes[self.index, COLOR_INDEX[color]] = count
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(COLORS)
+
+    def __len__(self) -> int:
+        return NUM_COLORS
+
+    def values(self) -> List[int]:
+        return self.cubes[self.index].tolist()
+
+    def __reduce__(self):
+        # the matrix is shared between cities, so pickle keeps just one copy of it
+        return (CubeCounts, (self.cubes, self.index))
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class CubeBatch:
+    """
+    Cube matrices for many boards in one (boards, cities, colors) array, so simulation
+    workloads can query every game at once. Pass get_cubes(i) to a Board to have it keep
+    its cubes in the batch.
+    """
+
+    def __init__(self, size: int):
+        self.cubes: np.ndarray = np.zeros(
+            (size, NUM_CITIES, NUM_COLORS), CUBE_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self.cubes)
+
+    def get_cubes(self, i: int) -> np.ndarray:
+        """
+        The cube matrix for the i-th board (a view into the batch).
+        """
+        return self.cubes[i]
+
+    def get_totals(self) -> np.ndarray:
+        """
+        (boards, colors) cubes on each board.
+        """
+        return cube_totals(self.cubes)
+
+    def get_remaining(self) -> np.ndarray:
+        """
+        (boards, colors) cubes left in each board's supply.
+        """
+        return cubes_remaining(self.cubes)
+
+    def get_out_of_cubes(self) -> np.ndarray:
+        """
+        (boards,) whether each board has run out of some color.
+        """
+        return out_of_cubes(self.cubes)
+
+    def get_saturated_counts(self) -> np.ndarray:
+        """
+        (boards, colors) number of cities at MAX_DISEASE_COUNT on each board.
+        """
+        return saturated(self.cubes).sum(axis=-2)
+
+    def get_remaining_dicts(self) -> List[Dict[str, int]]:
+        """
+        Cubes left per board, in the same shape as DiseaseManager.diseases_remaining.
+        """
+        return [dict(zip(COLORS, row)) for row in self.get_remaining().tolist()]
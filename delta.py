@@ -0,0 +1,161 @@
+from typing import Any, Dict, List, Tuple
+import numpy as np
+from board import Board, Player
+from encoder import BoardEncoder
+
+# marker key used in patches for a list splice: [start, delete_count, [inserted items]]
+SPLICE = "$splice"
+# card piles encoded under card_manager
+PILES = ("city_card_deck", "city_card_discard", "infection_card_deck", "infection_card_discard")
+
+
+def diff_lists(old: List, new: List) -> Any:
+    """
+    Describe how to turn old into new as a single splice. Decks only ever change at
+    the top, so trimming the common prefix and suffix keeps these tiny.
+    """
+    start = 0
+    limit = min(len(old), len(new))
+    while start < limit and old[start] == new[start]:
+        start += 1
+    end_old, end_new = len(old), len(new)
+    while end_old > start and end_new > start and old[end_old - 1] == new[end_new - 1]:
+        end_old -= 1
+        end_new -= 1
+    return {SPLICE: [start, end_old - start, new[start:end_new]]}
+
+
+def diff_states(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Nested dict holding only the fields that differ between the two states. Lists
+    are described with splices, anything else is replaced outright.
+    """
+    changes = {}
+    for key, value in new.items():
+        prior = old.get(key)
+        if prior == value:
+            continue
+        if isinstance(value, dict) and isinstance(prior, dict):
+            changes[key] = diff_states(prior, value)
+        elif isinstance(value, list) and isinstance(prior, list):
+            changes[key] = diff_lists(prior, value)
+        else:
+            changes[key] = value
+    return changes
+
+
+def apply_patch(state: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Apply changes produced by diff_states to a state dict (in place). This is what
+    clients do with each patch; it's here mostly so the format can be tested.
+    """
+    for key, value in changes.items():
+        if isinstance(value, dict) and SPLICE in value:
+            start, delete, items = value[SPLICE]
+            state[key][start:start + delete] = items
+        elif isinstance(value, dict) and isinstance(state.get(key), dict):
+            apply_patch(state[key], value)
+        else:
+            state[key] = value
+    return state
+
+
+class BoardTracker:
+    """
+    Remembers the last state sent to clients for one game so each response only has to
+    carry what changed. Every patch moves the version on by one; a client whose version
+    doesn't match a patch's base has missed something and should ask for a resync.
+
+    Alongside the encoded state it keeps a cheap copy of what that state was encoded from
+    (the cube matrix, research stations, each player's position and hand, the card piles),
+    so a patch only re-encodes the cities, players and piles that actually changed.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.state: Dict[str, Any] = None
+        self.cubes: np.ndarray = None
+        self.stations: Dict[str, bool] = {}
+        self.players: Dict[str, Tuple] = {}
+        self.piles: Dict[str, List] = {}
+
+    def resync(self, board: Board, topology_version: str = None) -> Dict[str, Any]:
+        """
+        Full copy of the board, to (re)initialise a client. The static topology is left
+        out if the client says it already has the current version.
+        """
+        self.state = BoardEncoder.encode_board(board)
+        self.remember(board)
+        resync = {"version": self.version,
+                  "topology_version": BoardEncoder.get_topology_version(),
+                  "state": self.state}
+        if topology_version != resync["topology_version"]:
+            resync["topology"] = BoardEncoder.get_topology()
+        return resync
+
+    def patch(self, board: Board) -> Dict[str, Any]:
+        """
+        Changes since the last patch or resync. The version only moves on if something
+        actually changed.
+        """
+        if self.state is None:
+            return self.resync(board)
+        state = self.encode_changed(board)
+        changes = diff_states(self.state, state)
+        base = self.version
+        if changes:
+            self.version += 1
+            self.state = state
+        return {"version": self.version, "base": base, "changes": changes}
+
+    def remember(self, board: Board) -> None:
+        """
+        Keep what the current state was encoded from, for encode_changed to compare against.
+        """
+        self.cubes = board.cubes.copy()
+        self.stations = {name: city.has_research_station for name, city in board.cities.items()}
+        self.players = {pid: self.get_player_key(player) for pid, player in board.players.items()}
+        self.piles = {pile: list(getattr(board.card_manager, pile)) for pile in PILES}
+
+    @staticmethod
+    def get_player_key(player: Player) -> Tuple:
+        """
+        Everything encode_player reads from a player. A hand iterates in city index order,
+        so its mask pins down the encoded card list.
+        """
+        return player.current_city.name, player.city_cards.mask, player.is_active, player.actions_left
+
+    def encode_changed(self, board: Board) -> Dict[str, Any]:
+        """
+        Same as BoardEncoder.encode_board, but the cities, players and piles that haven't
+        changed since the last state are reused from it rather than encoded again. Only
+        new dicts are built, so the last state is left as it was for diffing against.
+        """
+        old = self.state
+        changed_rows = set(np.flatnonzero((board.cubes != self.cubes).any(axis=1)).tolist())
+        self.cubes = board.cubes.copy()
+        cities = dict(old["cities"])
+        for name, city in board.cities.items():
+            if city.index in changed_rows or city.has_research_station != self.stations.get(name):
+                cities[name] = BoardEncoder.encode_city(city)
+                self.stations[name] = city.has_research_station
+        players = dict(old["players"])
+        for pid, player in board.players.items():
+            key = self.get_player_key(player)
+            if key != self.players.get(pid):
+                players[pid] = BoardEncoder.encode_player(player)
+                self.players[pid] = key
+        card_manager = dict(old["card_manager"])
+        for pile in PILES:
+            cards = getattr(board.card_manager, pile)
+            copy = list(cards)
+            if copy != self.piles.get(pile):
+                card_manager[pile] = BoardEncoder.encode_cards(copy)
+                self.piles[pile] = copy
+        return {"player_ids": list(board.player_ids),
+                "active_player": board.active_player.player_id,
+                "cities": cities,
+                "players": players,
+                "card_manager": card_manager,
+                "infection_manager": BoardEncoder.encode_infection_manager(board.infection_manager),
+                "disease_manager": BoardEncoder.encode_disease_manager(board.disease_manager)}
@@ -0,0 +1,103 @@
+import json
+import hashlib
+from typing import Any, Dict, List
+from board import Board, City, Player, CardManager, InfectionManager, DiseaseManager, EpidemicCard
+from constants import *
+
+
+class BoardEncoder:
+    """
+    Explicit JSON schema for a Board. The static map topology (city colors, connections,
+    infection rates) is encoded once per process and identified by a version hash, so it
+    only has to be sent to a client once; everything else is dynamic and encoded per
+    response.
+    """
+    _topology: Dict[str, Any] = None
+    _topology_json: str = None
+    _topology_version: str = None
+
+    @classmethod
+    def get_topology(self) -> Dict[str, Any]:
+        """
+        Everything about the board that's the same for every game.
+        """
+        if self._topology is None:
+            self._topology = {
+                "cities": {name: {"color": color, "connected_cities": CITY_CONNECTIONS[name]}
+                           for name, color in CITY_LIST.items()},
+                "colors": COLORS,
+                "infection_rates": InfectionManager().rates,
+            }
+        return self._topology
+
+    @classmethod
+    def get_topology_json(self) -> str:
+        """
+        Cached JSON string for get_topology().
+        """
+        if self._topology_json is None:
+            self._topology_json = json.dumps(
+                self.get_topology(), sort_keys=True, separators=(",", ":"))
+        return self._topology_json
+
+    @classmethod
+    def get_topology_version(self) -> str:
+        """
+        Short content hash of the topology. Clients can cache the topology under this key
+        and only ask for it again when it changes.
+        """
+        if self._topology_version is None:
+            self._topology_version = hashlib.sha1(
+                self.get_topology_json().encode()).hexdigest()[:12]
+        return self._topology_version
+
+    @classmethod
+    def encode_cards(self, cards: List) -> List[str]:
+        """
+        Card names for a list of cards. Epidemic cards don't have names, so they show up as None.
+        """
+        return [None if isinstance(c, EpidemicCard) else c.name for c in cards]
+
+    @classmethod
+    def encode_city(self, city: City) -> Dict[str, Any]:
+        return {"disease_count": dict(city.disease_count),
+                "has_research_station": city.has_research_station}
+
+    @classmethod
+    def encode_player(self, player: Player) -> Dict[str, Any]:
+        return {"current_city": player.current_city.name,
+                "city_cards": self.encode_cards(player.city_cards),
+                "is_active": player.is_active,
+                "actions_left": player.actions_left}
+
+    @classmethod
+    def encode_card_manager(self, card_manager: CardManager) -> Dict[str, Any]:
+        return {"city_card_deck": self.encode_cards(card_manager.city_card_deck),
+                "city_card_discard": self.encode_cards(card_manager.city_card_discard),
+                "infection_card_deck": self.encode_cards(card_manager.infection_card_deck),
+                "infection_card_discard": self.encode_cards(card_manager.infection_card_discard)}
+
+    @classmethod
+    def encode_infection_manager(self, infection_manager: InfectionManager) -> Dict[str, Any]:
+        return {"level": infection_manager.level,
+                "rate": infection_manager.rate,
+                "outbreak_count": infection_manager.outbreak_count}
+
+    @classmethod
+    def encode_disease_manager(self, disease_manager: DiseaseManager) -> Dict[str, Any]:
+        return {"diseases_cured": dict(disease_manager.diseases_cured),
+                "diseases_eradicated": dict(disease_manager.diseases_eradicated),
+                "diseases_remaining": dict(disease_manager.diseases_remaining)}
+
+    @classmethod
+    def encode_board(self, board: Board) -> Dict[str, Any]:
+        """
+        Plain-dict copy of everything about the board that can change during a game.
+        """
+        return {"player_ids": list(board.player_ids),
+                "active_player": board.active_player.player_id,
+                "cities": {name: self.encode_city(city) for name, city in board.cities.items()},
+                "players": {pid: self.encode_player(p) for pid, p in board.players.items()},
+                "card_manager": self.encode_card_manager(board.card_manager),
+                "infection_manager": self.encode_infection_manager(board.infection_manager),
+                "disease_manager": self.encode_disease_manager(board.disease_manager)}
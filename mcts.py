@@ -0,0 +1,232 @@
+import json
+import math
+import time
+import random
+from typing import Any, Dict, List, Optional
+from board import Board, UndoRecord
+from city_graph import NUM_COLORS
+from enums import ActionList
+from simulation import Policy, Move
+from constants import *
+
+# reward for a search path that wins or loses the game outright
+WIN_VALUE = 1.0
+LOSS_VALUE = 0.0
+
+
+class Node:
+    """
+    One state in the search tree, reached by taking `action` from its parent.
+    """
+    __slots__ = ("action", "parent", "children", "untried", "visits", "value")
+
+    def __init__(self, action: Dict[str, Any] = None, parent: 'Node' = None):
+        self.action = action
+        self.parent = parent
+        self.children: List[Node] = []
+        # legal actions not yet expanded into children; filled in on the first visit
+        self.untried: List[Dict[str, Any]] = None
+        self.visits = 0
+        self.value = 0.0
+
+    def best_child(self, exploration: float) -> 'Node':
+        """
+        Child with the highest UCB1 score.
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda c: c.value / c.visits +
+                   exploration * math.sqrt(log_visits / c.visits))
+
+
+class SearchStats:
+    """
+    How much searching an MCTSPolicy has done, so engine speed can be tracked over time.
+    """
+    __slots__ = ("searches", "iterations", "seconds")
+
+    def __init__(self):
+        self.searches = 0
+        self.iterations = 0
+        self.seconds = 0.0
+
+    def iterations_per_second(self) -> float:
+        return self.iterations / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return "{} iterations over {} searches in {:.2f}s ({:.0f} iterations/sec)".format(
+            self.iterations, self.searches, self.seconds, self.iterations_per_second())
+
+
+class MCTSPolicy(Policy):
+    """
+    Picks actions with Monte Carlo Tree Search (UCT). Each search runs on one clone of the
+    board with its draw piles shuffled, so the bot can't see the real order of the cards,
+    and walks the tree with Board.apply/undo rather than copying the board per node.
+    Rollouts play a few steps of rollout_action and then score the board with evaluate.
+    Discards are left to choose_discards, as for every other policy.
+    """
+
+    def __init__(self, iterations: int = 200, seconds: float = None, rollout_depth: int = 8,
+                 exploration: float = 0.03):
+        """
+        Args:
+            iterations(opt) - most search iterations per move
+            seconds(opt) - most time to search per move. The search stops at whichever
+                budget runs out first; at least one iteration is always run.
+            rollout_depth(opt) - random actions played out from each new node
+            exploration(opt) - UCB1 exploration constant. Evaluations of nearby boards differ
+                by a few hundredths, so anything near 1 would drown them out.
+        """
+        self.iterations = iterations
+        self.seconds = seconds
+        self.rollout_depth = rollout_depth
+        self.exploration = exploration
+        self.stats = SearchStats()
+
+    def choose_action(self, board: Board, rng: random.Random) -> Move:
+        action = self.search(board, rng)
+        if action is None:
+            return None
+        return ActionList(action["name"]), tuple(board.get_action_args(action))
+
+    def choose_message(self, board: Board, rng: random.Random) -> Optional[str]:
+        """
+        Pick the active player's next action as a message for Controller.handle_input, so
+        a bot can take a seat in a game the same way a client does.
+        """
+        action = self.search(board, rng)
+        if action is None:
+            return None
+        return json.dumps({ACTION: action})
+
+    def search(self, board: Board, rng: random.Random) -> Optional[Dict[str, Any]]:
+        """
+        Find the best action for the active player, in the {"name", "args"} shape the
+        Controller takes in messages (i.e. as an ACTION).
+        Returns:
+            dict - the action, or None if there's nothing to do
+        """
+        start = time.perf_counter()
+        deadline = None if self.seconds is None else start + self.seconds
+        state = self.determinize(board, rng)
+        root = Node()
+        iterations = 0
+        while iterations < self.iterations and (deadline is None or time.perf_counter() < deadline or not iterations):
+            self.iterate(state, root, rng)
+            iterations += 1
+        self.stats.searches += 1
+        self.stats.iterations += iterations
+        self.stats.seconds += time.perf_counter() - start
+        if not root.children:
+            return None
+        return max(root.children, key=lambda c: c.visits).action
+
+    def determinize(self, board: Board, rng: random.Random) -> Board:
+        """
+        Copy of the board to search on, with what's unseen in the piles shuffled by a fresh
+        RNG: the city cards, and the infection cards within each run that was shuffled together.
+        """
+        state = board.clone()
+        state.rng.seed(rng.getrandbits(64))
+        cards = state.card_manager
+        state.rng.shuffle(cards.city_card_deck)
+        segments = cards.get_infection_segments()
+        for segment in segments:
+            state.rng.shuffle(segment)
+        cards.infection_card_deck = [card for segment in segments for card in segment]
+        return state
+
+    def iterate(self, state: Board, root: Node, rng: random.Random) -> None:
+        """
+        One round of selection, expansion, rollout and backpropagation. The board is put
+        back the way it was before returning.
+        """
+        records: List[UndoRecord] = []
+        node = root
+        value = None
+        try:
+            # selection: follow UCB1 down through fully expanded nodes
+            while True:
+                if node.untried is None:
+                    node.untried = self.get_actions(state)
+                if node.untried or not node.children:
+                    break
+                node = node.best_child(self.exploration)
+                value = self.step(state, node.action, records)
+                if value is not None:
+                    break
+            # expansion
+            if value is None and node.untried:
+                action = node.untried.pop(rng.randrange(len(node.untried)))
+                child = Node(action, node)
+                node.children.append(child)
+                node = child
+                value = self.step(state, action, records)
+            # rollout
+            depth = 0
+            while value is None and depth < self.rollout_depth:
+                actions = self.get_actions(state)
+                if not actions:
+                    break
+                value = self.step(state, self.rollout_action(actions, rng), records)
+                depth += 1
+            if value is None:
+                value = self.evaluate(state)
+        finally:
+            while records:
+                state.undo(records.pop())
+        # backpropagation
+        while node is not None:
+            node.visits += 1
+            node.value += value
+            node = node.parent
+
+    def step(self, state: Board, action: Dict[str, Any], records: List[UndoRecord]) -> Optional[float]:
+        """
+        Apply an action during the search.
+        Returns:
+            float - the final value if this ended the game, otherwise None
+        """
+        record = state.apply(action)
+        records.append(record)
+        if record.game_over:
+            return LOSS_VALUE
+        if all(state.disease_manager.diseases_cured.values()):
+            return WIN_VALUE
+        return None
+
+    def rollout_action(self, actions: List[Dict[str, Any]], rng: random.Random) -> Dict[str, Any]:
+        """
+        Pick a rollout action: a cure whenever one is on offer, otherwise a random kind of
+        action and then a random action of that kind, so that the dozens of charter
+        flights a card opens up don't crowd out everything else.
+        """
+        by_name: Dict[str, List[Dict[str, Any]]] = {}
+        for action in actions:
+            by_name.setdefault(action["name"], []).append(action)
+        if DISCOVER_CURE in by_name:
+            return by_name[DISCOVER_CURE][0]
+        return rng.choice(by_name[rng.choice(list(by_name))])
+
+    def get_actions(self, state: Board) -> List[Dict[str, Any]]:
+        return [a for a in state.legal_actions() if a["name"] != DISCARD]
+
+    def evaluate(self, state: Board) -> float:
+        """
+        Score a board that's still in play, between LOSS_VALUE and WIN_VALUE: mostly cures,
+        then cards held toward each cure, then outbreaks, disease cubes and cities on the
+        brink of an outbreak held back.
+        """
+        diseases = state.disease_manager
+        infection = state.infection_manager
+        cured = diseases.diseases_cured
+        cures = sum(cured.values()) / NUM_COLORS
+        # the best hand for each color, so spending a card a cure needs costs something
+        progress = sum(CURE_COUNT if cured[color] else
+                       min(max(player.city_cards.count_color(color) for player in state.players.values()),
+                           CURE_COUNT)
+                       for color in COLORS) / (CURE_COUNT * NUM_COLORS)
+        cubes = sum(diseases.diseases_remaining.values()) / (DISEASE_CUBE_LIMIT * NUM_COLORS)
+        outbreaks = 1 - infection.outbreak_count / infection.max_outbreak_count
+        full = 1 - int((state.cubes >= MAX_DISEASE_COUNT).sum()) / len(state.cities)
+        return 0.4 * cures + 0.2 * progress + 0.1 * cubes + 0.2 * outbreaks + 0.1 * full
@@ -0,0 +1,405 @@
+from functools import lru_cache
+from math import comb
+from typing import Dict, List, Tuple
+from board import Board, InfectionManager
+from city_graph import *
+from constants import *
+
+# Works out, from what the players can see, the chance of each city being infected or
+# outbreaking at the end of the current turn. What's public is: how many city cards are
+# left and how many epidemics are among them (each epidemic drawn raised the infection
+# level), the infection discard pile, and which infection cards make up each run of the
+# infection deck that was shuffled together (CardManager.infection_segments). Every order
+# within a run is equally likely, so how many cards come off each run is fixed and the
+# chance of drawing or missing given cards is hypergeometric.
+
+
+@lru_cache(maxsize=None)
+def draw_probability(size: int, required: int, excluded: int, drawn: int) -> float:
+    """
+    Chance that drawing `drawn` cards from a shuffled run of `size` takes all of `required`
+    given cards and none of `excluded` others.
+    """
+    if required > drawn or excluded > size - drawn:
+        return 0.0
+    return comb(size - required - excluded, drawn - required) / comb(size, drawn)
+
+
+@lru_cache(maxsize=None)
+def epidemic_probability(cards: int, epidemics: int, count: int) -> float:
+    """
+    Chance of `count` epidemics among the two city cards drawn from `cards`, `epidemics` of
+    which are epidemics, with every order of the deck equally likely.
+    """
+    if cards < 2:
+        return 0.0
+    return comb(epidemics, count) * comb(cards - epidemics, 2 - count) / comb(cards, 2)
+
+
+def get_rate(level: int) -> int:
+    return InfectionManager.rates[min(level, len(InfectionManager.rates))]
+
+
+def spread(counts: List[int], index: int, cubes: int = 1) -> 'Chain':
+    """
+    What adding cubes to one city does to a single color's counts, following the same rules
+    as OutbreakResolver, without touching the counts.
+    """
+    after = counts[:]
+    outbroken = 0
+    touched = 1 << index
+    placed = min(cubes, MAX_DISEASE_COUNT - after[index])
+    after[index] += placed
+    queue = []
+    if placed < cubes:
+        outbroken = touched
+        queue.extend(NEIGHBORS[index])
+    # every cube past the first city is a single one from an outbreaking neighbor; the
+    # queue grows as it's walked
+    for i in queue:
+        if outbroken >> i & 1:
+            continue
+        touched |= 1 << i
+        if after[i] < MAX_DISEASE_COUNT:
+            after[i] += 1
+        else:
+            outbroken |= 1 << i
+            queue.extend(NEIGHBORS[i])
+    added = {}
+    mask = touched
+    while mask:
+        low = mask & -mask
+        i = low.bit_length() - 1
+        if after[i] != counts[i]:
+            added[i] = after[i] - counts[i]
+        mask ^= low
+    return Chain(outbroken, added, touched)
+
+
+class Chain:
+    """
+    The outcome of one infection or epidemic on a single color's cube counts.
+    """
+    __slots__ = ("outbroken", "added", "added_mask", "touched")
+
+    def __init__(self, outbroken: int, added: Dict[int, int], touched: int):
+        # bitmask of the cities that outbreak
+        self.outbroken = outbroken
+        # {index: cubes} placed on each city, and which cities those are as a bitmask
+        self.added = added
+        self.added_mask = sum(1 << i for i in added)
+        # bitmask of every city a cube was headed for; the outcome only depends on the
+        # counts of these cities
+        self.touched = touched
+
+    def apply(self, counts: List[int]) -> List[int]:
+        """
+        Copy of the counts with this chain's cubes added.
+        """
+        counts = counts[:]
+        for index, cubes in self.added.items():
+            counts[index] += cubes
+        return counts
+
+
+class ChainCache:
+    """
+    Infection chains on one color's cube counts. A cache made for counts that an epidemic
+    changed (in the cities of `changed`) falls back on its parent's chains where they
+    never touched those cities, so scenarios share most of their work.
+    """
+    __slots__ = ("counts", "parent", "changed", "chains")
+
+    def __init__(self, counts: List[int], parent: 'ChainCache' = None, changed: int = 0):
+        self.counts = counts
+        self.parent = parent
+        self.changed = changed
+        # by (cubes, cards...)
+        self.chains: Dict[Tuple[int, ...], Chain] = {}
+
+    def get(self, cards: Tuple[int, ...], cubes: int = 1) -> Chain:
+        """
+        Chain set off by infecting the given cities one after another: the first with the
+        given number of cubes, the rest with one each.
+        Returns:
+            Chain - outbreaks of the last city's chain, with the cubes added and cities
+                touched by the whole sequence
+        """
+        key = (cubes,) + cards
+        cache = self
+        changed = 0
+        while cache is not None:
+            chain = cache.chains.get(key)
+            if chain is not None and not chain.touched & changed:
+                break
+            changed |= cache.changed
+            cache = cache.parent
+        else:
+            if len(cards) == 1:
+                chain = spread(self.counts, cards[0], cubes)
+            else:
+                first = self.get(cards[:-1], cubes)
+                chain = spread(first.apply(self.counts), cards[-1])
+                chain.touched |= first.touched
+                for index, added in first.added.items():
+                    chain.added[index] = chain.added.get(index, 0) + added
+                chain.added_mask |= first.added_mask
+            # kept as far up as it holds, so other scenarios can find it
+            cache = self
+            while cache.parent is not None and not chain.touched & cache.changed:
+                cache = cache.parent
+        cache.chains[key] = chain
+        return chain
+
+
+class RiskReport:
+    """
+    Chances of what happens at the end of the current turn.
+    """
+    __slots__ = ("epidemic", "infection", "outbreak")
+
+    def __init__(self):
+        # chance of at least one epidemic
+        self.epidemic = 0.0
+        # chance of each city's infection card coming up, as an infection or an epidemic
+        self.infection: Dict[str, float] = dict.fromkeys(CITY_NAMES, 0.0)
+        # chance of each city outbreaking
+        self.outbreak: Dict[str, float] = dict.fromkeys(CITY_NAMES, 0.0)
+
+    def __str__(self):
+        likely = sorted(self.outbreak.items(), key=lambda item: -item[1])[:3]
+        return "{:.1%} chance of an epidemic; most likely outbreaks: {}".format(
+            self.epidemic, ", ".join("{} {:.1%}".format(name, p) for name, p in likely))
+
+
+class RiskEstimator:
+    """
+    Chances, over every way the unseen cards could lie, of what the end of the turn brings.
+    The epidemic and infection chances are exact: epidemics are followed card by card
+    (which city is on the bottom, the outbreaks it sets off, and the discards shuffled back
+    on top), then the infection cards drawn after them. Outbreaks from the infection cards
+    count any one card, or any two in the order they're drawn, that set one off between
+    them. An outbreak needing three or more of the turn's cards is missed, and when more
+    than two are drawn, overlapping pairs are counted more than once, and after two
+    epidemics in one turn the infection cards are checked against the board as it was
+    after the first (see add_double_epidemic), so the outbreak chances are exact for two
+    infection cards and close otherwise.
+    """
+
+    @classmethod
+    def estimate(self, board: Board) -> RiskReport:
+        """
+        Returns:
+            RiskReport - chances for the end of the current player's turn
+        """
+        report = RiskReport()
+        cards = board.card_manager
+        level = board.infection_manager.level
+        city_cards = len(cards.city_card_deck)
+        epidemics = max(cards.number_of_epidemic_cards - (level - 1), 0)
+        segments = [[card.index for card in segment] for segment in cards.get_infection_segments()]
+        discard = [card.index for card in cards.infection_card_discard]
+        caches = [ChainCache(counts) for counts in board.cubes.T.tolist()]
+        infection = [0.0] * NUM_CITIES
+        outbreak = [0.0] * NUM_CITIES
+        # get_draw_risk results, since one epidemic and two often leave the same draws
+        risks: Dict[tuple, tuple] = {}
+        none, one, two = (epidemic_probability(city_cards, epidemics, count) for count in range(3))
+        report.epidemic = one + two
+        if none:
+            for scenario in self.get_scenarios(none, 0, segments, discard, caches):
+                self.add_scenario(scenario, get_rate(level), infection, outbreak, risks)
+        if one or two:
+            # both start from the same first epidemic
+            for weight, *scenario in self.get_scenarios(1.0, 1, segments, discard, caches):
+                if one:
+                    self.add_scenario((weight * one, *scenario), get_rate(level + 1), infection, outbreak, risks)
+                if two:
+                    self.add_double_epidemic((weight * two, *scenario), get_rate(level + 2), infection, outbreak,
+                                             risks)
+        report.infection = dict(zip(CITY_NAMES, infection))
+        report.outbreak = dict(zip(CITY_NAMES, (min(p, 1.0) for p in outbreak)))
+        return report
+
+    @classmethod
+    def get_scenarios(self, weight: float, epidemics: int, segments: List[List[int]], discard: List[int],
+                      caches: List[ChainCache], bottom: Tuple[int, ...] = (), outbroken: int = 0):
+        """
+        Every way the given number of epidemics can go, one bottom card at a time.
+        Yields:
+            (weight, segments, discard, chain caches by color, bottom cards, epidemic outbreaks mask)
+        """
+        if not epidemics:
+            yield weight, segments, discard, caches, bottom, outbroken
+            return
+        if not segments:
+            # nothing to draw from the bottom; a Board would fail here
+            return
+        last = segments[-1]
+        for i, card in enumerate(last):
+            color = CITY_COLORS[card]
+            cache = caches[color]
+            chain = cache.get((card,), MAX_DISEASE_COUNT)
+            after = caches[:]
+            after[color] = ChainCache(chain.apply(cache.counts), cache, chain.added_mask)
+            rest = segments[:-1] + ([last[:i] + last[i + 1:]] if len(last) > 1 else [])
+            # the discards and the bottom card are shuffled together back on top
+            yield from self.get_scenarios(weight / len(last), epidemics - 1, [discard + [card]] + rest, [],
+                                          after, bottom + (card,), outbroken | chain.outbroken)
+
+    @classmethod
+    def add_double_epidemic(self, scenario: tuple, rate: int, infection: List[float],
+                            outbreak: List[float], risks: Dict[tuple, tuple]) -> None:
+        """
+        Add the second of two epidemics, after the first went as in the given scenario. With
+        no discards left to shuffle in, the second bottom card is the only card on top, so
+        it's drawn first for sure and the rest of the draws come off the same runs whichever
+        card it was; rather than a scenario for each, it's mixed over. Those draws are
+        checked against the board as the first epidemic left it.
+        """
+        weight, segments, discard, caches, bottom, outbroken = scenario
+        last = segments[-1]
+        draws = []
+        left = rate - 1
+        for segment in segments[:-1]:
+            drawn = min(left, len(segment))
+            if drawn:
+                draws.append((segment, drawn))
+            left -= drawn
+        if left:
+            # the draws reach the run the second bottom card came from, so it matters which it was
+            for second in self.get_scenarios(weight, 1, segments, discard, caches, bottom, outbroken):
+                self.add_scenario(second, rate, infection, outbreak, risks)
+            return
+        for card in bottom:
+            infection[card] += weight
+        for segment, drawn in draws:
+            chance = weight * drawn / len(segment)
+            for card in segment:
+                if card not in bottom:
+                    infection[card] += chance
+        chance = weight / len(last)
+        # how likely each city is to outbreak from the epidemics and the second bottom card alone
+        certain = [0.0] * NUM_CITIES
+        for card in last:
+            infection[card] += chance
+            cache = caches[CITY_COLORS[card]]
+            mask = outbroken | cache.get((card,), MAX_DISEASE_COUNT).outbroken | \
+                cache.get((card, card), MAX_DISEASE_COUNT).outbroken
+            while mask:
+                low = mask & -mask
+                certain[low.bit_length() - 1] += chance
+                mask ^= low
+        for city, chance in enumerate(certain):
+            outbreak[city] += chance
+        for city, chance in self.get_draw_risk(draws, caches, risks).items():
+            outbreak[city] += (weight - certain[city]) * chance
+
+    @classmethod
+    def add_scenario(self, scenario: tuple, rate: int, infection: List[float], outbreak: List[float],
+                     risks: Dict[tuple, tuple]) -> None:
+        """
+        Add one way the epidemics could go, and the infection cards drawn after it, to the
+        running infection and outbreak chances.
+        """
+        weight, segments, discard, caches, bottom, outbroken = scenario
+        certain = set(bottom)
+        left = rate
+        # a run of one card on top is drawn first for sure, so it's played straight onto the board
+        while left and segments and len(segments[0]) == 1:
+            card = segments[0][0]
+            color = CITY_COLORS[card]
+            chain = caches[color].get((card,))
+            caches = caches[:]
+            caches[color] = ChainCache(chain.apply(caches[color].counts), caches[color], chain.added_mask)
+            outbroken |= chain.outbroken
+            certain.add(card)
+            segments = segments[1:]
+            left -= 1
+        # how many infection cards come off each run, reshuffling the discards if need be
+        draws = []
+        for segment in segments:
+            drawn = min(left, len(segment))
+            if drawn:
+                draws.append((segment, drawn))
+            left -= drawn
+        if left and discard:
+            draws.append((discard, min(left, len(discard))))
+        for card in certain:
+            infection[card] += weight
+        for segment, drawn in draws:
+            chance = weight * drawn / len(segment)
+            for card in segment:
+                if card not in certain:
+                    infection[card] += chance
+        mask = outbroken
+        while mask:
+            low = mask & -mask
+            outbreak[low.bit_length() - 1] += weight
+            mask ^= low
+        for city, chance in self.get_draw_risk(draws, caches, risks).items():
+            if not outbroken >> city & 1:
+                outbreak[city] += weight * chance
+
+    @classmethod
+    def get_draw_risk(self, draws: List[Tuple[List[int], int]], caches: List[ChainCache],
+                      risks: Dict[tuple, tuple]) -> Dict[int, float]:
+        """
+        Chance of each city outbreaking from the given number of cards drawn off each run.
+        Args:
+            risks - earlier results, by the runs and caches they were for
+        Returns:
+            {city index: chance} - for every city with any chance
+        """
+        key = tuple((id(segment), drawn) for segment, drawn in draws) + tuple(map(id, caches))
+        if key in risks:
+            return risks[key][0]
+        # cards that could come up, by color, with the run they're in and their own chain
+        by_color: List[List[Tuple[int, int, Chain]]] = [[] for _ in range(NUM_COLORS)]
+        # for each city, how many cards in each run would set off an outbreak reaching it alone
+        hits: Dict[int, List[int]] = {}
+        for run, (segment, drawn) in enumerate(draws):
+            # cards in the same cluster of full cities set off the same outbreaks
+            masks: Dict[int, int] = {}
+            for card in segment:
+                color = CITY_COLORS[card]
+                chain = caches[color].get((card,))
+                by_color[color].append((card, run, chain))
+                if chain.outbroken:
+                    masks[chain.outbroken] = masks.get(chain.outbroken, 0) + 1
+            for mask, count in masks.items():
+                while mask:
+                    low = mask & -mask
+                    hits.setdefault(low.bit_length() - 1, [0] * len(draws))[run] += count
+                    mask ^= low
+        # pairs of cards where the first leaves cubes in the way of the second's chain
+        pairs: Dict[int, List[Tuple[int, int]]] = {}
+        for color, cards in enumerate(by_color):
+            for card, run, chain in cards:
+                for other, other_run, other_chain in cards:
+                    if other == card or other_run < run or not chain.added_mask & other_chain.touched:
+                        continue
+                    pair = caches[color].get((card, other))
+                    mask = pair.outbroken & ~chain.outbroken & ~other_chain.outbroken
+                    while mask:
+                        low = mask & -mask
+                        pairs.setdefault(low.bit_length() - 1, []).append((run, other_run))
+                        mask ^= low
+        chances = {}
+        for city in hits.keys() | pairs.keys():
+            counts = hits.get(city, [0] * len(draws))
+            miss = 1.0
+            for (segment, drawn), count in zip(draws, counts):
+                miss *= draw_probability(len(segment), 0, count, drawn)
+            chance = 1 - miss
+            for run, other_run in pairs.get(city, ()):
+                # both drawn, the first one first, and none of the cards that would do it alone
+                both = 0.5 if run == other_run else 1.0
+                for index, ((segment, drawn), count) in enumerate(zip(draws, counts)):
+                    required = (run == index) + (other_run == index)
+                    both *= draw_probability(len(segment), required, count, drawn)
+                chance += both
+            chances[city] = chance
+        # keeps the runs and caches alive too, so their ids can't be reused
+        risks[key] = (chances, draws, caches)
+        return chances
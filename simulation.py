@@ -0,0 +1,336 @@
+import os
+import time
+import random
+import hashlib
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional, Tuple
+from board import Board, City, CityCard, Player, EpidemicCard
+from enums import ActionList
+from custom_exceptions import GameEndedError
+from constants import *
+
+# A move a policy wants to make: the action, plus the (already resolved) objects to pass
+# to the Board method of the same name. None means the player passes.
+Move = Optional[Tuple[ActionList, tuple]]
+
+# How many cities get 3, 2 and 1 cubes during setup, and how many cards each player
+# starts with for a given number of players
+INITIAL_INFECTIONS = [3, 3, 3, 2, 2, 2, 1, 1, 1]
+INITIAL_HAND_SIZES = {1: 4, 2: 4, 3: 3, 4: 2}
+WON = "All diseases cured"
+
+
+class Policy:
+    """
+    Decides what a simulated player does. Policies are handed the live board, so they
+    must not mutate it.
+    """
+
+    def choose_action(self, board: Board, rng: random.Random) -> Move:
+        """
+        Pick the active player's next action.
+        """
+        raise NotImplementedError
+
+    def choose_discards(self, player: Player, rng: random.Random) -> List[CityCard]:
+        """
+        Pick which cards to throw away when the player has more than MAX_HAND_COUNT. By
+        default, drop cards from whichever colors the player holds the fewest of.
+        """
+        counts = Counter(c.color for c in player.city_cards)
+        ranked = sorted(player.city_cards, key=lambda c: counts[c.color])
+        return ranked[:len(player.city_cards) - MAX_HAND_COUNT]
+
+
+class RandomPolicy(Policy):
+    """
+    Treats disease if standing on some, otherwise wanders to a random neighbor.
+    """
+
+    def choose_action(self, board: Board, rng: random.Random) -> Move:
+        city = board.active_player.current_city
+        infected = [c for c, count in zip(COLORS, board.cubes[city.index].tolist()) if count]
+        if infected:
+            return ActionList.treat_disease, (rng.choice(infected),)
+        to_city = board.cities[rng.choice(city.connected_cities)]
+        return ActionList.move_adjacent, (to_city,)
+
+
+class GreedyPolicy(Policy):
+    """
+    Cures whenever it can, heads for a research station when holding enough cards for a
+    cure, treats disease where it stands, and otherwise moves toward the most infected
+    neighbor.
+    """
+
+    def choose_action(self, board: Board, rng: random.Random) -> Move:
+        player = board.active_player
+        city = player.current_city
+        dm = board.disease_manager
+        by_color: Dict[str, List[CityCard]] = {c: [] for c in COLORS}
+        # the hand counts its colors, so most turns don't need to sort the cards by color
+        if max(player.city_cards.color_counts) >= CURE_COUNT:
+            for card in player.city_cards:
+                by_color[card.color].append(card)
+        for color, cards in by_color.items():
+            if len(cards) < CURE_COUNT or dm.is_cured(color):
+                continue
+            if city.has_research_station:
+                return ActionList.discover_cure, (cards[:CURE_COUNT], color)
+            # any card we can spend without dropping below CURE_COUNT of this color
+            spare = [c for c in player.city_cards if c.color != color or len(cards) > CURE_COUNT]
+            if city in spare:
+                return ActionList.build_research_station, (CityCard(city.name),)
+            for card in spare:
+                if board.cities[card.name].has_research_station:
+                    return ActionList.move_direct_flight, (card,)
+        cubes = dict(zip(COLORS, board.cubes[city.index].tolist()))
+        infected = [c for c in COLORS if cubes[c]]
+        if infected:
+            return ActionList.treat_disease, (max(infected, key=cubes.get),)
+        return self.wander(board, city, rng)
+
+    def wander(self, board: Board, city: City, rng: random.Random) -> Move:
+        """
+        Move to the neighbor with the most disease cubes, breaking ties randomly.
+        """
+        neighbors = [board.cities[name] for name in city.connected_cities]
+        rng.shuffle(neighbors)
+        totals = board.cubes.sum(axis=1).tolist()
+        to_city = max(neighbors, key=lambda c: totals[c.index])
+        return ActionList.move_adjacent, (to_city,)
+
+
+class GameResult:
+    """
+    Outcome of one simulated game.
+    """
+
+    def __init__(self, seed: int, won: bool, reason: str, turns: int, actions: int, wasted_actions: int,
+                 board: Board):
+        self.seed = seed
+        self.won = won
+        self.reason = reason
+        self.turns = turns
+        self.actions = actions
+        self.wasted_actions = wasted_actions
+        self.outbreaks = board.infection_manager.outbreak_count
+        self.epidemics = board.infection_manager.level - 1
+        self.cures = sum(board.disease_manager.diseases_cured.values())
+        self.cubes_remaining: Dict[str, int] = dict(
+            board.disease_manager.diseases_remaining)
+
+    def __str__(self):
+        return "Game {}: {} ({}) after {} turns, {} outbreaks, {} cures".format(
+            self.seed, "won" if self.won else "lost", self.reason, self.turns, self.outbreaks, self.cures)
+
+
+class Simulation:
+    """
+    Plays one full game against a Board directly, without going through the Controller
+    (no JSON, no persistence). Each player's moves come from their Policy.
+    """
+
+    def __init__(self, num_players: int = MAX_PLAYERS, seed: int = None, policies: List[Policy] = None,
+                 num_epidemic_cards: int = MIN_NUM_EPIDEMIC_CARDS, max_outbreak_count: int = MAX_OUTBREAK_COUNT,
+                 max_turns: int = 1000, debug: bool = False):
+        self.seed = seed if seed is not None else random.getrandbits(32)
+        self.rng = random.Random(self.seed)
+        self.player_ids = ["player{}".format(i) for i in range(num_players)]
+        if policies is None:
+            policies = [GreedyPolicy()] * num_players
+        self.policies: Dict[str, Policy] = dict(zip(self.player_ids, policies))
+        self.max_turns = max_turns
+        self.board = Board(self.player_ids, num_epidemic_cards=num_epidemic_cards,
+                           max_outbreak_count=max_outbreak_count, seed=self.seed, debug=debug)
+        self.setup()
+
+    def setup(self) -> None:
+        """
+        Deal starting hands and place the starting infections.
+        """
+        cm = self.board.card_manager
+        hand_size = INITIAL_HAND_SIZES.get(len(self.player_ids), 2)
+        for player in self.board.players.values():
+            for _ in range(hand_size):
+                card = next(c for c in cm.city_card_deck if not isinstance(c, EpidemicCard))
+                cm.city_card_deck.remove(card)
+                player.add_card(card)
+        for cubes in INITIAL_INFECTIONS:
+            card = cm.draw_infection_cards(1)[0]
+            self.board.infect_city(card.name, card.color, cubes)
+
+    def play(self) -> GameResult:
+        """
+        Play until the game is won, lost, or max_turns is hit.
+        """
+        board = self.board
+        turns = actions = wasted = 0
+        won = False
+        reason = "Hit turn limit"
+        try:
+            while turns < self.max_turns:
+                player = board.active_player
+                move = self.policies[player.player_id].choose_action(board, self.rng)
+                if move is None or not getattr(board, move[0].name)(*move[1]):
+                    wasted += 1
+                actions += 1
+                if all(board.disease_manager.diseases_cured.values()):
+                    won, reason = True, WON
+                    break
+                board.dec_active_player_actions()
+                if not player.has_actions_left():
+                    turns += 1
+                    try:
+                        board.check_end_of_actions()
+                    finally:
+                        self.discard_excess(player)
+        except GameEndedError as e:
+            reason = str(e)
+        return GameResult(self.seed, won, reason, turns, actions, wasted, board)
+
+    def discard_excess(self, player: Player) -> None:
+        """
+        Bring a player's hand back down to MAX_HAND_COUNT.
+        """
+        if len(player.city_cards) <= MAX_HAND_COUNT:
+            return
+        policy = self.policies[player.player_id]
+        discards = policy.choose_discards(player, self.rng)
+        for card in discards:
+            player.subtract_card(card)
+        self.board.card_manager.discard_city_cards(discards)
+
+
+class BatchReport:
+    """
+    Outcome statistics for a batch of simulated games.
+    """
+
+    def __init__(self):
+        self.games = 0
+        self.wins = 0
+        self.reasons: Counter = Counter()
+        self.turns = 0
+        self.outbreaks = 0
+        self.cures = 0
+        self.seconds = 0.0
+
+    def add(self, result: GameResult) -> None:
+        self.games += 1
+        self.wins += result.won
+        self.reasons[result.reason] += 1
+        self.turns += result.turns
+        self.outbreaks += result.outbreaks
+        self.cures += result.cures
+
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        lines = ["{} games in {:.2f}s ({:.0f} games/sec)".format(self.games, self.seconds, self.games_per_second()),
+                 "win rate: {:.1%}".format(self.wins / max(self.games, 1)),
+                 "mean turns: {:.1f}, mean outbreaks: {:.2f}, mean cures: {:.2f}".format(
+                     self.turns / max(self.games, 1), self.outbreaks / max(self.games, 1),
+                     self.cures / max(self.games, 1))]
+        lines.extend("  {}: {}".format(reason, count) for reason, count in self.reasons.most_common())
+        return "\n".join(lines)
+
+
+def run_batch(num_games: int, seed: int = 0, policy_factory: Callable[[], Policy] = GreedyPolicy,
+              on_result: Callable[[GameResult], None] = None, **kwargs) -> BatchReport:
+    """
+    Play num_games games in this process, seeding game i with derive_seed(seed, i). Any
+    extra keyword arguments are passed through to Simulation.
+    """
+    report = BatchReport()
+    num_players = kwargs.pop("num_players", MAX_PLAYERS)
+    start = time.perf_counter()
+    for i in range(num_games):
+        policies = [policy_factory() for _ in range(num_players)]
+        result = Simulation(num_players, derive_seed(seed, i), policies, **kwargs).play()
+        report.add(result)
+        if on_result:
+            on_result(result)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+def derive_seed(master_seed: int, index: int) -> int:
+    """
+    Seed for the index-th game of a batch. Only depends on the master seed and the index,
+    so a batch plays the same games no matter how it's split across workers.
+    """
+    digest = hashlib.sha256("{}:{}".format(master_seed, index).encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+def play_chunk(start: int, stop: int, master_seed: int, policy_factory: Callable[[], Policy],
+               kwargs: dict) -> List[GameResult]:
+    """
+    Play games start..stop-1 of a batch. Runs inside worker processes.
+    """
+    num_players = kwargs.get("num_players", MAX_PLAYERS)
+    sim_kwargs = {k: v for k, v in kwargs.items() if k != "num_players"}
+    results = []
+    for i in range(start, stop):
+        policies = [policy_factory() for _ in range(num_players)]
+        results.append(Simulation(num_players, derive_seed(master_seed, i), policies, **sim_kwargs).play())
+    return results
+
+
+def run_parallel(num_games: int, master_seed: int = 0, policy_factory: Callable[[], Policy] = GreedyPolicy,
+                 workers: int = None, chunk_size: int = 50, on_result: Callable[[GameResult], None] = None,
+                 **kwargs) -> BatchReport:
+    """
+    Play num_games games across a pool of worker processes. Game i always gets seed
+    derive_seed(master_seed, i), so the set of results is the same for any number of
+    workers; only the order they arrive in changes. Results are streamed back a chunk at a
+    time and only a couple of chunks per worker are in flight at once, so memory stays
+    bounded however many games are played. policy_factory must be picklable (e.g. a
+    module-level class). Any extra keyword arguments are passed through to Simulation.
+    """
+    workers = workers or os.cpu_count() or 1
+    report = BatchReport()
+    chunks = iter(range(0, num_games, chunk_size))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = set()
+        while True:
+            for chunk_start in chunks:
+                pending.add(pool.submit(play_chunk, chunk_start, min(chunk_start + chunk_size, num_games),
+                                        master_seed, policy_factory, kwargs))
+                if len(pending) >= 2 * workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                for result in future.result():
+                    report.add(result)
+                    if on_result:
+                        on_result(result)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play simulated games and report outcomes.")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--players", type=int, default=MAX_PLAYERS)
+    parser.add_argument("--epidemics", type=int, default=MIN_NUM_EPIDEMIC_CARDS)
+    parser.add_argument("--max-outbreaks", type=int, default=MAX_OUTBREAK_COUNT)
+    parser.add_argument("--policy", choices=["greedy", "random"], default="greedy")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes to spread games across (0 for one per core)")
+    args = parser.parse_args()
+    policy = GreedyPolicy if args.policy == "greedy" else RandomPolicy
+    settings = {"num_players": args.players, "num_epidemic_cards": args.epidemics,
+                "max_outbreak_count": args.max_outbreaks}
+    if args.workers == 1:
+        print(run_batch(args.games, args.seed, policy, **settings))
+    else:
+        print(run_parallel(args.games, args.seed, policy, args.workers or None, **settings))
@@ -0,0 +1,382 @@
+import os
+import json
+import atexit
+import pickle
+import time
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from board import Board
+from custom_exceptions import InvalidOperationError
+
+
+class GameStore:
+    """
+    Interface for loading and saving Board objects by game id. The Controller only talks
+    to one of these, so the persistence strategy can be swapped out without touching the
+    message handling code.
+    """
+    # True if this store wants to see every action as it happens, rather than just the
+    # latest board state
+    journaled = False
+
+    def attach(self, controller) -> None:
+        """
+        Called by the Controller that owns this store. Stores that need to re-run
+        actions (e.g. when recovering from a journal), or to know which games are in use,
+        can hold on to it.
+        """
+
+    def load(self, game_id: str) -> Board:
+        """
+        Get the Board for the given game id.
+        Raises:
+            KeyError
+                -if no game with this id exists
+        """
+        raise NotImplementedError
+
+    def save(self, game_id: str, board: Board, action: dict = None) -> None:
+        """
+        Store the given Board under the given game id.
+        Args:
+            action(opt) - the validated message that produced this board state
+        """
+        raise NotImplementedError
+
+    def flush(self, game_id: str = None) -> None:
+        """
+        Make sure any pending writes for the given game (or every game) hit the disk.
+        """
+
+    def discard(self, game_id: str) -> None:
+        """
+        Forget any resident copy of the given game. Persisted data is untouched.
+        """
+
+    def close(self) -> None:
+        """
+        Write out anything pending and stop any background work. Call once no more
+        messages are being handled; the store shouldn't be used afterwards.
+        """
+        self.flush()
+
+
+class PickleGameStore(GameStore):
+    """
+    Store that pickles the whole board to game-{id}.pickle on every save and unpickles it
+    again on every load.
+    """
+
+    def __init__(self, path_format: str = "game-{}.pickle"):
+        self.path_format = path_format
+
+    def get_path(self, game_id: str) -> str:
+        return self.path_format.format(game_id)
+
+    def load(self, game_id: str) -> Board:
+        try:
+            with open(self.get_path(game_id), "rb") as f:
+                return pickle.load(f)
+        except FileNotFoundError:
+            raise KeyError(game_id)
+
+    def save(self, game_id: str, board: Board, action: dict = None) -> None:
+        with open(self.get_path(game_id), "wb+") as f:
+            pickle.dump(board, f, pickle.HIGHEST_PROTOCOL)
+
+
+class MemoryGameStore(GameStore):
+    """
+    Keeps live Board objects resident in memory, keyed by game id, in front of a backing
+    store. Saves only mark a game as dirty; dirty games are written to the backing store
+    when they are flushed, when they are evicted, or once flush_interval seconds have
+    passed since their last write (write-behind). When more than `capacity` games are
+    resident, the least recently used game is written back (if dirty) and evicted.
+
+    Games that go quiet are still written back: a background thread checks every
+    flush_interval seconds for games that have been dirty that long and flushes them,
+    skipping any a message is being handled for. Everything left is flushed when the
+    store is closed, or when the interpreter exits.
+
+    If the backing store is journaled, saves are forwarded to it straight away (actions
+    are cheap appends there), so the board never needs a separate write-back.
+
+    Safe to share between threads handling different games: the resident boards are only
+    touched while holding the store's lock, and a game is only evicted while holding its
+    lock in the attached Controller, so a board is never written back or dropped halfway
+    through a message. If every resident game is busy, the store goes over capacity until
+    one of them is free.
+    """
+
+    def __init__(self, backing: GameStore = None, capacity: int = 128, flush_interval: Optional[float] = 5.0):
+        self.backing: GameStore = backing if backing is not None else PickleGameStore()
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.boards: 'OrderedDict[str, Board]' = OrderedDict()
+        self.dirty: Dict[str, float] = {}
+        self.lock = threading.RLock()
+        self.controller = None
+        self.stopped = threading.Event()
+        self.flusher: Optional[threading.Thread] = None
+        if flush_interval:
+            # the thread only holds a weakref, so a store nobody closes can still be collected
+            self.flusher = threading.Thread(target=run_flusher, args=(weakref.ref(self), self.stopped, flush_interval),
+                                            name="MemoryGameStore flusher", daemon=True)
+            self.flusher.start()
+        OPEN_STORES.add(self)
+
+    def attach(self, controller) -> None:
+        self.controller = controller
+        self.backing.attach(controller)
+
+    def load(self, game_id: str) -> Board:
+        with self.lock:
+            board = self.boards.get(game_id)
+            if board is not None:
+                self.boards.move_to_end(game_id)
+                return board
+            board = self.backing.load(game_id)
+            self.boards[game_id] = board
+            self.evict_idle()
+            return board
+
+    def save(self, game_id: str, board: Board, action: dict = None) -> None:
+        with self.lock:
+            self.boards[game_id] = board
+            self.boards.move_to_end(game_id)
+            if self.backing.journaled:
+                self.backing.save(game_id, board, action)
+                self.dirty.pop(game_id, None)
+                self.evict_idle()
+                return
+            now = time.monotonic()
+            since = self.dirty.setdefault(game_id, now)
+            if self.flush_interval is not None and now - since >= self.flush_interval:
+                self.flush(game_id)
+            self.evict_idle()
+
+    def flush(self, game_id: str = None) -> None:
+        with self.lock:
+            game_ids = [game_id] if game_id is not None else list(self.dirty.keys())
+            for gid in game_ids:
+                if gid in self.dirty and gid in self.boards:
+                    self.backing.save(gid, self.boards[gid])
+                    del self.dirty[gid]
+            self.backing.flush(game_id)
+
+    def flush_stale(self) -> None:
+        """
+        Flush every game that has been dirty for at least flush_interval seconds, unless
+        a message is being handled for it (it'll be due again next time).
+        """
+        now = time.monotonic()
+        with self.lock:
+            stale = [gid for gid, since in self.dirty.items() if now - since >= self.flush_interval]
+        # the game's lock has to be taken before the store's, as handle_input does
+        for gid in stale:
+            if self.controller is None:
+                self.flush(gid)
+            else:
+                self.controller.run_if_idle(gid, lambda: self.flush(gid))
+
+    def close(self) -> None:
+        self.stopped.set()
+        if self.flusher is not None and self.flusher is not threading.current_thread():
+            self.flusher.join()
+        self.flush()
+        self.backing.close()
+        OPEN_STORES.discard(self)
+
+    def discard(self, game_id: str) -> None:
+        with self.lock:
+            self.boards.pop(game_id, None)
+            self.dirty.pop(game_id, None)
+            self.backing.discard(game_id)
+            if self.controller is not None:
+                self.controller.forget(game_id)
+
+    def evict_idle(self) -> None:
+        """
+        Write back and drop least recently used games until we're within capacity,
+        skipping games a message is being handled for.
+        """
+        with self.lock:
+            for game_id in list(self.boards.keys()):
+                if len(self.boards) <= self.capacity:
+                    return
+                if self.controller is None:
+                    self.evict(game_id)
+                else:
+                    self.controller.run_if_idle(game_id, lambda: self.evict(game_id))
+
+    def evict(self, game_id: str) -> None:
+        """
+        Write back and drop one game, and have the Controller forget it.
+        """
+        with self.lock:
+            self.flush(game_id)
+            self.discard(game_id)
+
+
+# every MemoryGameStore that hasn't been closed yet, so their dirty games can be flushed at exit
+OPEN_STORES: 'weakref.WeakSet[MemoryGameStore]' = weakref.WeakSet()
+
+
+def run_flusher(store_ref: 'weakref.ref[MemoryGameStore]', stopped: threading.Event, interval: float) -> None:
+    """
+    Body of a MemoryGameStore's flusher thread: flush its stale games every interval
+    seconds until it's closed or garbage collected.
+    """
+    while not stopped.wait(interval):
+        store = store_ref()
+        if store is None:
+            return
+        store.flush_stale()
+        del store
+
+
+@atexit.register
+def close_open_stores() -> None:
+    for store in list(OPEN_STORES):
+        store.close()
+
+
+class JournalGameStore(GameStore):
+    """
+    Store that appends each validated action message to game-{id}.journal instead of
+    rewriting the whole board, and only pickles a full snapshot to game-{id}.snapshot
+    every `snapshot_interval` actions. Loading reads the latest snapshot and replays the
+    journal on top of it through the attached Controller.
+
+    Every journal line carries a sequence number so a crash between writing a snapshot
+    and truncating the journal doesn't replay actions twice, and a torn last line (crash
+    mid-append) is cut off when the game is loaded. The board's RNG is part of the snapshot, so replay draws the
+    same cards; as a safeguard, actions that consumed randomness (e.g. reshuffled the
+    infection deck) also store the RNG state they started from.
+
+    Saving without an action (e.g. a freshly created board, or a write-back from a
+    MemoryGameStore in front of this one) always writes a snapshot.
+    """
+    journaled = True
+
+    def __init__(self, path_format: str = "game-{}", snapshot_interval: int = 50, fsync: bool = False):
+        self.path_format = path_format
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self.controller = None
+        self.seq: Dict[str, int] = {}
+        self.since_snapshot: Dict[str, int] = {}
+        self.rng_states: Dict[str, tuple] = {}
+
+    def attach(self, controller) -> None:
+        self.controller = controller
+
+    def get_snapshot_path(self, game_id: str) -> str:
+        return self.path_format.format(game_id) + ".snapshot"
+
+    def get_journal_path(self, game_id: str) -> str:
+        return self.path_format.format(game_id) + ".journal"
+
+    def load(self, game_id: str) -> Board:
+        try:
+            with open(self.get_snapshot_path(game_id), "rb") as f:
+                snapshot = pickle.load(f)
+        except FileNotFoundError:
+            raise KeyError(game_id)
+        board: Board = snapshot["board"]
+        seq: int = snapshot["seq"]
+        replayed = 0
+        for entry in self.read_journal(game_id):
+            if entry["seq"] <= seq:
+                continue
+            if self.controller is None:
+                raise InvalidOperationError(
+                    "Can't replay journal without a controller attached.")
+            if entry["rng"] is not None:
+                board.rng.setstate(self.decode_rng_state(entry["rng"]))
+            self.controller.apply_action(board, entry["action"])
+            seq = entry["seq"]
+            replayed += 1
+        self.seq[game_id] = seq
+        self.since_snapshot[game_id] = replayed
+        self.rng_states[game_id] = board.rng.getstate()
+        return board
+
+    def save(self, game_id: str, board: Board, action: dict = None) -> None:
+        if action is None or self.since_snapshot.get(game_id, 0) + 1 >= self.snapshot_interval:
+            if action is not None:
+                self.seq[game_id] = self.seq.get(game_id, 0) + 1
+            self.write_snapshot(game_id, board)
+            return
+        self.seq[game_id] = self.seq.get(game_id, 0) + 1
+        self.since_snapshot[game_id] = self.since_snapshot.get(game_id, 0) + 1
+        # only keep the RNG state if this action actually drew from it
+        state = board.rng.getstate()
+        prior = self.rng_states.get(game_id, state)
+        entry = {
+            "seq": self.seq[game_id],
+            "action": action,
+            "rng": self.encode_rng_state(prior) if prior != state else None
+        }
+        self.rng_states[game_id] = state
+        with open(self.get_journal_path(game_id), "a") as f:
+            f.write(json.dumps(entry, separators=(",", ":")) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+    def discard(self, game_id: str) -> None:
+        self.seq.pop(game_id, None)
+        self.since_snapshot.pop(game_id, None)
+        self.rng_states.pop(game_id, None)
+
+    def write_snapshot(self, game_id: str, board: Board) -> None:
+        """
+        Atomically replace the snapshot for this game, then truncate its journal.
+        """
+        path = self.get_snapshot_path(game_id)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump({"seq": self.seq.get(game_id, 0), "board": board},
+                        f, pickle.HIGHEST_PROTOCOL)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        open(self.get_journal_path(game_id), "w").close()
+        self.since_snapshot[game_id] = 0
+        self.rng_states[game_id] = board.rng.getstate()
+
+    def read_journal(self, game_id: str) -> List[dict]:
+        """
+        Every complete entry in this game's journal, in order. A torn line from a crash
+        mid-append (and anything after it, none of which was acknowledged) is cut off the
+        file, so the next append starts on a line of its own.
+        """
+        path = self.get_journal_path(game_id)
+        entries = []
+        complete = 0
+        try:
+            with open(path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break
+                    complete += len(line)
+        except FileNotFoundError:
+            return entries
+        if complete < os.path.getsize(path):
+            os.truncate(path, complete)
+        return entries
+
+    @staticmethod
+    def encode_rng_state(state: tuple) -> list:
+        return [state[0], list(state[1]), state[2]]
+
+    @staticmethod
+    def decode_rng_state(state: list) -> tuple:
+        return (state[0], tuple(state[1]), state[2])
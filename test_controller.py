@@ -1,6 +1,7 @@
 from typing import Union, List
-from controller import Controller, Serializer
+from controller import Controller
 from board import CityCard, Player, Board
+from constants import MAX_DISEASE_COUNT
 
 
 class TestController(Controller):
@@ -22,43 +23,43 @@ class TestController(Controller):
         """
         Add the given city card to a player's hand.
         """
-        b: Board = Serializer.load_board(self.game_id)
+        b: Board = self.store.load(self.game_id)
         if not player:
             success = b.active_player.add_card(card)
         else:
             success = b.get_player(player).add_card(card)
-        Serializer.save_board(b, self.game_id)
+        self.store.save(self.game_id, b)
         return success
 
     def add_single_disease(self, city_name: str, color: str) -> bool:
         """
         Add a disease of the given color onto the given city.
         """
-        b: Board = Serializer.load_board(self.game_id)
-        wasOutbreak = b.cities[city_name].add_single_disease(b.cities, color)
-        Serializer.save_board(b, self.game_id)
+        b: Board = self.store.load(self.game_id)
+        wasOutbreak = bool(b.infect_city(city_name, color).outbreaks)
+        self.store.save(self.game_id, b)
         return wasOutbreak
 
     def add_epidemic_disease(self, city_name: str, color: str) -> bool:
         """
         Add an epidemic disease of the given color onto the given city.
         """
-        b: Board = Serializer.load_board(self.game_id)
-        wasOutbreak = b.cities[city_name].add_epidemic_disease(b.cities, color)
-        Serializer.save_board(b, self.game_id)
+        b: Board = self.store.load(self.game_id)
+        wasOutbreak = bool(b.infect_city(city_name, color, MAX_DISEASE_COUNT).outbreaks)
+        self.store.save(self.game_id, b)
         return wasOutbreak
 
     def get_board_object(self) -> Board:
         """
         Get the actual board object.
         """
-        b = Serializer.load_board(self.game_id)
+        b = self.store.load(self.game_id)
         return b
 
     def set_active_player(self, player_id: str) -> None:
         """
         Set active player to whoever is passed along
         """
-        b: Board = Serializer.load_board(self.game_id)
+        b: Board = self.store.load(self.game_id)
         b.set_active_player(b.get_player(player_id))
-        Serializer.save_board(b, self.game_id)
+        self.store.save(self.game_id, b)
@@ -0,0 +1,92 @@
+import sys
+sys.path.append('..')
+import unittest
+import numpy as np
+from board import Board, InfectionManager, OutbreakResolver
+from board_batch import *
+from city_graph import *
+from constants import *
+from cube_matrix import cube_totals
+from simulation import run_batch
+
+
+class TestResolveInfections(unittest.TestCase):
+    def test_matches_resolver(self):
+        rng = np.random.default_rng(0)
+        size = 500
+        cubes = rng.integers(0, MAX_DISEASE_COUNT + 1, (size, NUM_CITIES, NUM_COLORS)).astype(np.int8)
+        cubes[rng.random(cubes.shape) < 0.5] = 0
+        cities = rng.integers(0, NUM_CITIES, size)
+        colors = rng.integers(0, NUM_COLORS, size)
+        amounts = rng.choice([1, MAX_DISEASE_COUNT], size)
+        expected = cubes.copy()
+        outbreaks, placed = resolve_infections(cubes, np.arange(size), cities, colors, amounts)
+        for i in range(size):
+            b = Board(["playeronesid"], cubes=expected[i])
+            report = OutbreakResolver.infect(b.cities, b.cities[CITY_NAMES[cities[i]]],
+                                             COLORS[colors[i]], int(amounts[i]))
+            self.assertEqual(outbreaks[i], len(report.outbreaks))
+            self.assertEqual(placed[i], report.cubes_placed)
+        self.assertTrue((cubes == expected).all())
+        self.assertGreater(outbreaks.sum(), 0)
+
+    def test_shuffle_segments(self):
+        rng = np.random.default_rng(1)
+        cards = np.tile(np.arange(NUM_CITIES), (50, 1))
+        start = rng.integers(0, NUM_CITIES, 50)
+        stop = np.minimum(start + rng.integers(0, 20, 50), NUM_CITIES)
+        shuffled = shuffle_segments(cards, start, stop, rng)
+        for row, a, b in zip(shuffled, start, stop):
+            self.assertEqual(sorted(row[a:b]), list(range(a, b)))
+            self.assertEqual(list(row[:a]), list(range(a)))
+            self.assertEqual(list(row[b:]), list(range(b, NUM_CITIES)))
+
+
+class TestBoardBatch(unittest.TestCase):
+    def test_setup(self):
+        batch = BoardBatch(20, num_players=4, seed=0)
+        self.assertEqual(batch.city_cards.shape[1], NUM_CITIES + MIN_NUM_EPIDEMIC_CARDS - 8)
+        self.assertTrue(((batch.city_cards == EPIDEMIC).sum(axis=1) == MIN_NUM_EPIDEMIC_CARDS).all())
+        self.assertEqual(cube_totals(batch.cubes).sum(axis=1).tolist(), [18] * 20)
+        self.assertEqual(batch.infection_top.tolist(), [9] * 20)
+
+    def test_advance(self):
+        batch = BoardBatch(200, seed=3)
+        while True:
+            finished = batch.reason != PLAYING
+            before = batch.cubes[finished].copy()
+            if not batch.advance():
+                break
+            # finished games are left alone
+            self.assertTrue((batch.cubes[finished] == before).all())
+            self.assertTrue((np.sort(batch.infection_cards, axis=1) == np.arange(NUM_CITIES)).all())
+            self.assertTrue((batch.totals == cube_totals(batch.cubes)).all())
+            self.assertTrue((batch.outbreaks <= MAX_OUTBREAK_COUNT).all())
+        self.assertEqual(batch.get_reasons()["Still playing"], 0)
+        self.assertEqual(sum(batch.get_reasons().values()), len(batch))
+        drawn = np.arange(batch.city_cards.shape[1]) < batch.city_top[:, None]
+        self.assertEqual(((batch.city_cards == EPIDEMIC) & drawn).sum(axis=1).tolist(),
+                         (batch.level - 1).tolist())
+        self.assertEqual(batch.get_rates().tolist(),
+                         [InfectionManager.rates[min(level, MAX_LEVEL)] for level in batch.level])
+
+    def test_reasons_match_board(self):
+        batch = BoardBatch(50, max_outbreak_count=100, seed=0)
+        batch.run()
+        lost = {reason for reason, count in batch.get_reasons().items() if count}
+        self.assertIn(OUT_OF_CUBES_REASON.format(GREY), lost)
+        # the same reasons a Board gives when a Simulation loses the same way
+        report = run_batch(5, max_outbreak_count=100)
+        self.assertTrue(set(report.reasons) <= set(REASONS.values()))
+
+    def test_deterministic(self):
+        first = BoardBatch(50, seed=9)
+        second = BoardBatch(50, seed=9)
+        first.run()
+        second.run()
+        self.assertTrue((first.cubes == second.cubes).all())
+        self.assertEqual(first.turns.tolist(), second.turns.tolist())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,8 +1,17 @@
 import sys
 sys.path.append('..')
+import json
+import os
+import pickle
+import random
 import unittest
+from concurrent.futures import ThreadPoolExecutor
 from board import *
 from constants import *
+from custom_exceptions import GameEndedError, InvalidOperationError
+from controller import Controller
+from encoder import BoardEncoder
+from simulation import Simulation
 
 
 class TestBoard:
@@ -146,12 +155,12 @@ class TestBoardMethods(unittest.TestCase):
         b = TestBoard.get_test_board()
         self.assertFalse(b.treat_disease("Potato Stew"))
         self.assertFalse(b.treat_disease(RED))
-        b.active_player.current_city.add_single_disease(b.cities, BLUE)
+        b.infect_city(b.active_player.current_city, BLUE)
         self.assertTrue(b.treat_disease(BLUE))
         self.assertFalse(b.treat_disease(BLUE))
         self.assertEqual(b.active_player.current_city.disease_count[BLUE], 0)
-        b.active_player.current_city.add_epidemic_disease(b.cities, RED)
-        b.active_player.current_city.add_epidemic_disease(b.cities, BLUE)
+        b.infect_city(b.active_player.current_city, RED, MAX_DISEASE_COUNT)
+        b.infect_city(b.active_player.current_city, BLUE, MAX_DISEASE_COUNT)
         self.assertEqual(
             b.active_player.current_city.disease_count[RED], MAX_DISEASE_COUNT)
         p = b.active_player
@@ -163,6 +172,26 @@ class TestBoardMethods(unittest.TestCase):
         self.assertEqual(p.current_city.disease_count[BLUE], 0)
         self.assertEqual(p.current_city.disease_count[RED], MAX_DISEASE_COUNT)
 
+    def test_infect_city(self):
+        b = TestBoard.get_test_board()
+        city = b.active_player.current_city
+        remaining = b.disease_manager.get_remaining_diseases(BLUE)
+        outbreaks = b.infection_manager.outbreak_count
+        b.infect_city(city.name, BLUE, MAX_DISEASE_COUNT - city.disease_count[BLUE])
+        report = b.infect_city(city.name, BLUE)
+        self.assertEqual(report.outbreaks[0], city.name)
+        self.assertEqual(b.infection_manager.outbreak_count, outbreaks + len(report.outbreaks))
+        self.assertEqual(b.disease_manager.get_remaining_diseases(BLUE),
+                         DISEASE_CUBE_LIMIT - int(b.cubes[:, COLORS.index(BLUE)].sum()))
+        self.assertLess(b.disease_manager.get_remaining_diseases(BLUE), remaining)
+        # cubes put down behind the board's back can't be treated back into the supply
+        b = TestBoard.get_test_board()
+        b.disease_manager.cure_disease(BLUE)
+        b.active_player.current_city.add_single_disease(b.cities, BLUE)
+        b.disease_manager.diseases_remaining[BLUE] = DISEASE_CUBE_LIMIT
+        with self.assertRaises(InvalidOperationError):
+            b.treat_disease(BLUE)
+
     def test_share_knowledge(self):
         b = TestBoard.get_test_board()
         p1 = b.get_player("playeronesid")
@@ -203,7 +232,7 @@ class TestBoardMethods(unittest.TestCase):
         self.assertEqual(b.card_manager.infection_card_discard, [])
         self.assertEqual(
             len(b.card_manager.infection_card_deck), len(CITY_LIST.keys()))
-        self.assertEqual(City.outbreaks_occurred, 0)
+        self.assertEqual(b.infection_manager.outbreak_count, 0)
         if len(cards) == 1:
             self.assertEqual(b.infection_manager.level, 2)
             self.assertEqual(b.infection_manager.rate, 2)
@@ -211,10 +240,64 @@ class TestBoardMethods(unittest.TestCase):
             self.assertEqual(b.infection_manager.level, 3)
             self.assertEqual(b.infection_manager.rate, 2)
 
+    def test_check_end_of_actions_handles_epidemics(self):
+        b = TestBoard.get_new_board()
+        try:
+            while True:
+                b.active_player.actions_left = 0
+                b.check_end_of_actions()
+        except GameEndedError:
+            pass
+        for p in b.players.values():
+            self.assertFalse(
+                any(isinstance(c, EpidemicCard) for c in p.city_cards))
+        epidemics_left = len([c for c in b.card_manager.city_card_deck
+                              if isinstance(c, EpidemicCard)])
+        self.assertEqual(b.infection_manager.level - 1 + epidemics_left,
+                         MIN_NUM_EPIDEMIC_CARDS)
+
+    def test_seeded_rng(self):
+        state = random.getstate()
+        first = Board(["playeronesid"], seed=7)
+        second = Board(["playeronesid"], seed=7)
+        self.assertEqual(random.getstate(), state)
+        self.assertEqual([getattr(c, "name", None) for c in first.card_manager.city_card_deck],
+                         [getattr(c, "name", None) for c in second.card_manager.city_card_deck])
+        self.assertEqual(first.card_manager.infection_card_deck,
+                         second.card_manager.infection_card_deck)
+        for _ in range(30):
+            self.assertEqual(first.card_manager.draw_infection_cards(3),
+                             second.card_manager.draw_infection_cards(3))
+        self.assertNotEqual(Board(["playeronesid"], seed=8).card_manager.infection_card_deck,
+                            first.card_manager.infection_card_deck)
+
+    def test_seeded_rng_in_threads(self):
+        def draw_all(seed):
+            cm = Board(["playeronesid"], seed=seed).card_manager
+            return [c.name for _ in range(200) for c in cm.draw_infection_cards(3)]
+        expected = [draw_all(seed) for seed in range(16)]
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            self.assertEqual(list(pool.map(draw_all, range(16))), expected)
+
+    def test_outbreaks_counted_per_board(self):
+        b1 = TestBoard.get_new_board()
+        b2 = TestBoard.get_new_board()
+        b1.get_city("Atlanta").add_epidemic_disease(b1.cities, BLUE)
+        b1.get_city("Chicago").add_epidemic_disease(b1.cities, BLUE)
+        deck = b1.card_manager.infection_card_deck
+        deck.remove(InfectionCard("Atlanta"))
+        deck.insert(0, InfectionCard("Atlanta"))
+        deck.remove(InfectionCard("Chicago"))
+        deck.append(InfectionCard("Chicago"))
+        b1.draw_infection_cards_and_place_cubes()
+        b2.draw_infection_cards_and_place_cubes()
+        self.assertEqual(b1.infection_manager.outbreak_count, 2)
+        self.assertEqual(b2.infection_manager.outbreak_count, 0)
+
     def test_draw_infection_cards_and_place_cubes(self):
         b = TestBoard.get_test_board()
         b.draw_infection_cards_and_place_cubes()
-        self.assertEqual(City.outbreaks_occurred, 0)
+        self.assertEqual(b.infection_manager.outbreak_count, 0)
         self.assertEqual((DISEASE_CUBE_LIMIT * 4) -
                          sum(b.disease_manager.diseases_remaining.values()), 2)
         self.assertEqual(b.infection_manager.rate, 2)
@@ -227,5 +310,200 @@ class TestBoardMethods(unittest.TestCase):
                          sum(b.disease_manager.diseases_remaining.values()), 5)
 
 
+    def test_disease_counts_incremental(self):
+        b = Board(["playeronesid", "playertwosid"], seed=3, debug=True)
+        for _ in range(5):
+            b.draw_infection_cards_and_place_cubes()
+        self.assertEqual(b.disease_manager.diseases_remaining,
+                         dict(zip(COLORS, (DISEASE_CUBE_LIMIT - b.cubes.sum(axis=0)).tolist())))
+        # treating gives cubes back to the supply straight away
+        city = b.get_city(b.card_manager.infection_card_discard[0].name)
+        b.active_player.current_city = city
+        before = b.disease_manager.get_remaining_diseases(city.color)
+        self.assertTrue(b.treat_disease(city.color))
+        self.assertEqual(b.disease_manager.get_remaining_diseases(city.color), before + 1)
+
+    def test_debug_disease_counts(self):
+        b = Board(["playeronesid"], debug=True)
+        b.draw_infection_cards_and_place_cubes()
+        # cubes placed behind the board's back
+        b.get_city("Tokyo").disease_count[RED] += 1
+        b.get_city("Tokyo").disease_count[RED] += 1
+        self.assertRaises(InvalidOperationError,
+                          lambda: b.draw_infection_cards_and_place_cubes())
+        # only checked in debug mode
+        b.debug = False
+        b.draw_infection_cards_and_place_cubes()
+
+    def test_compact_models(self):
+        b = TestBoard.get_test_board()
+        p = b.active_player
+        for model in [b, p, p.role, b.get_city("Atlanta"), b.get_city("Atlanta").disease_count,
+                      b.card_manager, b.card_manager.city_card_deck, b.infection_manager,
+                      b.disease_manager, p.city_cards[0]]:
+            self.assertFalse(hasattr(model, "__dict__"), type(model).__name__)
+        copy = pickle.loads(pickle.dumps(b))
+        self.assertEqual(copy.active_player.city_cards, p.city_cards)
+        self.assertEqual(copy.infection_manager.rate, b.infection_manager.rate)
+
+    def test_load_deque_pile_pickle(self):
+        # a game saved while the card piles were a deque subclass
+        with open(os.path.join(os.path.dirname(__file__), "data", "deque_board.pkl"), "rb") as f:
+            b: Board = pickle.load(f)
+        expected = Board(["playeronesid", "playertwosid"], seed=3)
+        expected.card_manager.draw_infection_cards(3)
+        for pile in ["city_card_deck", "infection_card_deck", "infection_card_discard"]:
+            self.assertIs(type(getattr(b.card_manager, pile)), list)
+            self.assertEqual(getattr(b.card_manager, pile), getattr(expected.card_manager, pile))
+        self.assertEqual(len(b.card_manager.draw_city_cards()), 2)
+
+    def test_upgrade_old_pickle(self):
+        # a game saved by the version before the board models had __slots__
+        with open(os.path.join(os.path.dirname(__file__), "data", "baseline_board.pkl"), "rb") as f:
+            b: Board = pickle.load(f)
+        p1 = b.get_player("playeronesid")
+        self.assertIs(b.active_player, p1)
+        self.assertEqual(p1.current_city, b.get_city("Chicago"))
+        self.assertEqual(p1.actions_left, MAX_ACTIONS)
+        self.assertEqual(p1.city_cards, [CityCard("Tokyo"), CityCard("Essen")])
+        self.assertIs(b.get_player("playertwosid").city_cards[0], CityCard("Paris"))
+        self.assertEqual(b.cities["Tokyo"].disease_count[RED], MAX_DISEASE_COUNT)
+        self.assertEqual(b.cities["Chicago"].disease_count[BLUE], 1)
+        self.assertEqual(b.disease_manager.diseases_remaining[RED], DISEASE_CUBE_LIMIT - MAX_DISEASE_COUNT)
+        self.assertEqual(b.disease_manager.diseases_remaining[BLUE], DISEASE_CUBE_LIMIT - 1)
+        self.assertTrue(b.disease_manager.is_cured(YELLOW))
+        self.assertTrue(b.cities["Paris"].has_research_station)
+        self.assertTrue(b.cities["Atlanta"].has_research_station)
+        self.assertEqual(b.infection_manager.level, 2)
+        self.assertEqual(b.infection_manager.max_outbreak_count, MAX_OUTBREAK_COUNT)
+        cards = b.card_manager
+        self.assertEqual(len(cards.infection_card_discard), 2)
+        self.assertEqual(cards.city_card_discard, [CityCard("Lima")])
+        self.assertEqual(len(cards.infection_card_deck) + 2, NUM_CITIES)
+        self.assertEqual(cards.get_infection_segments(), [list(cards.infection_card_deck)])
+        self.assertTrue(all(card is InfectionCard(card.name) for card in cards.infection_card_deck))
+        # and it plays on, and saves in the current format
+        b.debug = True
+        for city in ["Atlanta", "Chicago"] * 2:
+            b.apply({"name": MOVE_ADJACENT, "args": {"to_city": city}})
+        self.assertEqual(b.active_player.player_id, "playertwosid")
+        copy = pickle.loads(pickle.dumps(b))
+        self.assertEqual(copy.cubes.tolist(), b.cubes.tolist())
+
+    def test_legal_actions(self):
+        b = TestBoard.get_test_board()
+        legal = b.legal_actions()
+        self.assertIn({"name": MOVE_ADJACENT, "args": {"to_city": "Chicago"}}, legal)
+        self.assertNotIn({"name": MOVE_ADJACENT, "args": {"to_city": "Tokyo"}}, legal)
+        self.assertIn({"name": MOVE_DIRECT_FLIGHT, "args": {"city_card": "Tokyo"}}, legal)
+        self.assertIn({"name": MOVE_CHARTER_FLIGHT,
+                       "args": {"city_card": "Atlanta", "to_city": "Lima"}}, legal)
+        # Atlanta already has a research station
+        self.assertFalse(any(a["name"] == BUILD_RESEARCH_STATION for a in legal))
+        self.assertFalse(any(a["name"] == TREAT_DISEASE for a in legal))
+        self.assertIn({"name": SHARE_KNOWLEDGE, "args": {"city_card": "Atlanta", "player_to": "playertwosid",
+                                                         "player_from": "playeronesid"}}, legal)
+        # only the active player gets to act
+        self.assertEqual(b.legal_actions("playertwosid"), [])
+
+    def test_legal_actions_succeed(self):
+        controller = Controller()
+        sim = Simulation(num_players=3, seed=11)
+        for _ in range(12):
+            b = sim.board
+            for action in b.legal_actions():
+                if action["name"] == DISCARD:
+                    continue
+                copy = pickle.loads(pickle.dumps(b))
+                error, _ = controller.apply_action(copy, {ACTION: action})
+                self.assertFalse(error, action)
+            move = sim.policies[b.active_player.player_id].choose_action(b, sim.rng)
+            getattr(b, move[0].name)(*move[1])
+            b.dec_active_player_actions()
+            try:
+                b.check_end_of_actions()
+            except GameEndedError:
+                break
+
+    def get_state(self, b: Board):
+        return (json.dumps(BoardEncoder.encode_board(b), sort_keys=True), b.cubes.tolist(), b.rng.getstate(),
+                [(p.player_id, p.is_active, p.actions_left) for p in b.players.values()])
+
+    def test_clone(self):
+        b = Simulation(num_players=3, seed=5).board
+        b.apply(b.legal_actions()[0])
+        copy = b.clone()
+        self.assertEqual(self.get_state(copy), self.get_state(b))
+        self.assertIs(copy.cities["Atlanta"].connected_cities,
+                      b.cities["Atlanta"].connected_cities)
+        # playing on the copy leaves the original alone
+        before = self.get_state(b)
+        for _ in range(MAX_ACTIONS * 3):
+            try:
+                copy.apply(copy.legal_actions()[0])
+            except GameEndedError:
+                break
+        copy.cities["Tokyo"].disease_count[RED] = 3
+        self.assertEqual(self.get_state(b), before)
+        self.assertNotEqual(self.get_state(copy), before)
+
+    def test_apply_undo(self):
+        rng = random.Random(2)
+        b = Simulation(num_players=4, seed=2).board
+        states = []
+        records = []
+        while len(records) < 60:
+            states.append(self.get_state(b))
+            action = rng.choice(b.legal_actions())
+            records.append(b.apply(action))
+            if records[-1].game_over:
+                break
+        # redo: the same action from the same state does the same thing again
+        after = self.get_state(b)
+        b.undo(records.pop())
+        records.append(b.apply(action))
+        self.assertEqual(self.get_state(b), after)
+        records.append(b.apply({"name": END_TURN, "args": {}}))
+        states.append(after)
+        while records:
+            b.undo(records.pop())
+            self.assertEqual(self.get_state(b), states.pop())
+
+    def test_apply_invalid(self):
+        b = TestBoard.get_test_board()
+        before = self.get_state(b)
+        self.assertRaises(InvalidOperationError, lambda: b.apply(
+            {"name": MOVE_ADJACENT, "args": {"to_city": "Tokyo"}}))
+        self.assertRaises(InvalidOperationError, lambda: b.apply(
+            {"name": MOVE_ADJACENT, "args": {"to_city": "Nowhere"}}))
+        self.assertRaises(InvalidOperationError, lambda: b.apply({"name": "FLY", "args": {}}))
+        # a discard that fails part way through doesn't lose the cards it did find
+        self.assertRaises(InvalidOperationError, lambda: b.apply(
+            {"name": DISCARD, "args": {"city_cards": ["Atlanta", "Paris"], "player": "playeronesid"}}))
+        self.assertEqual(self.get_state(b), before)
+        record = b.apply({"name": DISCARD, "args": {"city_cards": ["Atlanta"], "player": "playeronesid"}})
+        self.assertNotIn(CityCard("Atlanta"), b.active_player.city_cards)
+        self.assertEqual(b.active_player.actions_left, MAX_ACTIONS)
+        b.undo(record)
+        self.assertEqual(self.get_state(b), before)
+
+    def test_failed_actions_change_nothing(self):
+        b = TestBoard.get_test_board()
+        p1 = b.get_player("playeronesid")
+        p2 = b.get_player("playertwosid")
+        before = self.get_state(b)
+        self.assertFalse(b.discard([CityCard("Atlanta"), CityCard("Paris")], p1))
+        self.assertFalse(b.discard([CityCard("Atlanta"), CityCard("Atlanta")], p1))
+        self.assertFalse(b.discover_cure([], BLUE))
+        self.assertFalse(b.treat_disease(BLUE))
+        for name in ["Paris", "Essen", "Milan", "Madrid", "London", "Lagos", "Cairo"]:
+            p2.add_card(CityCard(name))
+        # player two's hand is full, so Atlanta has to stay with player one
+        self.assertFalse(b.share_knowledge(CityCard("Atlanta"), p2, p1))
+        self.assertIn(CityCard("Atlanta"), p1.city_cards)
+        for name in ["Paris", "Essen", "Milan", "Madrid", "London", "Lagos", "Cairo"]:
+            p2.subtract_card(CityCard(name))
+        self.assertEqual(self.get_state(b), before)
+
 if __name__ == '__main__':
     unittest.main()
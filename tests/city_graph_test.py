@@ -0,0 +1,32 @@
+import sys
+sys.path.append('..')
+import unittest
+from board import Board
+from city_graph import *
+from constants import *
+
+
+class TestCityGraph(unittest.TestCase):
+    def test_indices(self):
+        self.assertEqual(len(CITY_NAMES), len(CITY_LIST))
+        for name, color in CITY_LIST.items():
+            self.assertEqual(CITY_NAMES[CITY_INDEX[name]], name)
+            self.assertEqual(COLORS[CITY_COLORS[CITY_INDEX[name]]], color)
+
+    def test_neighbors(self):
+        for name, connections in CITY_CONNECTIONS.items():
+            i = CITY_INDEX[name]
+            self.assertEqual(list(NEIGHBOR_NAMES[i]), connections)
+            self.assertEqual([CITY_NAMES[j] for j in NEIGHBORS[i]], connections)
+            for other in CITY_NAMES:
+                self.assertEqual(is_adjacent(i, CITY_INDEX[other]), other in connections)
+
+    def test_shared_topology(self):
+        b1 = Board(["playeronesid"])
+        b2 = Board(["playeronesid"])
+        self.assertIs(b1.cities["Atlanta"].connected_cities,
+                      b2.cities["Atlanta"].connected_cities)
+
+
+if __name__ == '__main__':
+    unittest.main()
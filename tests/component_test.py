@@ -2,6 +2,8 @@ import sys
 sys.path.append('..')
 import unittest
 import functools
+import pickle
+import random
 from board import *
 from custom_exceptions import GameEndedError
 from constants import *
@@ -183,6 +185,65 @@ class TestCityMethods(unittest.TestCase):
             "San Francisco").add_research_station())
 
 
+class TestOutbreakResolverMethods(unittest.TestCase):
+    def test_infect_report(self):
+        test_map = TestMap()
+        report = OutbreakResolver.infect(
+            test_map.cities, test_map.get_city("Chicago"), BLUE)
+        self.assertEqual(report.outbreaks, [])
+        self.assertEqual(report.cities_hit, ["Chicago"])
+        self.assertEqual(report.cubes_placed, 1)
+
+        test_map.get_city("Chicago").disease_count[BLUE] = 3
+        test_map.get_city("Atlanta").disease_count[BLUE] = 3
+        report = OutbreakResolver.infect(
+            test_map.cities, test_map.get_city("Chicago"), BLUE)
+        self.assertEqual(report.outbreaks, ["Chicago", "Atlanta"])
+        self.assertEqual(report.cubes_placed, len(report.cities_hit))
+        self.assertNotIn("Chicago", report.cities_hit)
+        self.assertNotIn("Atlanta", report.cities_hit)
+        self.assertEqual(test_map.get_city("Washington").disease_count[BLUE], 1)
+        self.assertEqual(test_map.get_city("Chicago").disease_count[BLUE], 3)
+
+    def test_epidemic_cubes(self):
+        test_map = TestMap()
+        test_map.get_city("Chicago").disease_count[BLUE] = 1
+        report = OutbreakResolver.infect(
+            test_map.cities, test_map.get_city("Chicago"), BLUE, MAX_DISEASE_COUNT)
+        self.assertEqual(report.outbreaks, ["Chicago"])
+        self.assertEqual(report.cubes_placed, 2 + len(
+            test_map.get_city("Chicago").connected_cities))
+
+    def test_epidemic_city_outbreaks_once(self):
+        # the epidemic city counts as outbroken from the start of its chain, so a
+        # neighbor's outbreak can't spread back into it and make it outbreak again
+        test_map = TestMap()
+        test_map.get_city("Chicago").disease_count[BLUE] = 1
+        test_map.get_city("Atlanta").disease_count[BLUE] = 3
+        chain = []
+        self.assertTrue(test_map.get_city("Chicago").add_epidemic_disease(
+            test_map.cities, BLUE, chain))
+        self.assertEqual(chain, ["Chicago", "Atlanta"])
+        self.assertEqual(test_map.get_city("Chicago").disease_count[BLUE], 3)
+        self.assertEqual(test_map.get_city("Washington").disease_count[BLUE], 1)
+
+    def test_saturated_board(self):
+        test_map = TestMap()
+        for city in test_map.cities.values():
+            city.disease_count[YELLOW] = MAX_DISEASE_COUNT
+        chain = ["Tokyo"]
+        report = OutbreakResolver.infect(
+            test_map.cities, test_map.get_city("Atlanta"), YELLOW, 1, chain)
+        # every city outbreaks exactly once and nothing else gets a cube
+        self.assertEqual(len(report.outbreaks), len(test_map.cities) - 1)
+        self.assertEqual(len(set(report.outbreaks)), len(report.outbreaks))
+        self.assertNotIn("Tokyo", report.outbreaks)
+        self.assertEqual(report.cubes_placed, 0)
+        self.assertEqual(chain, ["Tokyo"] + report.outbreaks)
+        for city in test_map.cities.values():
+            self.assertEqual(city.disease_count[YELLOW], MAX_DISEASE_COUNT)
+
+
 class TestInfectionManagerMethods(unittest.TestCase):
     def test_infection_manager_init(self):
         infection_manager = InfectionManager()
@@ -282,6 +343,22 @@ class TestCityCardMethods(unittest.TestCase):
         self.assertTrue(test_deck.la != test_deck.mc)
         self.assertTrue(sf != test_deck.mc)
 
+    def test_flyweight(self):
+        sf = CityCard("San Francisco")
+        self.assertIs(sf, CityCard("San Francisco"))
+        self.assertIs(sf, CityCard(sf))
+        self.assertIsNot(sf, InfectionCard("San Francisco"))
+        self.assertIs(pickle.loads(pickle.dumps(sf)), sf)
+        self.assertEqual(hash(sf), hash(InfectionCard("San Francisco")))
+        self.assertRaises(AttributeError, lambda: setattr(sf, "name", "Tokyo"))
+        self.assertRaises(ValueError, lambda: CityCard("Springfield"))
+        self.assertIs(EpidemicCard(), EpidemicCard())
+        self.assertIs(pickle.loads(pickle.dumps(EpidemicCard())), EpidemicCard())
+        # every game deals out the same card objects
+        card = CardManager().infection_card_deck[0]
+        self.assertIn(card, list(CardManager().infection_card_deck))
+        self.assertIs(card, InfectionCard(card.name))
+
 
 class TestInfectionCardMethods(unittest.TestCase):
     def test_infection_card_init(self):
@@ -398,6 +475,56 @@ class TestCardManagerMethods(unittest.TestCase):
         self.assertTrue(bottom_card not in card_manager.infection_card_deck)
         self.assertEqual(card_manager.infection_card_discard, [bottom_card])
 
+    def test_infection_segments(self):
+        card_manager = CardManager()
+        self.assertEqual(card_manager.infection_segments, [len(CITY_LIST)])
+        drawn = card_manager.draw_infection_cards(3)
+        bottom_card = card_manager.handle_epidemic()
+        self.assertEqual(card_manager.infection_segments, [4, len(CITY_LIST) - 4])
+        top, rest = card_manager.get_infection_segments()
+        self.assertEqual(sorted(c.name for c in top), sorted(c.name for c in drawn + [bottom_card]))
+        self.assertEqual(rest, card_manager.infection_card_deck[4:])
+        card_manager.draw_infection_cards(5)
+        self.assertEqual(card_manager.infection_segments, [len(CITY_LIST) - 5])
+        card_manager.draw_bottom_infection_card()
+        self.assertEqual(card_manager.infection_segments, [len(CITY_LIST) - 6])
+        # drawing past the end reshuffles the discards into one run
+        card_manager.draw_infection_cards(len(CITY_LIST) - 4)
+        self.assertEqual(card_manager.infection_segments, [len(card_manager.infection_card_deck)])
+        # changing the deck directly leaves just the one run
+        del card_manager.infection_card_deck[0]
+        self.assertEqual(card_manager.get_infection_segments(), [list(card_manager.infection_card_deck)])
+
+
+class TestHandMethods(unittest.TestCase):
+    def test_add_and_remove(self):
+        hand = Hand([CityCard("Tokyo"), CityCard("Atlanta")])
+        self.assertTrue(CityCard("Tokyo") in hand)
+        self.assertTrue(City("Tokyo") in hand)
+        self.assertFalse(CityCard("Lima") in hand)
+        self.assertFalse(EpidemicCard() in hand)
+        self.assertFalse(hand.add(CityCard("Tokyo")))
+        self.assertTrue(hand.add(CityCard("Osaka")))
+        self.assertEqual(len(hand), 3)
+        self.assertEqual(hand.count_color(RED), 2)
+        self.assertEqual(hand.count_color(BLUE), 1)
+        self.assertTrue(hand.remove(CityCard("Tokyo")))
+        self.assertFalse(hand.remove(CityCard("Tokyo")))
+        self.assertEqual(hand.count_color(RED), 1)
+
+    def test_iteration_and_equality(self):
+        hand = Hand([CityCard("Tokyo"), CityCard("Atlanta")])
+        # iterates in city index order; equal to a list in any order
+        self.assertEqual(list(hand), [CityCard("Atlanta"), CityCard("Tokyo")])
+        self.assertEqual(hand, [CityCard("Tokyo"), CityCard("Atlanta")])
+        self.assertNotEqual(hand, [CityCard("Tokyo")])
+        self.assertEqual(hand, Hand([CityCard("Atlanta"), CityCard("Tokyo")]))
+        self.assertEqual(hand[0], CityCard("Atlanta"))
+        for card in hand:
+            hand.remove(card)
+        self.assertEqual(hand, [])
+        self.assertEqual(pickle.loads(pickle.dumps(Hand([CityCard("Lima")]))), [CityCard("Lima")])
+
 
 class TestPlayerMethods(unittest.TestCase):
     def test_init(self):
@@ -0,0 +1,146 @@
+import sys
+sys.path.append('..')
+import os
+import json
+import tempfile
+import threading
+import unittest
+from board import *
+from constants import *
+from controller import Controller
+from store import PickleGameStore, MemoryGameStore
+
+PLAYER_IDS = ["playeronesid", "playertwosid"]
+NUM_THREADS = 4
+CARDS_PER_THREAD = 6
+
+
+def discard(city: str, player: str) -> str:
+    return json.dumps({"ability": {"name": DISCARD, "args": {"city_cards": [city], "player": player}}})
+
+
+def deal(c: Controller, game_id: str) -> Dict[int, List[str]]:
+    """
+    Fill both players' hands with cards from the city deck, and split those cards up
+    between the threads that will discard them.
+    """
+    b = c.store.load(game_id)
+    held = {card.name for player in b.players.values() for card in player.city_cards}
+    spare = [name for name in CITY_LIST if name not in held]
+    plans = {}
+    for i in range(NUM_THREADS):
+        player = b.get_player(PLAYER_IDS[i % len(PLAYER_IDS)])
+        names = spare[i * CARDS_PER_THREAD:(i + 1) * CARDS_PER_THREAD]
+        for name in names:
+            b.card_manager.city_card_deck.remove(CityCard(name))
+            player.city_cards.add(CityCard(name))
+        plans[i] = names
+    c.store.save(game_id, b)
+    return plans
+
+
+def run_all(targets) -> None:
+    """
+    Start every target at once, with threads switching as often as possible so any race
+    between them has every chance to happen.
+    """
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        barrier = threading.Barrier(len(targets))
+        threads = [threading.Thread(target=lambda t=t: (barrier.wait(), t())) for t in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        sys.setswitchinterval(interval)
+
+
+class TestConcurrentMessages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path_format = os.path.join(self.tmp.name, "game-{}.pickle")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def discard_all(self, c: Controller, game_id: str, plans: Dict[int, List[str]], errors: List[str]):
+        def discard_plan(i):
+            for name in plans[i]:
+                if json.loads(c.handle_input(game_id, discard(name, PLAYER_IDS[i % len(PLAYER_IDS)])))["error"]:
+                    errors.append(name)
+        return [lambda i=i: discard_plan(i) for i in plans]
+
+    def assertAllDiscarded(self, b: Board, plans: Dict[int, List[str]]):
+        for i, names in plans.items():
+            hand = {card.name for card in b.get_player(PLAYER_IDS[i % len(PLAYER_IDS)]).city_cards}
+            self.assertFalse(hand & set(names))
+
+    def test_no_lost_updates(self):
+        c = Controller(PickleGameStore(self.path_format))
+        c.init_board("game", PLAYER_IDS)
+        plans = deal(c, "game")
+        errors = []
+        # every thread moves the active player as well, which races with the discards
+        moves = [lambda: [c.handle_input("game", json.dumps(
+            {"action": {"name": MOVE_ADJACENT, "args": {"to_city": city}}})) for city in ["Chicago", "Atlanta"] * 4]]
+        run_all(self.discard_all(c, "game", plans, errors) + moves)
+        self.assertEqual(errors, [])
+        self.assertAllDiscarded(c.store.load("game"), plans)
+
+    def test_many_games_behind_memory_store(self):
+        backing = PickleGameStore(self.path_format)
+        c = Controller(MemoryGameStore(backing, capacity=2, flush_interval=None))
+        game_ids = ["game{}".format(i) for i in range(5)]
+        plans = {}
+        targets = []
+        errors = []
+        for game_id in game_ids:
+            c.init_board(game_id, PLAYER_IDS)
+            plans[game_id] = deal(c, game_id)
+            targets += self.discard_all(c, game_id, plans[game_id], errors)
+        run_all(targets)
+        c.store.flush()
+        self.assertEqual(errors, [])
+        for game_id in game_ids:
+            self.assertAllDiscarded(backing.load(game_id), plans[game_id])
+
+    def test_games_in_parallel(self):
+        c = Controller(PickleGameStore(self.path_format))
+        c.init_board("busy", PLAYER_IDS)
+        c.init_board("idle", PLAYER_IDS)
+        responses = []
+        with c.get_lock("busy"):
+            thread = threading.Thread(target=lambda: responses.append(c.handle_input("idle", json.dumps(
+                {"action": {"name": MOVE_ADJACENT, "args": {"to_city": "Chicago"}}}))))
+            thread.start()
+            thread.join(timeout=5)
+            self.assertEqual(len(responses), 1)
+            self.assertFalse(json.loads(responses[0])["error"])
+        self.assertIs(c.get_lock("busy"), c.get_lock("busy"))
+        self.assertIsNot(c.get_lock("busy"), c.get_lock("idle"))
+
+    def test_lock_replaced_while_waiting(self):
+        c = Controller(PickleGameStore(self.path_format))
+        c.init_board("game", PLAYER_IDS)
+        held = []
+
+        def wait_for_game():
+            with c.lock_game("game"):
+                held.append((c.locks["game"], c.locks["game"].locked()))
+        with c.lock_game("game"):
+            thread = threading.Thread(target=wait_for_game)
+            thread.start()
+            thread.join(timeout=0.1)
+            self.assertEqual(held, [])
+            old = c.locks["game"]
+            # e.g. the store evicted the game while the thread was waiting for it
+            c.forget("game")
+        thread.join(timeout=5)
+        self.assertEqual(len(held), 1)
+        self.assertIsNot(held[0][0], old)
+        self.assertTrue(held[0][1])
+
+if __name__ == '__main__':
+    unittest.main()
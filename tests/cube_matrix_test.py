@@ -0,0 +1,97 @@
+import sys
+sys.path.append('..')
+import json
+import pickle
+import unittest
+import numpy as np
+from board import Board, City
+from cube_matrix import *
+from constants import *
+from custom_exceptions import GameEndedError
+
+
+class TestCubeCounts(unittest.TestCase):
+    def test_view(self):
+        counts = CubeCounts(new_cube_matrix(1))
+        self.assertEqual(counts, dict.fromkeys(COLORS, 0))
+        counts[RED] = 2
+        counts[GREY] += 1
+        self.assertEqual(counts[RED], 2)
+        self.assertEqual(dict(counts), {BLUE: 0, RED: 2, YELLOW: 0, GREY: 1})
+        self.assertEqual(sum(counts.values()), 3)
+        # plain ints, so the board still serializes
+        self.assertEqual(json.dumps(dict(counts)), json.dumps(
+            {BLUE: 0, RED: 2, YELLOW: 0, GREY: 1}))
+
+    def test_board_cubes(self):
+        b = Board(["playeronesid"])
+        b.cities["Tokyo"].disease_count[RED] = 3
+        self.assertEqual(b.cubes[CITY_INDEX["Tokyo"], COLOR_INDEX[RED]], 3)
+        self.assertEqual(b.cubes.sum(), 3)
+        # standalone cities have their own storage
+        c = City("Tokyo")
+        self.assertEqual(c.disease_count[RED], 0)
+
+    def test_pickle(self):
+        b = Board(["playeronesid"])
+        b.cities["Tokyo"].disease_count[RED] = 2
+        copy = pickle.loads(pickle.dumps(b))
+        self.assertEqual(copy.cities["Tokyo"].disease_count[RED], 2)
+        copy.cities["Tokyo"].disease_count[RED] = 1
+        self.assertEqual(copy.cubes[CITY_INDEX["Tokyo"], COLOR_INDEX[RED]], 1)
+        self.assertEqual(b.cities["Tokyo"].disease_count[RED], 2)
+
+
+class TestCubeQueries(unittest.TestCase):
+    def test_queries(self):
+        cubes = new_cube_matrix()
+        cubes[CITY_INDEX["Tokyo"], COLOR_INDEX[RED]] = 3
+        cubes[CITY_INDEX["Osaka"], COLOR_INDEX[RED]] = 2
+        self.assertEqual(cube_totals(cubes).tolist(), [0, 5, 0, 0])
+        self.assertEqual(cubes_remaining(cubes)[COLOR_INDEX[RED]], DISEASE_CUBE_LIMIT - 5)
+        self.assertFalse(out_of_cubes(cubes))
+        self.assertEqual(saturated_cities(cubes, RED), ["Tokyo"])
+        self.assertEqual(saturated_cities(cubes, BLUE), [])
+        cured = np.array([True, True, False, False])
+        self.assertEqual(eradicable(cubes, cured).tolist(), [True, False, False, False])
+
+    def test_update_disease_counts(self):
+        b = Board(["playeronesid"])
+        b.cities["Tokyo"].disease_count[RED] = 3
+        b.disease_manager.update_disease_counts(b.cubes)
+        self.assertEqual(b.disease_manager.diseases_remaining[RED], DISEASE_CUBE_LIMIT - 3)
+        # a list of cities still works
+        b.disease_manager.update_disease_counts([b.cities["Osaka"]])
+        self.assertEqual(b.disease_manager.diseases_remaining[RED], DISEASE_CUBE_LIMIT)
+        for name in list(CITY_LIST)[:9]:
+            b.cities[name].disease_count[RED] = 3
+        self.assertRaises(GameEndedError,
+                          lambda: b.disease_manager.update_disease_counts(b.cubes))
+
+    def test_treat_disease_eradicates(self):
+        b = Board(["playeronesid"])
+        b.cities["Atlanta"].disease_count[BLUE] = 2
+        b.disease_manager.update_disease_counts(b.cubes)
+        b.disease_manager.cure_disease(BLUE)
+        self.assertTrue(b.treat_disease(BLUE))
+        self.assertTrue(b.disease_manager.is_eradicated(BLUE))
+        self.assertEqual(b.disease_manager.diseases_remaining[BLUE], DISEASE_CUBE_LIMIT)
+
+
+class TestCubeBatch(unittest.TestCase):
+    def test_batch(self):
+        batch = CubeBatch(3)
+        boards = [Board(["playeronesid"], seed=i, cubes=batch.get_cubes(i))
+                  for i in range(len(batch))]
+        boards[1].cities["Tokyo"].disease_count[RED] = 3
+        boards[2].draw_infection_cards_and_place_cubes()
+        self.assertEqual(batch.get_totals()[0].tolist(), [0, 0, 0, 0])
+        self.assertEqual(batch.get_totals()[1].tolist(), [0, 3, 0, 0])
+        self.assertEqual(batch.get_saturated_counts()[1].tolist(), [0, 1, 0, 0])
+        self.assertEqual(batch.get_out_of_cubes().tolist(), [False] * 3)
+        self.assertEqual(batch.get_remaining_dicts()[2],
+                         boards[2].disease_manager.diseases_remaining)
+
+
+if __name__ == '__main__':
+    unittest.main()
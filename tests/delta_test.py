@@ -0,0 +1,129 @@
+import sys
+sys.path.append('..')
+import json
+import copy
+import unittest
+from board import *
+from constants import *
+from controller import Controller
+from delta import BoardTracker, diff_lists, diff_states, apply_patch, SPLICE
+from encoder import BoardEncoder
+from store import GameStore
+
+GAME_ID = "deltagameid"
+PLAYER_IDS = ["playeronesid", "playertwosid"]
+
+
+class DictStore(GameStore):
+    def __init__(self):
+        self.boards = {}
+
+    def load(self, game_id: str) -> Board:
+        return self.boards[game_id]
+
+    def save(self, game_id: str, board: Board, action: dict = None) -> None:
+        self.boards[game_id] = board
+
+
+def move_adjacent(to_city: str) -> str:
+    return json.dumps({"action": {"name": MOVE_ADJACENT, "args": {"to_city": to_city}}})
+
+
+class TestDiff(unittest.TestCase):
+    def test_diff_lists(self):
+        self.assertEqual(diff_lists(["a", "b", "c"], ["c"]), {SPLICE: [0, 2, []]})
+        self.assertEqual(diff_lists(["c"], ["a", "b", "c"]), {SPLICE: [0, 0, ["a", "b"]]})
+        self.assertEqual(diff_lists(["a", "b"], ["a", "c"]), {SPLICE: [1, 1, ["c"]]})
+        self.assertEqual(diff_lists(["a", "b"], []), {SPLICE: [0, 2, []]})
+        for old, new in [(["a", "b", "a"], ["a"]), (["x"], ["y", "x", "x"]), ([], ["q"])]:
+            self.assertEqual(apply_patch({"l": list(old)}, {"l": diff_lists(old, new)}),
+                             {"l": new})
+
+    def test_diff_states(self):
+        old = {"a": {"b": 1, "c": 2}, "d": [1, 2], "e": True}
+        new = {"a": {"b": 1, "c": 3}, "d": [1, 2], "e": False}
+        changes = diff_states(old, new)
+        self.assertEqual(changes, {"a": {"c": 3}, "e": False})
+        self.assertEqual(apply_patch(copy.deepcopy(old), changes), new)
+
+    def test_patch_tracks_board(self):
+        b = Board(PLAYER_IDS)
+        tracker = BoardTracker()
+        client = copy.deepcopy(tracker.resync(b)["state"])
+        b.move_adjacent(b.get_city("Chicago"))
+        b.dec_active_player_actions()
+        patch = tracker.patch(b)
+        self.assertEqual(patch["base"], 0)
+        self.assertEqual(patch["version"], 1)
+        self.assertEqual(list(patch["changes"].keys()), ["players"])
+        b.active_player.actions_left = 0
+        b.check_end_of_actions()
+        b.cities["Tokyo"].add_epidemic_disease(b.cities, RED)
+        apply_patch(client, patch["changes"])
+        apply_patch(client, tracker.patch(b)["changes"])
+        self.assertEqual(client, BoardEncoder.encode_board(b))
+        self.assertEqual(tracker.patch(b), {"version": 2, "base": 2, "changes": {}})
+
+    def test_patch_only_encodes_changes(self):
+        b = Board(PLAYER_IDS, seed=0)
+        tracker = BoardTracker()
+        tracker.resync(b)
+        tokyo = tracker.state["cities"]["Tokyo"]
+        hands = {pid: tracker.state["players"][pid]["city_cards"] for pid in PLAYER_IDS}
+        b.infect_city(b.cities["Atlanta"], BLUE)
+        b.apply({"name": MOVE_ADJACENT, "args": {"to_city": "Chicago"}})
+        tracker.patch(b)
+        self.assertIs(tracker.state["cities"]["Tokyo"], tokyo)
+        self.assertEqual(tracker.state["cities"]["Atlanta"]["disease_count"][BLUE], 1)
+        self.assertIs(tracker.state["players"][PLAYER_IDS[1]]["city_cards"], hands[PLAYER_IDS[1]])
+        b.apply({"name": MOVE_ADJACENT, "args": {"to_city": "Atlanta"}})
+        b.apply({"name": TREAT_DISEASE, "args": {"color": BLUE}})
+        self.assertEqual(tracker.patch(b)["changes"]["cities"], {"Atlanta": {"disease_count": {BLUE: 0}}})
+        b.undo(b.apply({"name": MOVE_ADJACENT, "args": {"to_city": "Chicago"}}))
+        b.cities["Tokyo"].has_research_station = True
+        tracker.patch(b)
+        self.assertEqual(tracker.state, BoardEncoder.encode_board(b))
+        # ends the first player's turn, then the second's, drawing cards and infecting cities
+        for city in ["Chicago"] + ["Chicago", "Atlanta"] * 2 + ["Atlanta"]:
+            b.apply({"name": MOVE_ADJACENT, "args": {"to_city": city}})
+            tracker.patch(b)
+            self.assertEqual(tracker.state, BoardEncoder.encode_board(b))
+
+
+class TestControllerDeltas(unittest.TestCase):
+    def test_deltas(self):
+        c = Controller(DictStore(), deltas=True)
+        resync = json.loads(c.init_board(GAME_ID, PLAYER_IDS))["delta"]
+        self.assertEqual(resync["version"], 0)
+        self.assertEqual(resync["topology"]["cities"]["Atlanta"]["color"], BLUE)
+        client = resync["state"]
+        response = json.loads(c.handle_input(GAME_ID, move_adjacent("Chicago")))
+        self.assertFalse(response["error"])
+        self.assertEqual(response["delta"]["base"], 0)
+        apply_patch(client, response["delta"]["changes"])
+        self.assertEqual(client["players"]["playeronesid"]["current_city"], "Chicago")
+        response = json.loads(c.handle_input(GAME_ID, move_adjacent("Tokyo")))
+        self.assertTrue(response["error"])
+        self.assertEqual(response["delta"]["changes"], {})
+        response = json.loads(c.handle_input(GAME_ID, "[1]"))
+        self.assertTrue(response["error"])
+        self.assertEqual(response["delta"]["changes"], {})
+        resync = json.loads(c.handle_input(GAME_ID, json.dumps({RESYNC: True})))["delta"]
+        self.assertEqual(resync["version"], 1)
+        self.assertEqual(resync["state"], client)
+        self.assertTrue("topology" in resync)
+        resync = json.loads(c.handle_input(GAME_ID, json.dumps(
+            {RESYNC: True, TOPOLOGY_VERSION: resync["topology_version"]})))["delta"]
+        self.assertFalse("topology" in resync)
+
+    def test_patch_smaller_than_board(self):
+        full = Controller(DictStore())
+        delta = Controller(DictStore(), deltas=True)
+        full.init_board(GAME_ID, PLAYER_IDS)
+        delta.init_board(GAME_ID, PLAYER_IDS)
+        self.assertLess(len(delta.handle_input(GAME_ID, move_adjacent("Chicago"))) * 10,
+                        len(full.handle_input(GAME_ID, move_adjacent("Chicago"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import sys
+sys.path.append('..')
+import json
+import unittest
+from board import *
+from constants import *
+from controller import Serializer
+from encoder import BoardEncoder
+
+
+class TestBoardEncoder(unittest.TestCase):
+    def test_topology(self):
+        topology = BoardEncoder.get_topology()
+        self.assertEqual(len(topology["cities"]), len(CITY_LIST))
+        self.assertEqual(topology["cities"]["Atlanta"]["connected_cities"],
+                         CITY_CONNECTIONS["Atlanta"])
+        self.assertEqual(json.loads(BoardEncoder.get_topology_json())["colors"], COLORS)
+        self.assertEqual(BoardEncoder.get_topology_version(),
+                         BoardEncoder.get_topology_version())
+        self.assertIs(BoardEncoder.get_topology_json(), BoardEncoder.get_topology_json())
+
+    def test_encode_board(self):
+        b = Board(["playeronesid", "playertwosid"])
+        b.active_player.add_card(CityCard("Tokyo"))
+        b.cities["Chicago"].add_single_disease(b.cities, BLUE)
+        encoded = BoardEncoder.encode_board(b)
+        self.assertEqual(encoded["active_player"], "playeronesid")
+        self.assertEqual(encoded["cities"]["Chicago"]["disease_count"][BLUE], 1)
+        self.assertTrue(encoded["cities"][STARTING_CITY]["has_research_station"])
+        self.assertFalse("connected_cities" in encoded["cities"]["Chicago"])
+        self.assertEqual(encoded["players"]["playeronesid"]["city_cards"], ["Tokyo"])
+        self.assertEqual(encoded["players"]["playertwosid"]["current_city"], STARTING_CITY)
+        self.assertEqual(len(encoded["card_manager"]["city_card_deck"]),
+                         len(CITY_LIST) + MIN_NUM_EPIDEMIC_CARDS)
+        self.assertEqual(encoded["card_manager"]["city_card_deck"].count(None),
+                         MIN_NUM_EPIDEMIC_CARDS)
+        self.assertEqual(encoded["infection_manager"]["rate"], 2)
+        self.assertEqual(encoded["disease_manager"]["diseases_remaining"][RED], DISEASE_CUBE_LIMIT)
+
+    def test_print_board(self):
+        b = Board(["playeronesid", "playertwosid"])
+        printed = json.loads(Serializer.print_board(b, True))
+        self.assertTrue(printed["error"])
+        self.assertFalse(printed["game_over"])
+        self.assertFalse(TOPOLOGY in printed)
+        self.assertEqual(printed[TOPOLOGY_VERSION], BoardEncoder.get_topology_version())
+        printed = json.loads(Serializer.print_board(b, topology=True))
+        self.assertEqual(printed[TOPOLOGY]["cities"]["Osaka"]["color"], RED)
+        self.assertEqual(printed["board"], BoardEncoder.encode_board(b))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,4 +1,5 @@
 import sys
+import json
 import unittest
 sys.path.append('..')
 from board import *
@@ -65,6 +66,18 @@ class TestAction:
     def get_discover_cure(self, city_cards: List[str], color: str):
         return json.dumps({"action": {"name": DISCOVER_CURE, "args": {"city_cards": city_cards, "color": color}}})
 
+    @classmethod
+    def get_discard(self, city_cards: List[str], player: str):
+        return json.dumps({"ability": {"name": DISCARD, "args": {"city_cards": city_cards, "player": player}}})
+
+    @classmethod
+    def get_end_turn(self):
+        return json.dumps({"ability": {"name": END_TURN, "args": {}}})
+
+    @classmethod
+    def get_batch(self, *msgs: str):
+        return json.dumps({"batch": [json.loads(msg) for msg in msgs]})
+
 
 class TestActionsAndAbilities(unittest.TestCase):
     def assertOkay(self, msg):
@@ -228,8 +241,10 @@ class TestActionsAndAbilities(unittest.TestCase):
                                        TestAction.get_build_research_station("San Francisco")))
         self.assertEqual(c.get_board_object().get_player(
             PLAYER_ONE_ID).actions_left, MAX_ACTIONS - 4)
+        # end of turn draws 2 cards, but epidemics are resolved instead of kept
         self.assertEqual(
-            len(c.get_board_object().get_player(PLAYER_ONE_ID).city_cards), 2)
+            len(c.get_board_object().get_player(PLAYER_ONE_ID).city_cards),
+            2 - (c.get_board_object().infection_manager.level - 1))
 
     def test_take_action_treat_disease(self):
         """
@@ -351,6 +366,91 @@ class TestActionsAndAbilities(unittest.TestCase):
         self.assertFalse(c.get_board_object(
         ).disease_manager.diseases_cured[RED])
 
+    def test_use_ability_discard(self):
+        c: TestController = ExampleController.get_test_controller()
+        c.set_active_player(PLAYER_ONE_ID)
+        c.give_card(CityCard("Tokyo"), PLAYER_TWO_ID)
+        c.give_card(CityCard("Essen"), PLAYER_TWO_ID)
+        self.assertNotOkay(c.handle_input(GAME_ID, TestAction.get_discard(["Tokyo"], "nobody")))
+        self.assertNotOkay(c.handle_input(GAME_ID, TestAction.get_discard(["Nowhere"], PLAYER_TWO_ID)))
+        # abilities can be used outside of the player's turn, and don't use up an action
+        self.assertOkay(c.handle_input(GAME_ID, TestAction.get_discard(["Tokyo", "Essen"], PLAYER_TWO_ID)))
+        b = c.get_board_object()
+        self.assertNotIn(CityCard("Tokyo"), b.get_player(PLAYER_TWO_ID).city_cards)
+        self.assertNotIn(CityCard("Essen"), b.get_player(PLAYER_TWO_ID).city_cards)
+        self.assertEqual(b.active_player.actions_left, MAX_ACTIONS)
+
+    def test_use_ability_end_turn(self):
+        c: TestController = ExampleController.get_test_controller()
+        c.set_active_player(PLAYER_ONE_ID)
+        self.assertOkay(c.handle_input(GAME_ID, TestAction.get_end_turn()))
+        self.assertEqual(c.get_board_object().active_player.player_id, PLAYER_TWO_ID)
+
+    def test_unknown_commands(self):
+        c: TestController = ExampleController.get_test_controller()
+        self.assertNotOkay(c.handle_input(GAME_ID, json.dumps({"action": {"name": "FLY", "args": {}}})))
+        # abilities aren't actions, and the other way around
+        self.assertNotOkay(c.handle_input(GAME_ID, json.dumps({"action": {"name": END_TURN, "args": {}}})))
+        self.assertNotOkay(c.handle_input(GAME_ID, json.dumps(
+            {"ability": {"name": MOVE_ADJACENT, "args": {"to_city": "Chicago"}}})))
+        # valid JSON, but not a message
+        for msg in ["[1]", '"x"', "3", "null"]:
+            self.assertNotOkay(c.handle_input(GAME_ID, msg))
+        # missing args
+        self.assertNotOkay(c.handle_input(GAME_ID, json.dumps({"action": {"name": MOVE_ADJACENT, "args": {}}})))
+        self.assertEqual(c.get_board_object().active_player.current_city.name, "Atlanta")
+
+    def test_batch_whole_turn(self):
+        c: TestController = ExampleController.get_test_controller()
+        c.set_active_player(PLAYER_ONE_ID)
+        before = c.get_board_object()
+        self.assertOkay(c.handle_input(GAME_ID, TestAction.get_batch(
+            *[TestAction.get_move_adjacent(city) for city in ["Chicago", "Montreal", "New York", "Washington"]])))
+        b = c.get_board_object()
+        self.assertEqual(b.get_player(PLAYER_ONE_ID).current_city.name, "Washington")
+        self.assertEqual(b.active_player.player_id, PLAYER_TWO_ID)
+        # an epidemic drawn at the end of the turn doesn't go into the hand
+        epidemics = b.infection_manager.level - before.infection_manager.level
+        self.assertEqual(len(b.get_player(PLAYER_ONE_ID).city_cards),
+                         len(b.get_player(PLAYER_TWO_ID).city_cards) + 2 - epidemics)
+
+    def test_batch_rolled_back(self):
+        c: TestController = ExampleController.get_test_controller()
+        c.set_active_player(PLAYER_ONE_ID)
+        c.give_card(CityCard("Tokyo"), PLAYER_TWO_ID)
+        before = c.get_board_object()
+        moves = [TestAction.get_move_adjacent(city) for city in ["Chicago", "Montreal", "New York", "Washington"]]
+        self.assertNotOkay(c.handle_input(GAME_ID, TestAction.get_batch(*moves[:3], TestAction.get_move_adjacent("Tokyo"))))
+        # the turn had already ended, drawing and infecting, by the time the discard failed
+        self.assertNotOkay(c.handle_input(GAME_ID, TestAction.get_batch(
+            TestAction.get_discard(["Tokyo"], PLAYER_TWO_ID), *moves, TestAction.get_discard(["Tokyo"], PLAYER_TWO_ID))))
+        self.assertNotOkay(c.handle_input(GAME_ID, TestAction.get_batch(
+            moves[0], json.dumps({"ability": {"name": MOVE_ADJACENT, "args": {"to_city": "Atlanta"}}}))))
+        self.assertNotOkay(c.handle_input(GAME_ID, TestAction.get_batch()))
+        b = c.get_board_object()
+        self.assertEqual(b.active_player.player_id, PLAYER_ONE_ID)
+        self.assertEqual(b.active_player.actions_left, MAX_ACTIONS)
+        self.assertEqual(b.active_player.current_city.name, "Atlanta")
+        self.assertIn(CityCard("Tokyo"), b.get_player(PLAYER_TWO_ID).city_cards)
+        self.assertEqual(b.card_manager.infection_card_deck, before.card_manager.infection_card_deck)
+        self.assertEqual(b.card_manager.city_card_deck, before.card_manager.city_card_deck)
+        self.assertEqual(b.cubes.tolist(), before.cubes.tolist())
+
+    def test_malformed_messages(self):
+        c: TestController = ExampleController.get_test_controller()
+        c.set_active_player(PLAYER_ONE_ID)
+        move = json.loads(TestAction.get_move_adjacent("Chicago"))
+        malformed = [{"action": "move"}, {"action": [MOVE_ADJACENT]}, {"action": {"name": [MOVE_ADJACENT]}},
+                     {"action": {"name": MOVE_ADJACENT, "args": ["Chicago"]}},
+                     {"action": {"name": MOVE_ADJACENT, "args": {"to_city": ["Chicago"]}}},
+                     {"ability": {"name": DISCARD, "args": {"city_cards": 3, "player": PLAYER_ONE_ID}}}]
+        for msg in malformed:
+            self.assertNotOkay(c.handle_input(GAME_ID, json.dumps(msg)))
+            self.assertNotOkay(c.handle_input(GAME_ID, json.dumps({"batch": [move, msg]})))
+        self.assertNotOkay(c.handle_input(GAME_ID, json.dumps({"batch": [move, 1]})))
+        self.assertEqual(c.get_board_object().active_player.current_city.name, "Atlanta")
+        self.assertEqual(c.get_board_object().active_player.actions_left, MAX_ACTIONS)
+
 
 if __name__ == "__main__":
     unittest.main()
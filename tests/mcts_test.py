@@ -0,0 +1,80 @@
+import sys
+sys.path.append('..')
+import json
+import random
+import unittest
+from board import *
+from constants import *
+from controller import Controller
+from encoder import BoardEncoder
+from enums import ActionList
+from mcts import MCTSPolicy
+from simulation import RandomPolicy, Simulation, WON
+from store import MemoryGameStore
+
+
+class TestMCTSPolicy(unittest.TestCase):
+    def test_search(self):
+        b = Simulation(num_players=3, seed=4).board
+        before = json.dumps(BoardEncoder.encode_board(b), sort_keys=True)
+        rng_state = b.rng.getstate()
+        policy = MCTSPolicy(iterations=50)
+        action = policy.search(b, random.Random(0))
+        self.assertIn(action, b.legal_actions())
+        # the live board is never touched
+        self.assertEqual(json.dumps(BoardEncoder.encode_board(b), sort_keys=True), before)
+        self.assertEqual(b.rng.getstate(), rng_state)
+        self.assertEqual(policy.stats.iterations, 50)
+        self.assertEqual(policy.stats.searches, 1)
+        self.assertGreater(policy.stats.iterations_per_second(), 0)
+
+    def test_budget(self):
+        b = Simulation(num_players=2, seed=4).board
+        policy = MCTSPolicy(iterations=10 ** 9, seconds=0.05)
+        policy.search(b, random.Random(0))
+        self.assertLess(policy.stats.seconds, 1)
+        # always searches at least once
+        policy = MCTSPolicy(iterations=10 ** 9, seconds=0)
+        self.assertIsNotNone(policy.search(b, random.Random(0)))
+        self.assertEqual(policy.stats.iterations, 1)
+
+    def test_choose_action(self):
+        b = Simulation(num_players=2, seed=7).board
+        move = MCTSPolicy(iterations=20).choose_action(b, random.Random(1))
+        self.assertIsInstance(move[0], ActionList)
+        self.assertTrue(getattr(b, move[0].name)(*move[1]))
+
+    def test_play(self):
+        sim = Simulation(num_players=2, seed=3, policies=[MCTSPolicy(iterations=10)] * 2)
+        result = sim.play()
+        self.assertNotEqual(result.reason, "Hit turn limit")
+        self.assertEqual(result.won, result.reason == WON)
+
+    def test_beats_random(self):
+        # over the same seeds, search should cure something the random policy never does,
+        # without losing any sooner
+        mcts_cures = mcts_turns = random_cures = random_turns = 0
+        for seed in range(10):
+            result = Simulation(num_players=2, seed=seed,
+                                policies=[MCTSPolicy(iterations=100, rollout_depth=2)] * 2).play()
+            mcts_cures += result.cures
+            mcts_turns += result.turns
+            result = Simulation(num_players=2, seed=seed, policies=[RandomPolicy()] * 2).play()
+            random_cures += result.cures
+            random_turns += result.turns
+        self.assertGreater(mcts_cures, random_cures)
+        self.assertGreaterEqual(mcts_turns, random_turns)
+
+    def test_controller(self):
+        controller = Controller(MemoryGameStore())
+        controller.init_board("somegameidhere", ["playeronesid", "playertwosid"])
+        policy = MCTSPolicy(iterations=20)
+        rng = random.Random(0)
+        for _ in range(MAX_ACTIONS):
+            b = controller.store.load("somegameidhere")
+            msg = policy.choose_message(b, rng)
+            self.assertFalse(json.loads(controller.handle_input("somegameidhere", msg))["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
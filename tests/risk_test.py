@@ -0,0 +1,140 @@
+import sys
+sys.path.append('..')
+import random
+import unittest
+from board import *
+from custom_exceptions import GameEndedError
+from constants import *
+from mcts import MCTSPolicy
+from risk import RiskEstimator, draw_probability, epidemic_probability, spread
+from simulation import Simulation
+
+
+def play_turns(seed: int, turns: int) -> Board:
+    """
+    A board some way into a game, with nobody doing anything about the infections.
+    """
+    b = Simulation(num_players=2, seed=seed, num_epidemic_cards=6, max_outbreak_count=1000).board
+    try:
+        for _ in range(turns):
+            b.active_player.actions_left = 0
+            b.check_end_of_actions()
+    except GameEndedError:
+        # out of cubes, which doesn't stop the cards being worked out
+        pass
+    return b
+
+
+def sample(board: Board, samples: int, rng: random.Random):
+    """
+    How often each city's card comes up and each city outbreaks at the end of the turn,
+    playing it out on copies of the board with the unseen cards shuffled.
+    """
+    infected = dict.fromkeys(board.cities, 0)
+    outbroken = dict.fromkeys(board.cities, 0)
+    policy = MCTSPolicy()
+    for _ in range(samples):
+        state = policy.determinize(board, rng)
+        cards = state.card_manager
+        came_up = []
+        reports = []
+        for card in cards.draw_city_cards():
+            if isinstance(card, EpidemicCard):
+                state.infection_manager.increase_level()
+                bottom_card = cards.handle_epidemic()
+                came_up.append(bottom_card)
+                reports.append(OutbreakResolver.infect(
+                    state.cities, state.cities[bottom_card.name], bottom_card.color, MAX_DISEASE_COUNT))
+        for card in cards.draw_infection_cards(state.infection_manager.rate):
+            came_up.append(card)
+            reports.append(OutbreakResolver.infect(state.cities, state.cities[card.name], card.color))
+        for name in {card.name for card in came_up}:
+            infected[name] += 1
+        for name in {name for report in reports for name in report.outbreaks}:
+            outbroken[name] += 1
+    return ({name: n / samples for name, n in infected.items()},
+            {name: n / samples for name, n in outbroken.items()})
+
+
+class TestCombinatorics(unittest.TestCase):
+    def test_draw_probability(self):
+        # 2 of 4 cards: C(4, 2) = 6 ways
+        self.assertAlmostEqual(draw_probability(4, 0, 1, 2), 3 / 6)
+        self.assertAlmostEqual(draw_probability(4, 1, 0, 2), 3 / 6)
+        self.assertAlmostEqual(draw_probability(4, 2, 0, 2), 1 / 6)
+        self.assertAlmostEqual(draw_probability(4, 1, 1, 2), 2 / 6)
+        self.assertEqual(draw_probability(4, 0, 3, 2), 0)
+        self.assertEqual(draw_probability(4, 3, 0, 2), 0)
+        self.assertEqual(draw_probability(4, 0, 4, 0), 1)
+
+    def test_epidemic_probability(self):
+        self.assertAlmostEqual(sum(epidemic_probability(10, 3, n) for n in range(3)), 1)
+        self.assertAlmostEqual(epidemic_probability(10, 3, 2), 3 / 45)
+        self.assertEqual(epidemic_probability(10, 0, 1), 0)
+        self.assertEqual(epidemic_probability(1, 1, 1), 0)
+
+    def test_spread(self):
+        # the same outcome as OutbreakResolver on a crowded board
+        b = play_turns(0, 12)
+        for color in COLORS:
+            column = COLORS.index(color)
+            counts = b.cubes[:, column].tolist()
+            for name, city in b.cities.items():
+                for cubes in [1, MAX_DISEASE_COUNT]:
+                    chain = spread(counts, city.index, cubes)
+                    copy = b.clone()
+                    report = OutbreakResolver.infect(copy.cities, copy.cities[name], color, cubes)
+                    self.assertEqual(chain.outbroken, sum(1 << b.cities[n].index for n in report.outbreaks))
+                    self.assertEqual(chain.apply(counts), copy.cubes[:, column].tolist())
+
+
+class TestRiskEstimator(unittest.TestCase):
+    def test_matches_sampling(self):
+        for seed, turns in [(2, 9), (8, 2)]:
+            b = play_turns(seed, turns)
+            report = RiskEstimator.estimate(b)
+            infected, outbroken = sample(b, 3000, random.Random(seed))
+            self.assertAlmostEqual(sum(report.infection.values()), sum(infected.values()), delta=0.1)
+            for name in b.cities:
+                self.assertAlmostEqual(report.infection[name], infected[name], delta=0.04)
+                self.assertAlmostEqual(report.outbreak[name], outbroken[name], delta=0.05)
+
+    def test_epidemic(self):
+        b = play_turns(1, 3)
+        cards = b.card_manager
+        epidemics = sum(isinstance(card, EpidemicCard) for card in cards.city_card_deck)
+        n = len(cards.city_card_deck)
+        report = RiskEstimator.estimate(b)
+        self.assertAlmostEqual(report.epidemic, 1 - (n - epidemics) * (n - epidemics - 1) / (n * (n - 1)))
+        # the bottom run could be drawn by an epidemic, the top run by the infection
+        top, bottom = cards.get_infection_segments()
+        self.assertGreater(min(report.infection[card.name] for card in top), 0.1)
+        self.assertLess(max(report.infection[card.name] for card in bottom), 0.05)
+        self.assertGreater(min(report.infection[card.name] for card in bottom), 0)
+
+    def test_certain(self):
+        b = Board(["p1", "p2"], seed=0)
+        cards = b.card_manager
+        # no epidemics left and a city on three cubes on top of the infection deck
+        for _ in range(cards.number_of_epidemic_cards):
+            b.infection_manager.increase_level()
+        card = cards.infection_card_deck[0]
+        b.cities[card.name].add_epidemic_disease(b.cities, card.color)
+        cards.infection_segments = [1, len(cards.infection_card_deck) - 1]
+        report = RiskEstimator.estimate(b)
+        self.assertEqual(report.epidemic, 0)
+        self.assertEqual(report.infection[card.name], 1)
+        self.assertEqual(report.outbreak[card.name], 1)
+        self.assertAlmostEqual(sum(report.infection.values()), b.infection_manager.rate)
+
+    def test_out_of_city_cards(self):
+        b = Board(["p1", "p2"], seed=0)
+        del b.card_manager.city_card_deck[1:]
+        report = RiskEstimator.estimate(b)
+        self.assertEqual(report.epidemic, 0)
+        self.assertEqual(sum(report.infection.values()), 0)
+        self.assertEqual(sum(report.outbreak.values()), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+import sys
+sys.path.append('..')
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from board import *
+from constants import *
+from simulation import Simulation, RandomPolicy, GreedyPolicy, run_batch, run_parallel, derive_seed, WON
+
+
+class TestSimulation(unittest.TestCase):
+    def test_setup(self):
+        sim = Simulation(num_players=4, seed=1)
+        b = sim.board
+        for p in b.players.values():
+            self.assertEqual(len(p.city_cards), 2)
+        self.assertEqual(len(b.card_manager.infection_card_discard), 9)
+        self.assertEqual(sum(b.disease_manager.diseases_remaining.values()),
+                         DISEASE_CUBE_LIMIT * len(COLORS) - 18)
+
+    def test_play_is_deterministic(self):
+        first = Simulation(seed=42).play()
+        second = Simulation(seed=42).play()
+        self.assertEqual(vars(first), vars(second))
+
+    def test_play_finishes(self):
+        for seed in range(10):
+            sim = Simulation(num_players=2, seed=seed, policies=[RandomPolicy(), GreedyPolicy()])
+            result = sim.play()
+            self.assertNotEqual(result.reason, "Hit turn limit")
+            self.assertEqual(result.won, result.reason == WON)
+            for p in sim.board.players.values():
+                self.assertLessEqual(len(p.city_cards), MAX_HAND_COUNT)
+                self.assertFalse(any(isinstance(c, EpidemicCard) for c in p.city_cards))
+
+    def test_disease_counts_stay_in_sync(self):
+        # debug boards raise InvalidOperationError if the running totals drift from the board
+        report = run_batch(20, seed=0, debug=True)
+        self.assertEqual(report.games, 20)
+
+    def test_concurrent_games_are_isolated(self):
+        def play(seed):
+            return vars(Simulation(seed=seed).play())
+        expected = [play(seed) for seed in range(40)]
+        self.assertGreater(sum(r["outbreaks"] for r in expected), 0)
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            for _ in range(3):
+                self.assertEqual(list(pool.map(play, range(40))), expected)
+
+    def test_difficulty_settings(self):
+        sim = Simulation(seed=3, num_epidemic_cards=6, max_outbreak_count=2)
+        self.assertEqual(len(sim.board.card_manager.city_card_deck) +
+                         sum(len(p.city_cards) for p in sim.board.players.values()),
+                         len(CITY_LIST) + 6)
+        result = sim.play()
+        self.assertLessEqual(result.outbreaks, 2)
+
+    def test_run_batch(self):
+        results = []
+        report = run_batch(20, seed=5, num_players=3, on_result=results.append)
+        self.assertEqual(report.games, 20)
+        self.assertEqual(sum(report.reasons.values()), 20)
+        self.assertEqual([r.seed for r in results], [derive_seed(5, i) for i in range(20)])
+        self.assertGreater(report.games_per_second(), 0)
+
+    def test_derive_seed(self):
+        self.assertEqual(derive_seed(1, 2), derive_seed(1, 2))
+        self.assertEqual(len({derive_seed(s, i) for s in range(10) for i in range(10)}), 100)
+
+    def test_run_parallel_matches_serial(self):
+        serial = []
+        run_batch(12, seed=9, num_players=2, on_result=serial.append)
+        for workers in [1, 2]:
+            parallel = []
+            report = run_parallel(12, 9, workers=workers, chunk_size=5,
+                                  num_players=2, on_result=parallel.append)
+            self.assertEqual(report.games, 12)
+            self.assertEqual(sorted(map(str, parallel)), sorted(map(str, serial)))
+            self.assertEqual(sorted(vars(r)["cubes_remaining"][RED] for r in parallel),
+                             sorted(vars(r)["cubes_remaining"][RED] for r in serial))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,332 @@
+import sys
+sys.path.append('..')
+import gc
+import os
+import json
+import time
+import tempfile
+import random
+import unittest
+from board import *
+from constants import *
+from controller import Controller
+from store import GameStore, PickleGameStore, MemoryGameStore, JournalGameStore
+
+GAME_ID = "storegameid"
+PLAYER_IDS = ["playeronesid", "playertwosid"]
+
+
+class CountingStore(GameStore):
+    """
+    Backing store that keeps boards in a dict and counts how often it's hit.
+    """
+
+    def __init__(self):
+        self.boards = {}
+        self.loads = 0
+        self.saves = 0
+
+    def load(self, game_id: str) -> Board:
+        self.loads += 1
+        return self.boards[game_id]
+
+    def save(self, game_id: str, board: Board, action: dict = None) -> None:
+        self.saves += 1
+        self.boards[game_id] = board
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    """
+    Poll until condition() is true, or give up after timeout seconds.
+    """
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def move_adjacent(to_city: str) -> str:
+    return json.dumps({"action": {"name": MOVE_ADJACENT, "args": {"to_city": to_city}}})
+
+
+def batch(*cities: str) -> str:
+    return json.dumps({"batch": [json.loads(move_adjacent(city)) for city in cities]})
+
+
+class TestPickleGameStore(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            store = PickleGameStore(os.path.join(tmp, "game-{}.pickle"))
+            b = Board(PLAYER_IDS)
+            store.save(GAME_ID, b)
+            loaded = store.load(GAME_ID)
+            self.assertIsNot(loaded, b)
+            self.assertEqual(loaded.active_player, b.active_player)
+            self.assertRaises(KeyError, store.load, "nosuchgame")
+
+
+class TestMemoryGameStore(unittest.TestCase):
+    def test_load_is_resident(self):
+        backing = CountingStore()
+        store = MemoryGameStore(backing, flush_interval=None)
+        b = Board(PLAYER_IDS)
+        store.save(GAME_ID, b)
+        self.assertIs(store.load(GAME_ID), b)
+        self.assertIs(store.load(GAME_ID), b)
+        self.assertEqual(backing.loads, 0)
+        self.assertEqual(backing.saves, 0)
+
+    def test_write_behind(self):
+        backing = CountingStore()
+        store = MemoryGameStore(backing, flush_interval=None)
+        store.save(GAME_ID, Board(PLAYER_IDS))
+        store.save(GAME_ID, store.load(GAME_ID))
+        self.assertEqual(backing.saves, 0)
+        store.flush()
+        self.assertEqual(backing.saves, 1)
+        store.flush()
+        self.assertEqual(backing.saves, 1)
+
+    def test_flush_interval(self):
+        backing = CountingStore()
+        store = MemoryGameStore(backing, flush_interval=0)
+        store.save(GAME_ID, Board(PLAYER_IDS))
+        self.assertEqual(backing.saves, 1)
+
+    def test_background_flush(self):
+        backing = CountingStore()
+        store = MemoryGameStore(backing, flush_interval=0.05)
+        store.save(GAME_ID, Board(PLAYER_IDS))
+        self.assertEqual(backing.saves, 0)
+        self.assertTrue(wait_for(lambda: backing.saves == 1))
+        self.assertEqual(store.dirty, {})
+        store.close()
+        self.assertFalse(store.flusher.is_alive())
+
+    def test_background_flush_skips_busy_game(self):
+        backing = CountingStore()
+        c = Controller(MemoryGameStore(backing, flush_interval=0.05))
+        c.init_board(GAME_ID, PLAYER_IDS)
+        with c.get_lock(GAME_ID):
+            time.sleep(0.2)
+            self.assertEqual(backing.saves, 0)
+        self.assertTrue(wait_for(lambda: backing.saves == 1))
+        c.close()
+
+    def test_close_flushes(self):
+        backing = CountingStore()
+        c = Controller(MemoryGameStore(backing, flush_interval=None))
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, move_adjacent("Chicago"))
+        self.assertEqual(backing.saves, 0)
+        c.close()
+        self.assertEqual(backing.saves, 1)
+        self.assertEqual(backing.boards[GAME_ID].active_player.current_city, City("Chicago"))
+
+    def test_flusher_lets_store_be_collected(self):
+        store = MemoryGameStore(CountingStore(), flush_interval=0.01)
+        flusher = store.flusher
+        del store
+        gc.collect()
+        flusher.join(timeout=5)
+        self.assertFalse(flusher.is_alive())
+
+    def test_lru_eviction(self):
+        backing = CountingStore()
+        store = MemoryGameStore(backing, capacity=2, flush_interval=None)
+        boards = {gid: Board(PLAYER_IDS) for gid in ["a", "b", "c"]}
+        store.save("a", boards["a"])
+        store.save("b", boards["b"])
+        store.load("a")
+        store.save("c", boards["c"])
+        self.assertEqual(list(store.boards.keys()), ["a", "c"])
+        self.assertIs(backing.boards["b"], boards["b"])
+        self.assertIs(store.load("b"), boards["b"])
+        self.assertEqual(backing.loads, 1)
+        self.assertEqual(list(store.boards.keys()), ["c", "b"])
+
+    def test_eviction_skips_busy_games(self):
+        backing = CountingStore()
+        c = Controller(MemoryGameStore(backing, capacity=1, flush_interval=None))
+        c.init_board("a", PLAYER_IDS)
+        with c.get_lock("a"):
+            c.init_board("b", PLAYER_IDS)
+        self.assertEqual(list(c.store.boards.keys()), ["a", "b"])
+        self.assertEqual(backing.saves, 0)
+        self.assertFalse(json.loads(c.handle_input("b", move_adjacent("Chicago")))["error"])
+        self.assertEqual(list(c.store.boards.keys()), ["b"])
+        self.assertIn("a", backing.boards)
+        self.assertNotIn("a", c.locks)
+
+    def test_discard_forgets_game(self):
+        c = Controller(MemoryGameStore(CountingStore(), flush_interval=None), deltas=True)
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, move_adjacent("Chicago"))
+        self.assertIn(GAME_ID, c.locks)
+        self.assertIn(GAME_ID, c.trackers)
+        c.store.discard(GAME_ID)
+        self.assertNotIn(GAME_ID, c.locks)
+        self.assertNotIn(GAME_ID, c.trackers)
+
+    def test_controller_with_memory_store(self):
+        backing = CountingStore()
+        c = Controller(MemoryGameStore(backing, flush_interval=None))
+        c.init_board(GAME_ID, PLAYER_IDS)
+        self.assertFalse(json.loads(c.handle_input(
+            GAME_ID, move_adjacent("Chicago")))["error"])
+        self.assertTrue(json.loads(c.handle_input(
+            GAME_ID, move_adjacent("Tokyo")))["error"])
+        self.assertTrue(json.loads(c.handle_input(GAME_ID, "not json"))["error"])
+        self.assertEqual(c.store.load(GAME_ID).active_player.current_city,
+                         City("Chicago"))
+        self.assertEqual(backing.saves, 0)
+        c.store.flush()
+        self.assertEqual(backing.saves, 1)
+        self.assertEqual(backing.boards[GAME_ID].active_player.actions_left,
+                         MAX_ACTIONS - 1)
+
+    def test_failed_action_not_saved(self):
+        backing = CountingStore()
+        c = Controller(backing)
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, move_adjacent("Tokyo"))
+        c.handle_input(GAME_ID, "not json")
+        self.assertEqual(backing.saves, 1)
+        c.handle_input(GAME_ID, move_adjacent("Chicago"))
+        self.assertEqual(backing.saves, 2)
+
+    def test_batch_saved_once(self):
+        backing = CountingStore()
+        c = Controller(backing)
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, batch("Chicago", "Montreal", "New York", "Tokyo"))
+        self.assertEqual(backing.saves, 1)
+        c.handle_input(GAME_ID, batch("Chicago", "Montreal", "New York", "Washington"))
+        self.assertEqual(backing.saves, 2)
+
+
+class TestJournalGameStore(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path_format = os.path.join(self.tmp.name, "game-{}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def get_controller(self, snapshot_interval: int = 50) -> Controller:
+        return Controller(JournalGameStore(self.path_format, snapshot_interval))
+
+    def get_journal_lines(self):
+        with open(self.path_format.format(GAME_ID) + ".journal") as f:
+            return f.readlines()
+
+    def test_replay(self):
+        c = self.get_controller()
+        c.init_board(GAME_ID, PLAYER_IDS)
+        for city in ["Chicago", "Montreal", "Tokyo", "New York"]:
+            c.handle_input(GAME_ID, move_adjacent(city))
+        self.assertEqual(len(self.get_journal_lines()), 3)
+        b = self.get_controller().store.load(GAME_ID)
+        self.assertEqual(b.active_player.current_city, City("New York"))
+        self.assertEqual(b.active_player.actions_left, MAX_ACTIONS - 3)
+
+    def test_snapshot_interval(self):
+        c = self.get_controller(snapshot_interval=2)
+        c.init_board(GAME_ID, PLAYER_IDS)
+        for city in ["Chicago", "Montreal", "New York"]:
+            c.handle_input(GAME_ID, move_adjacent(city))
+        self.assertEqual(len(self.get_journal_lines()), 1)
+        b = self.get_controller(snapshot_interval=2).store.load(GAME_ID)
+        self.assertEqual(b.active_player.current_city, City("New York"))
+        self.assertEqual(b.active_player.actions_left, MAX_ACTIONS - 3)
+
+    def test_torn_write(self):
+        c = self.get_controller()
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, move_adjacent("Chicago"))
+        with open(self.path_format.format(GAME_ID) + ".journal", "a") as f:
+            f.write('{"seq": 2, "action": {"act')
+        b = self.get_controller().store.load(GAME_ID)
+        self.assertEqual(b.active_player.current_city, City("Chicago"))
+
+    def test_append_after_torn_write(self):
+        c = self.get_controller()
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, move_adjacent("Chicago"))
+        with open(self.path_format.format(GAME_ID) + ".journal", "a") as f:
+            f.write('{"seq": 2, "action": {"act')
+        self.assertFalse(json.loads(c.handle_input(GAME_ID, move_adjacent("Montreal")))["error"])
+        self.assertFalse(json.loads(c.handle_input(GAME_ID, move_adjacent("New York")))["error"])
+        self.assertEqual(len(self.get_journal_lines()), 3)
+        b = self.get_controller().store.load(GAME_ID)
+        self.assertEqual(b.active_player.current_city, City("New York"))
+        self.assertEqual(b.active_player.actions_left, MAX_ACTIONS - 3)
+
+    def test_rng_state_recorded(self):
+        store = JournalGameStore(self.path_format)
+        Controller(store)
+        store.save(GAME_ID, Board(PLAYER_IDS))
+        store.save(GAME_ID, store.load(GAME_ID), json.loads(move_adjacent("Chicago")))
+        b = store.load(GAME_ID)
+        before = b.rng.getstate()
+        random.random()
+        store.save(GAME_ID, b, json.loads(move_adjacent("Atlanta")))
+        b.rng.random()
+        store.save(GAME_ID, b, json.loads(move_adjacent("Chicago")))
+        entries = [json.loads(line) for line in self.get_journal_lines()]
+        self.assertIsNone(entries[0]["rng"])
+        self.assertIsNone(entries[1]["rng"])
+        self.assertEqual(JournalGameStore.decode_rng_state(entries[2]["rng"]), before)
+
+    def test_replay_draws_same_cards(self):
+        c = Controller(MemoryGameStore(JournalGameStore(self.path_format)))
+        c.init_board(GAME_ID, PLAYER_IDS)
+        for _ in range(6):
+            for city in ["Chicago", "Atlanta"] * 2:
+                c.handle_input(GAME_ID, move_adjacent(city))
+        live = c.store.load(GAME_ID)
+        replayed = self.get_controller().store.load(GAME_ID)
+        self.assertEqual(replayed.card_manager.infection_card_deck,
+                         live.card_manager.infection_card_deck)
+        self.assertEqual(replayed.rng.getstate(), live.rng.getstate())
+
+    def test_replay_batch(self):
+        c = self.get_controller()
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, move_adjacent("Chicago"))
+        c.handle_input(GAME_ID, batch("Montreal", "New York", "Washington"))
+        c.handle_input(GAME_ID, batch("Chicago", "Tokyo"))
+        self.assertEqual(len(self.get_journal_lines()), 2)
+        live = c.store.load(GAME_ID)
+        replayed = self.get_controller().store.load(GAME_ID)
+        self.assertEqual(replayed.players[PLAYER_IDS[0]].current_city, City("Washington"))
+        self.assertEqual(replayed.active_player.player_id, PLAYER_IDS[1])
+        self.assertEqual(replayed.card_manager.infection_card_deck, live.card_manager.infection_card_deck)
+
+    def test_failed_action_rolled_back(self):
+        c = Controller(MemoryGameStore(JournalGameStore(self.path_format)))
+        c.init_board(GAME_ID, PLAYER_IDS)
+        b = c.store.load(GAME_ID)
+        b.players[PLAYER_IDS[0]].city_cards = Hand([CityCard("Tokyo")])
+        c.store.save(GAME_ID, b)
+        # Tokyo is discarded before Essen turns out not to be in the hand
+        self.assertTrue(json.loads(c.handle_input(GAME_ID, json.dumps({"ability": {
+            "name": DISCARD, "args": {"city_cards": ["Tokyo", "Essen"], "player": PLAYER_IDS[0]}}})))["error"])
+        self.assertEqual(c.store.load(GAME_ID).players[PLAYER_IDS[0]].city_cards, [CityCard("Tokyo")])
+        replayed = self.get_controller().store.load(GAME_ID)
+        self.assertEqual(replayed.players[PLAYER_IDS[0]].city_cards, [CityCard("Tokyo")])
+
+    def test_behind_memory_store(self):
+        c = Controller(MemoryGameStore(JournalGameStore(self.path_format)))
+        c.init_board(GAME_ID, PLAYER_IDS)
+        c.handle_input(GAME_ID, move_adjacent("Chicago"))
+        c.handle_input(GAME_ID, move_adjacent("Montreal"))
+        self.assertEqual(len(self.get_journal_lines()), 2)
+        b = self.get_controller().store.load(GAME_ID)
+        self.assertEqual(b.active_player.current_city, City("Montreal"))
+
+
+if __name__ == '__main__':
+    unittest.main()
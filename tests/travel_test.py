@@ -0,0 +1,101 @@
+import sys
+sys.path.append('..')
+import pickle
+import random
+import unittest
+from collections import deque
+from board import *
+from city_graph import *
+from constants import *
+from simulation import Simulation
+from travel import TravelOracle
+
+
+def search_cost(board: Board, from_index: int, to_index: int, cards: list) -> int:
+    """
+    Breadth-first search over (city, card spent) for the fewest actions, spending at most one card.
+    """
+    stations = [c.index for c in board.cities.values() if c.has_research_station]
+    seen = {(from_index, False): 0}
+    queue = deque([(from_index, False)])
+    while queue:
+        state = queue.popleft()
+        city, spent = state
+        if city == to_index:
+            return seen[state]
+        steps = [(j, spent) for j in NEIGHBORS[city]]
+        if city in stations:
+            steps.extend((s, spent) for s in stations)
+        if not spent:
+            for card in cards:
+                steps.append((card.index, True))
+                if card.index == city:
+                    steps.extend((j, True) for j in range(NUM_CITIES))
+        for step in steps:
+            if step not in seen:
+                seen[step] = seen[state] + 1
+                queue.append(step)
+
+
+class TestTravelOracle(unittest.TestCase):
+    def test_distances(self):
+        self.assertEqual(DISTANCES[CITY_INDEX["Atlanta"]][CITY_INDEX["Atlanta"]], 0)
+        self.assertEqual(DISTANCES[CITY_INDEX["Atlanta"]][CITY_INDEX["Chicago"]], 1)
+        self.assertEqual(DISTANCES[CITY_INDEX["Atlanta"]][CITY_INDEX["Montreal"]], 2)
+        for i in range(NUM_CITIES):
+            for j in NEIGHBORS[i]:
+                self.assertEqual(DISTANCES[i][j], 1)
+
+    def test_costs(self):
+        rng = random.Random(0)
+        b = Board(["playeronesid"])
+        oracle = TravelOracle(b)
+        for _ in range(4):
+            # stations are built on the board after the oracle is, so it has to keep up
+            b.cities[rng.choice(CITY_NAMES)].add_research_station()
+            cards = [CITY_CARDS[i] for i in rng.sample(range(NUM_CITIES), rng.randrange(3))]
+            for from_index in rng.sample(range(NUM_CITIES), 6):
+                costs = oracle.get_costs(CITY_NAMES[from_index], cards)
+                for to_index in range(NUM_CITIES):
+                    expected = search_cost(b, from_index, to_index, cards)
+                    self.assertEqual(costs[to_index], expected)
+                    self.assertEqual(oracle.get_cost(
+                        CITY_NAMES[from_index], CITY_NAMES[to_index], cards), expected)
+
+    def test_player_cost(self):
+        b = Board(["playeronesid"])
+        oracle = TravelOracle(b)
+        p = b.active_player
+        self.assertEqual(oracle.get_player_cost(p, "Tokyo"), DISTANCES[CITY_INDEX["Atlanta"]][CITY_INDEX["Tokyo"]])
+        p.add_card(CityCard("Tokyo"))
+        self.assertEqual(oracle.get_player_cost("playeronesid", "Tokyo"), 1)
+        p.add_card(CityCard("Atlanta"))
+        self.assertEqual(oracle.get_player_cost(p, "Santiago"), 1)
+
+    def test_stations_change(self):
+        b = Simulation(num_players=2, seed=1).board
+        oracle = TravelOracle(b)
+        tokyo, osaka, atlanta = CITY_INDEX["Tokyo"], CITY_INDEX["Osaka"], CITY_INDEX["Atlanta"]
+        self.assertEqual(oracle.get_cost("Tokyo", "Atlanta"), DISTANCES[tokyo][atlanta])
+        p = b.active_player
+        p.current_city = b.cities["Tokyo"]
+        p.add_card(CityCard("Tokyo"))
+        record = b.apply({"name": BUILD_RESEARCH_STATION, "args": {"city_card": "Tokyo"}})
+        self.assertEqual(oracle.get_cost("Tokyo", "Atlanta"), 1)
+        self.assertEqual(oracle.get_cost("Osaka", "Atlanta"), DISTANCES[osaka][tokyo] + 1)
+        # undoing the build takes the station back out
+        b.undo(record)
+        self.assertEqual(oracle.get_cost("Tokyo", "Atlanta"), DISTANCES[tokyo][atlanta])
+        self.assertEqual(oracle.ground.tolist(), TravelOracle(b).ground.tolist())
+
+    def test_not_pickled(self):
+        b = Board(["playeronesid"])
+        TravelOracle(b)
+        copy = pickle.loads(pickle.dumps(b))
+        self.assertIsNone(copy.cities["Atlanta"].station_listener)
+        self.assertIsNone(b.clone().cities["Atlanta"].station_listener)
+        self.assertTrue(copy.cities["Atlanta"].has_research_station)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,113 @@
+from typing import Iterable, List, Union
+import numpy as np
+from board import Board, City, CityCard, Player
+from city_graph import *
+
+# more moves than any route between two cities takes, for "no research station to shuttle from"
+UNREACHABLE = NUM_CITIES
+# DISTANCES as a matrix
+DISTANCE_MATRIX: np.ndarray = np.array(DISTANCES, np.int16)
+
+
+class TravelOracle:
+    """
+    Answers "how many actions to get from here to there" on one board, counting moves
+    between adjacent cities (from the precomputed DISTANCES table), shuttle flights between
+    research stations, and direct or charter flights on the city cards given.
+    Keeps, for every city, the moves to the nearest research station and from the nearest
+    research station, and from those the fewest actions between every pair of cities
+    without spending cards. Building a station folds just that station in; everything is
+    only worked out again from scratch when a station goes away (i.e. Board.undo). Only
+    one oracle watches a board's stations at a time, and a clone of the board isn't watched.
+    """
+    __slots__ = ("board", "stations", "to_station", "from_station", "ground", "ground_rows")
+
+    def __init__(self, board: Board):
+        self.board = board
+        for city in board.cities.values():
+            city.station_listener = self.station_changed
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        """
+        Work out the distances to and from research stations for the board's current stations.
+        """
+        self.stations = 0
+        self.to_station: np.ndarray = np.full(NUM_CITIES, UNREACHABLE, np.int16)
+        self.from_station: np.ndarray = np.full(NUM_CITIES, UNREACHABLE, np.int16)
+        for city in self.board.cities.values():
+            if city.has_research_station:
+                self.stations |= 1 << city.index
+                self.fold_station(city.index)
+        self.update_ground()
+
+    def add_station(self, index: int) -> None:
+        """
+        Fold a new research station, at the city with the given index, into the distances.
+        """
+        self.stations |= 1 << index
+        self.fold_station(index)
+        self.update_ground()
+
+    def fold_station(self, index: int) -> None:
+        """
+        Take the station at the given index into account in to_station and from_station.
+        """
+        np.minimum(self.to_station, DISTANCE_MATRIX[:, index], out=self.to_station)
+        np.minimum(self.from_station, DISTANCE_MATRIX[index], out=self.from_station)
+
+    def update_ground(self) -> None:
+        """
+        Fewest actions between every pair of cities without spending cards: moving between
+        adjacent cities, plus at most one shuttle flight, since a second never helps.
+        """
+        self.ground: np.ndarray = np.minimum(
+            DISTANCE_MATRIX, self.to_station[:, None] + 1 + self.from_station[None, :])
+        # as lists too, since indexing those is much quicker for single lookups
+        self.ground_rows: List[List[int]] = self.ground.tolist()
+
+    def station_changed(self, city: City) -> None:
+        """
+        Called by a city on this board when its research station is built or removed.
+        """
+        if not city.has_research_station:
+            self.rebuild()
+        elif not self.stations >> city.index & 1:
+            self.add_station(city.index)
+
+    def get_cost(self, from_city: Union[str, City], to_city: Union[str, City],
+                 city_cards: Iterable[CityCard] = ()) -> int:
+        """
+        Fewest actions to get from one city to another, spending at most one of the given
+        city cards on a direct flight (to the card's city) or a charter flight (from it).
+        Routes spending more than one card aren't considered.
+        """
+        from_index = self.board.get_city(from_city).index
+        to_index = self.board.get_city(to_city).index
+        ground = self.ground_rows
+        cost = ground[from_index][to_index]
+        for card in city_cards:
+            # direct flight to the card's city, or get there and charter a flight
+            cost = min(cost, 1 + ground[card.index][to_index], ground[from_index][card.index] + 1)
+        return cost
+
+    def get_costs(self, from_city: Union[str, City], city_cards: Iterable[CityCard] = ()) -> List[int]:
+        """
+        get_cost from the given city to every city, by city index.
+        """
+        from_index = self.board.get_city(from_city).index
+        costs = self.ground[from_index]
+        indices = [card.index for card in city_cards]
+        if indices:
+            flown = self.ground[indices].min(axis=0) + 1
+            charter = costs[indices].min() + 1
+            costs = np.minimum(np.minimum(costs, flown), charter)
+            costs[from_index] = 0
+        return costs.tolist()
+
+    def get_player_cost(self, player: Union[str, Player], to_city: Union[str, City]) -> int:
+        """
+        Fewest actions for a player to get to the given city, using the cards in their hand.
+        """
+        player = self.board.get_player(player)
+        return self.get_cost(player.current_city, to_city, player.city_cards)